@@ -1,8 +1,20 @@
+import os
 import streamlit as st
+from utils import instrument, prefetch, warmup
+from utils.figure_cache import figure_cache
+from utils.session_loader import load_jobs, session_cache, session_report, store_stats
 
 # Hide the sidebar navigation
 st.set_page_config(page_title="F1 Strategy Visualization", page_icon="🏎️", initial_sidebar_state="collapsed")
 
+# Warm the session cache in the background, once per server process
+if os.environ.get('F1VIZ_PREFETCH'):
+    prefetch.start_background()
+
+# Preload the plotting libraries for the first chart, once per server process
+if os.environ.get('F1VIZ_WARMUP'):
+    warmup.start_background()
+
 # Title
 st.title("F1 Strategy Visualization")
 
@@ -12,12 +24,15 @@ visualizations = {
     "F1 Driver Standings Heatmap": "pages/app_driverstanding.py",
     "Fastest Lap Gear Shift Visualization": "pages/app_gearshift.py",
     "Driver Laptimes Scatterplot": "pages/app_laptime.py",
+    "Driver Telemetry Comparison": "pages/app_compare.py",
     "Driver-Specific Lap Time Styling": "pages/app_laptimestyling.py",
     "Qualifying Results Overview": "pages/app_quali.py",
+    "Race Positions and Gaps": "pages/app_positions.py",
     "F1 Session Data Viewer": "pages/app_session.py",
     "Speed Visualization on Track Map": "pages/app_speedvis.py",
     "Team Pace Comparison": "pages/app_teampace.py",
-    "Tyre Strategies During a Race": "pages/app_tyre.py"
+    "Tyre Strategies During a Race": "pages/app_tyre.py",
+    "Live Timing": "pages/app_live.py"
 }
 
 selected_vis = st.selectbox("Choose a Visualization", list(visualizations.keys()))
@@ -25,4 +40,63 @@ selected_vis = st.selectbox("Choose a Visualization", list(visualizations.keys()
 # Button to navigate
 if st.button("Go to Visualization"):
     st.session_state["selected_vis"] = visualizations[selected_vis]
-    st.switch_page(visualizations[selected_vis])  
+    st.switch_page(visualizations[selected_vis])
+
+# Shared session cache statistics
+with st.expander("Session cache"):
+    stats = session_cache.stats()
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Hits", stats['hits'])
+    col2.metric("Misses", stats['misses'])
+    col3.metric("Evictions", stats['evictions'])
+    col4.metric("Upgrades", stats['upgrades'])
+    col5.metric("Shared loads", stats['coalesced'])
+    st.caption(f"{stats['sessions']} sessions cached, "
+               f"{stats['memory_used_mb']:.0f} / {stats['memory_budget_mb']:.0f} MB used")
+    # Memory per session, with the laps and telemetry before and after compaction
+    report = session_report()
+    if report:
+        st.dataframe(report, hide_index=True)
+    # Session store shared with the other app processes
+    stored = store_stats()
+    if stored:
+        limit = f" of {stored['max_mb']:.0f}" if stored['max_mb'] else ""
+        st.caption(f"Shared store: {stored['sessions']} sessions, {stored['size_mb']:.0f}{limit} MB "
+                   f"without FastF1's raw cache, "
+                   f"{stored['loading']} loading now; {stored['waits']} loads waited for "
+                   f"another process, {stored['removed']} sessions removed by retention")
+
+# Sessions loading in the background
+running = load_jobs.running()
+if running:
+    with st.expander(f"Loading {len(running)} sessions"):
+        for job in running:
+            st.progress(job.progress(), text=f"{job.label}: {job.stage or 'waiting'} ({job.elapsed:.0f} s)")
+
+# Shared figure cache statistics
+with st.expander("Figure cache"):
+    stats = figure_cache.stats()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Hits", stats['hits'])
+    col2.metric("Misses", stats['misses'])
+    col3.metric("Evictions", stats['evictions'])
+    st.caption(f"{stats['figures']} figures cached, "
+               f"{stats['memory_used_mb']:.0f} / {stats['memory_budget_mb']:.0f} MB used")
+
+# Stage timings of recent requests on all pages
+instrument.performance_panel()
+
+# Background warm-up progress
+scheduler = prefetch.background_scheduler()
+if scheduler is not None:
+    with st.expander("Prefetch"):
+        status = scheduler.status()
+        finished = len(status['done']) + len(status['failed']) + len(status['skipped'])
+        st.progress(finished / status['planned'] if status['planned'] else 1.0,
+                    text=f"{len(status['done'])} / {status['planned']} sessions warmed")
+        for session in status['running']:
+            st.caption(f"Loading {session}")
+        for session, error in status['failed']:
+            st.warning(f"{session}: {error}")
+        for session in status['skipped']:
+            st.caption(f"Skipped {session}: disk budget exceeded")
@@ -0,0 +1,111 @@
+"""Benchmark of the lap time distribution chart.
+
+Draws the driver distribution chart of a race with seaborn's violin and
+swarm plots, as the page did before, and with the batched density
+estimates and point layouts of :mod:`utils.distribution`, for the top 10
+finishers and for the full field. ``--laps`` multiplies the laps of every
+driver (with a little noise), to see how the layouts scale with long
+races and long runs of practice laps::
+
+    python -m benchmarks.bench_distribution
+    python -m benchmarks.bench_distribution --laps 3
+"""
+import argparse
+import warnings
+
+import matplotlib
+matplotlib.use('Agg')
+import fastf1.plotting
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib import pyplot as plt
+
+from benchmarks.common import Recorder, add_common_arguments, finish
+from charts import driverdist
+from utils import session_loader
+from utils.distribution import LAYOUTS
+from utils.fixtures import FixtureSource
+from utils.session_loader import LAPS_ONLY
+
+YEAR = 2023
+EVENT = 1
+
+
+def seaborn_plot(session, driver_laps, finishing_order):
+    # The implementation the page used before
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.violinplot(data=driver_laps, x="Driver", y="LapTimeSeconds", hue="Driver",
+                   inner=None, density_norm="area", order=finishing_order,
+                   palette=fastf1.plotting.get_driver_color_mapping(session=session))
+    sns.swarmplot(data=driver_laps, x="Driver", y="LapTimeSeconds", order=finishing_order,
+                  hue="Compound", palette=fastf1.plotting.get_compound_mapping(session=session),
+                  hue_order=driver_laps["Compound"].unique().tolist(), linewidth=0, size=4)
+    plt.tight_layout()
+    return fig
+
+
+def _more_laps(driver_laps, factor):
+    # Every lap ``factor`` times, with up to 0.2 s of noise on the copies
+    if factor <= 1:
+        return driver_laps
+    rng = np.random.default_rng(0)
+    copies = [driver_laps] + [
+        driver_laps.assign(LapTimeSeconds=driver_laps["LapTimeSeconds"]
+                           + rng.uniform(-0.2, 0.2, len(driver_laps)))
+        for _ in range(factor - 1)
+    ]
+    return pd.concat(copies, ignore_index=True)
+
+
+def _draw(stage, draw):
+    with stage('plot'):
+        fig = draw()
+    with stage('render'):
+        fig.canvas.draw()
+    plt.close(fig)
+
+
+def bench_distribution(stage, session, factor, summary):
+    for field, n_drivers in (('top10', 10), ('field', None)):
+        driver_laps, finishing_order = driverdist.prepare(session, n_drivers)
+        driver_laps = _more_laps(driver_laps, factor)
+        summary[f'{field} laps per driver'] = \
+            driver_laps.groupby("Driver", observed=True).size().max()
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            _draw(lambda s: stage(f'seaborn-{field}', s),
+                  lambda: seaborn_plot(session, driver_laps, finishing_order))
+        summary[f'{field} seaborn warnings'] = len(caught)
+
+        for layout in LAYOUTS:
+            _draw(lambda s: stage(f'{layout}-{field}', s),
+                  lambda: driverdist.plot(session, driver_laps, finishing_order, YEAR, layout))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--laps', type=int, default=1,
+                        help="multiply the laps of every driver by this factor")
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter('ignore')
+    session_loader.use_source(FixtureSource())
+    session = session_loader.load_session(YEAR, EVENT, 'R', LAPS_ONLY)
+
+    recorder = Recorder()
+    summary = {}
+    for _ in range(args.repeat):
+        bench_distribution(recorder.stage, session, args.laps, summary)
+    if not args.no_trace:
+        with recorder.tracing():
+            bench_distribution(recorder.stage, session, args.laps, summary)
+    for name, value in summary.items():
+        print(f"{name:<28}{value:>10}")
+    finish(recorder, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Benchmark of the import time of the app and its pages.
+
+Every measurement runs in a fresh interpreter, like the first switch to a
+page in a new server process. For ``app.py`` and every page in ``pages/``
+it times the module level imports of the script (stage ``page``) and then
+the import of its chart module, which the page defers until a button is
+pressed (stage ``first click``). With ``--warm`` the shared libraries are
+imported by :func:`utils.warmup.warm_up` first, as at server start.
+
+Pages must not load plotting libraries before a button is pressed; the
+benchmark fails when one does::
+
+    python -m benchmarks.bench_imports
+    python -m benchmarks.bench_imports --output imports.json
+    python -m benchmarks.bench_imports --baseline imports.json
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.common import compare
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules a page must not import before the user asks for a chart
+DEFERRED = ['matplotlib.pyplot', 'seaborn', 'fastf1.plotting', 'scipy.stats', 'plotly.express']
+
+_MEASURE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+if {warm!r}:
+    from utils.warmup import warm_up
+    warm_up()
+loaded = set(sys.modules)
+start = time.perf_counter()
+{imports}
+page_ms = (time.perf_counter() - start) * 1000
+eager = [name for name in {deferred!r} if name in sys.modules and name not in loaded]
+start = time.perf_counter()
+{chart}
+click_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{'page_ms': page_ms, 'click_ms': click_ms, 'eager': eager}}))
+"""
+
+
+def scripts():
+    yield 'app', os.path.join(ROOT, 'app.py')
+    for name in sorted(os.listdir(os.path.join(ROOT, 'pages'))):
+        if name.endswith('.py'):
+            yield name[:-3].removeprefix('app_'), os.path.join(ROOT, 'pages', name)
+
+
+def script_imports(path):
+    """Module level import statements of a script and the modules it
+    passes to ``lazy_import``."""
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    imports, lazy = [], []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            imports.append(ast.unparse(node))
+        elif (isinstance(node, ast.Assign) and isinstance(node.value, ast.Call)
+              and getattr(node.value.func, 'id', None) == 'lazy_import'):
+            lazy.append(node.value.args[0].value)
+    return imports, lazy
+
+
+def measure(path, warm=False):
+    imports, lazy = script_imports(path)
+    code = _MEASURE.format(root=ROOT, warm=warm, deferred=DEFERRED,
+                           imports='\n'.join(imports) or 'pass',
+                           chart='\n'.join(f"import {name}" for name in lazy) or 'pass')
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                            text=True, cwd=ROOT, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="fresh interpreters per script, the fastest one is reported")
+    parser.add_argument('--warm', action='store_true',
+                        help="run the server warm-up before the page imports")
+    parser.add_argument('--output', help="write the results as JSON")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative regression (default: 0.25)")
+    parser.add_argument('--min-ms', type=float, default=50.0,
+                        help="ignore timing regressions of faster stages")
+    args = parser.parse_args(argv)
+
+    rows, eager = [], {}
+    print(f"{'script':<16}{'page ms':>10}{'first click ms':>16}")
+    for name, path in scripts():
+        runs = [measure(path, args.warm) for _ in range(args.repeat)]
+        page_ms = min(run['page_ms'] for run in runs)
+        click_ms = min(run['click_ms'] for run in runs)
+        if runs[0]['eager']:
+            eager[name] = runs[0]['eager']
+        print(f"{name:<16}{page_ms:>10.0f}{click_ms:>16.0f}")
+        for stage, wall_ms in (('page', page_ms), ('first click', click_ms)):
+            rows.append({'group': name, 'stage': stage, 'wall_ms': wall_ms,
+                         'peak_rss_mb': None, 'net_blocks': None, 'alloc_peak_mb': None})
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+    failed = False
+    for name, modules in eager.items():
+        print(f"EAGER {name}: imports {', '.join(modules)} before a button is pressed")
+        failed = True
+    if args.baseline:
+        for row, metric, base in compare(rows, args.baseline, args.tolerance, args.min_ms):
+            print(f"REGRESSION {row['group']}/{row['stage']}: {metric} "
+                  f"{row[metric]:.1f} vs baseline {base:.1f}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark of the telemetry level of detail reduction on the track maps.
+
+Draws the speed and gear track maps once at full resolution (tolerance 0)
+and once with the given tolerance, and reports the number of drawn
+segments, the plot and render times and the share of pixels that differ::
+
+    python -m benchmarks.bench_lod
+    python -m benchmarks.bench_lod --tolerance-lod 0.001 --hz 50
+"""
+import argparse
+import io
+import warnings
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+from matplotlib import pyplot as plt
+
+from benchmarks.common import Recorder, add_common_arguments, finish
+from charts import gearshift, speedvis
+from utils import lod, session_loader
+from utils.fixtures import FixtureSource
+from utils.session_loader import LAPS_AND_TELEMETRY
+
+YEAR = 2023
+EVENT = 1
+DRIVER = 'VER'
+
+
+def _segments(fig):
+    # Drawn line pieces of all line collections and lines of the map axes
+    ax = fig.axes[0]
+    return (sum(max(len(path.vertices) - 1, 0)
+                for collection in ax.collections for path in collection.get_paths())
+            + sum(len(line.get_xdata()) - 1 for line in ax.lines))
+
+
+def _render(stage, fig):
+    with stage('render'):
+        fig.canvas.draw()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+    pixels = np.asarray(fig.canvas.buffer_rgba())[..., :3].astype(int)
+    segments = _segments(fig)
+    plt.close(fig)
+    return pixels, segments
+
+
+def _resample(telemetry, hz):
+    # Telemetry at a higher sample rate along the same trace
+    if not hz:
+        return telemetry
+    n = int(len(telemetry) * hz / 10)
+    t = np.linspace(0, len(telemetry) - 1, n)
+    columns = {name: np.interp(t, np.arange(len(telemetry)), telemetry[name])
+               for name in ('X', 'Y', 'Speed')}
+    columns['nGear'] = telemetry['nGear'].to_numpy()[np.round(t).astype(int)]
+    return telemetry.iloc[:0].reindex(range(n)).assign(**columns)
+
+
+def bench_lod(stage, session, tolerance, hz, summary):
+    telemetry = _resample(speedvis.prepare(session, DRIVER), hz)
+    tel = _resample(gearshift.prepare(session, DRIVER), hz)
+
+    for name, draw in (
+        ('speedvis', lambda tol: speedvis.plot(session, telemetry, DRIVER, YEAR, tol)),
+        ('gearshift', lambda tol: gearshift.plot(session, tel, DRIVER, tol)),
+    ):
+        images = {}
+        for label, tol in (('full', 0), ('lod', tolerance)):
+            group = f'{name}-{label}'
+            with stage(group, 'plot'):
+                fig = draw(tol)
+            images[label], segments = _render(lambda s: stage(group, s), fig)
+            summary[group] = segments
+        changed = np.abs(images['full'] - images['lod']).max(axis=2) > 32
+        summary[f'{name} pixels changed'] = f'{changed.mean():.3%}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tolerance-lod', type=float, default=lod.DEFAULT_TOLERANCE,
+                        help="position tolerance of the reduced maps")
+    parser.add_argument('--hz', type=float, default=0,
+                        help="resample the telemetry to this rate first")
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter('ignore')
+    session_loader.use_source(FixtureSource())
+    session = session_loader.load_session(YEAR, EVENT, 'Q', LAPS_AND_TELEMETRY)
+
+    recorder = Recorder()
+    summary = {}
+    for _ in range(args.repeat):
+        bench_lod(recorder.stage, session, args.tolerance_lod, args.hz, summary)
+    if not args.no_trace:
+        with recorder.tracing():
+            bench_lod(recorder.stage, session, args.tolerance_lod, args.hz, summary)
+    for name, value in summary.items():
+        print(f"{name:<28}{value:>10}")
+    finish(recorder, args)
+
+
+if __name__ == '__main__':
+    main()
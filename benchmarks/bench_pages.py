@@ -0,0 +1,212 @@
+"""Headless benchmark of the data preparation and figure building of every
+page in ``pages/``.
+
+Sessions are served by the offline fixture source, so no network access is
+needed. Each page is split into the stages load (cold session load),
+prepare, plot and render (encoding the figure the way Streamlit does)::
+
+    python -m benchmarks.bench_pages --output bench.json
+    python -m benchmarks.bench_pages --baseline bench.json
+"""
+import argparse
+import io
+import warnings
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import pyplot as plt
+
+from benchmarks.common import Recorder, add_common_arguments, finish
+from charts import (
+    compare,
+    driverdist,
+    driverstanding,
+    gearshift,
+    laptime,
+    laptimestyling,
+    positions,
+    quali,
+    session as session_chart,
+    speedvis,
+    teampace,
+    tyre,
+)
+from utils import session_loader
+from utils.fixtures import FixtureSource, make_standings_results
+from utils.session_loader import LAPS_AND_TELEMETRY, LAPS_ONLY
+from utils.standings import StandingsTable
+
+YEAR = 2023
+EVENT = 1
+RACE = 'Synthetic Grand Prix'
+DRIVER = 'VER'
+
+
+def _load(stage, session_type, parts):
+    session_loader.session_cache.clear()
+    with stage('load'):
+        return session_loader.load_session(YEAR, EVENT, session_type, parts)
+
+
+def _render(stage, fig):
+    with stage('render'):
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', bbox_inches='tight')
+    plt.close(fig)
+
+
+def bench_compare(stage):
+    session = _load(stage, 'Q', LAPS_AND_TELEMETRY)
+    drivers = session.results['Abbreviation'].tolist()
+    with stage('prepare'):
+        comparison = compare.prepare(session, drivers)
+    with stage('plot'):
+        fig = compare.plot(session, comparison, DRIVER, YEAR)
+        map_fig = compare.plot_dominance(session, comparison, YEAR)
+    _render(stage, fig)
+    plt.close(map_fig)
+
+
+def bench_driverdist(stage):
+    session = _load(stage, 'R', LAPS_ONLY)
+    with stage('prepare'):
+        driver_laps, finishing_order = driverdist.prepare(session)
+    with stage('plot'):
+        fig = driverdist.plot(session, driver_laps, finishing_order, YEAR)
+    _render(stage, fig)
+
+
+def bench_driverstanding(stage):
+    with stage('load'):
+        results = make_standings_results(YEAR)
+    with stage('prepare'):
+        standings = StandingsTable(engine=None)
+        standings.add_results(YEAR, results)
+        table = standings.heatmap([YEAR])
+    with stage('plot'):
+        fig = driverstanding.plot(table)
+    with stage('render'):
+        fig.to_json()
+
+
+def bench_gearshift(stage):
+    session = _load(stage, 'Q', LAPS_AND_TELEMETRY)
+    with stage('prepare'):
+        tel = gearshift.prepare(session, DRIVER)
+    with stage('plot'):
+        fig = gearshift.plot(session, tel, DRIVER)
+    _render(stage, fig)
+
+
+def bench_laptime(stage):
+    session = _load(stage, 'R', LAPS_ONLY)
+    with stage('prepare'):
+        driver_laps = laptime.prepare(session, DRIVER)
+    with stage('plot'):
+        fig = laptime.plot(session, driver_laps, DRIVER, YEAR, RACE)
+    _render(stage, fig)
+
+
+def bench_laptimestyling(stage):
+    session = _load(stage, 'R', LAPS_ONLY)
+    with stage('prepare'):
+        driver_laps = laptimestyling.prepare(session)
+    with stage('plot'):
+        fig = laptimestyling.plot(session, driver_laps)
+    _render(stage, fig)
+
+
+def bench_positions(stage):
+    session = _load(stage, 'R', LAPS_ONLY)
+    with stage('prepare'):
+        timeline = positions.prepare(session)
+    with stage('plot'):
+        fig = positions.plot(session, timeline, YEAR)
+    _render(stage, fig)
+
+
+def bench_quali(stage):
+    session = _load(stage, 'Q', LAPS_ONLY | {'messages'})
+    with stage('prepare'):
+        fastest_laps, pole_lap = quali.prepare(session)
+    with stage('plot'):
+        fig = quali.plot(session, fastest_laps, pole_lap)
+    _render(stage, fig)
+
+
+def bench_session(stage):
+    session = _load(stage, 'R', LAPS_ONLY)
+    with stage('prepare'):
+        session_chart.prepare(session)
+
+
+def bench_speedvis(stage):
+    session = _load(stage, 'Q', LAPS_AND_TELEMETRY)
+    with stage('prepare'):
+        telemetry = speedvis.prepare(session, DRIVER)
+    with stage('plot'):
+        fig = speedvis.plot(session, telemetry, DRIVER, YEAR)
+    _render(stage, fig)
+
+
+def bench_teampace(stage):
+    session = _load(stage, 'R', LAPS_ONLY)
+    with stage('prepare'):
+        transformed_laps, team_order = teampace.prepare(session)
+    with stage('plot'):
+        fig = teampace.plot(session, transformed_laps, team_order, YEAR)
+    _render(stage, fig)
+
+
+def bench_tyre(stage):
+    session = _load(stage, 'R', LAPS_ONLY)
+    with stage('prepare'):
+        drivers, stints = tyre.prepare(session)
+    with stage('plot'):
+        fig = tyre.plot(session, drivers, stints, YEAR, RACE)
+    _render(stage, fig)
+
+
+PAGES = {
+    'compare': bench_compare,
+    'driverdist': bench_driverdist,
+    'driverstanding': bench_driverstanding,
+    'gearshift': bench_gearshift,
+    'laptime': bench_laptime,
+    'laptimestyling': bench_laptimestyling,
+    'positions': bench_positions,
+    'quali': bench_quali,
+    'session': bench_session,
+    'speedvis': bench_speedvis,
+    'teampace': bench_teampace,
+    'tyre': bench_tyre,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', nargs='+', choices=list(PAGES),
+                        default=list(PAGES), help="pages to run (default: all)")
+    parser.add_argument('--recorded',
+                        help="session store directory with recorded sessions")
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter('ignore')
+    session_loader.use_source(FixtureSource(args.recorded))
+    recorder = Recorder()
+
+    def run_all():
+        for name in args.pages:
+            PAGES[name](lambda stage_name: recorder.stage(name, stage_name))
+
+    for _ in range(args.repeat):
+        run_all()
+    if not args.no_trace:
+        with recorder.tracing():
+            run_all()
+    finish(recorder, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark of the qualifying fastest lap extraction.
+
+Compares the former per-driver ``pick_driver(drv).pick_fastest()`` loop and
+per-lap team colour lookup with the grouped computations in
+:mod:`utils.laps` on a full qualifying session::
+
+    python -m benchmarks.bench_quali
+    python -m benchmarks.bench_quali --recorded session_store
+"""
+import argparse
+import warnings
+
+import fastf1.plotting
+import pandas as pd
+from fastf1.core import Laps
+
+from benchmarks.common import Recorder, add_common_arguments, finish
+from utils import session_loader
+from utils.fixtures import FixtureSource
+from utils.laps import fastest_laps, ideal_laps, segment_bests
+from utils.session_loader import LAPS_ONLY
+
+YEAR = 2023
+EVENT = 1
+
+
+def loop_fastest_laps(session):
+    # The implementation the qualifying page used before
+    drivers = pd.unique(session.laps['Driver'])
+    laps = Laps([session.laps.pick_driver(drv).pick_fastest() for drv in drivers])
+    laps = laps.sort_values(by='LapTime').reset_index(drop=True)
+    laps['LapTimeDelta'] = laps['LapTime'] - laps.pick_fastest()['LapTime']
+    return laps
+
+
+def bench_quali(stage, session):
+    with stage('loop', 'fastest'):
+        expected = loop_fastest_laps(session)
+    with stage('grouped', 'fastest'):
+        fastest = fastest_laps(session.laps)
+    if fastest['Driver'].tolist() != expected['Driver'].tolist():
+        raise AssertionError("grouped fastest laps differ from the loop")
+
+    with stage('loop', 'colors'):
+        [fastf1.plotting.get_team_color(lap['Team'], session=session)
+         for _, lap in expected.iterlaps()]
+    with stage('grouped', 'colors'):
+        colors = {team: fastf1.plotting.get_team_color(team, session=session)
+                  for team in fastest['Team'].unique()}
+        fastest['Team'].map(colors)
+
+    with stage('grouped', 'segments'):
+        segment_bests(session.laps)
+    with stage('grouped', 'ideal'):
+        ideal_laps(session.laps)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recorded',
+                        help="session store directory with recorded sessions")
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter('ignore')
+    session_loader.use_source(FixtureSource(args.recorded))
+    session = session_loader.load_session(YEAR, EVENT, 'Q', LAPS_ONLY | {'messages'})
+    print(f"{session}: {len(session.laps)} laps")
+
+    recorder = Recorder()
+    for _ in range(args.repeat):
+        bench_quali(recorder.stage, session)
+    if not args.no_trace:
+        with recorder.tracing():
+            bench_quali(recorder.stage, session)
+    finish(recorder, args)
+
+
+if __name__ == '__main__':
+    main()
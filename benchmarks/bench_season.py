@@ -0,0 +1,76 @@
+"""Benchmark of the season batch mode.
+
+Reduces every race of a 22 round season to team and driver pace
+statistics, once by loading the sessions one after the other in this
+process and once through the process pool of :mod:`utils.season`::
+
+    python -m benchmarks.bench_season
+    python -m benchmarks.bench_season --workers 8 --recorded session_store
+"""
+import argparse
+import warnings
+
+import pandas as pd
+
+from benchmarks.common import Recorder, add_common_arguments, finish
+from utils import session_loader
+from utils.fixtures import FixtureSource
+from utils.season import SeasonBatch, reduce_session
+from utils.session_loader import LAPS_ONLY
+
+YEAR = 2023
+ROUNDS = range(1, 23)
+
+
+def sequential_season(session_type):
+    # Every session is loaded into the shared cache before it is reduced
+    return pd.concat([
+        reduce_session(session_loader.load_session(YEAR, rnd, session_type, LAPS_ONLY))
+        for rnd in ROUNDS
+    ], ignore_index=True)
+
+
+def bench_season(stage, batch):
+    session_loader.session_cache.clear()
+    with stage('sequential', 'season'):
+        expected = sequential_season('R')
+    # No reduction is cached yet; the pool of the batch is kept, like in
+    # the app, so only the first repeat starts its workers
+    batch.clear()
+    session_loader.session_cache.clear()
+    with stage('pool', 'season'):
+        table = batch.season(YEAR, 'R', ROUNDS)
+
+    if not table[['Round', 'Name']].equals(expected[['Round', 'Name']]) \
+            or not (table['Median'] - expected['Median']).abs().max() < 1e-9:
+        raise AssertionError("pooled season differs from the sequential one")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recorded',
+                        help="session store directory with recorded sessions")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="worker processes of the pool")
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter('ignore')
+    session_loader.use_source(FixtureSource(args.recorded))
+
+    recorder = Recorder()
+    batch = SeasonBatch(args.workers)
+    try:
+        for _ in range(args.repeat):
+            bench_season(recorder.stage, batch)
+        if not args.no_trace:
+            # Allocations of the worker processes are not traced
+            with recorder.tracing():
+                bench_season(recorder.stage, batch)
+    finally:
+        batch.close()
+    finish(recorder, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Benchmark of several processes loading the same session.
+
+Starts ``--processes`` processes at once that all ask for the same
+synthetic session, like replicas of the app behind a load balancer right
+after a session ends:
+
+* ``separate``: every process has its own store, as with a cache per
+  process, so every one of them loads the session
+* ``shared``: all processes use one store, so one process loads the
+  session while the others wait and then restore it from the store
+
+It reports the wall time of the slowest process, the number of loads and
+how many processes waited. Then it stores ``--sessions`` more sessions in
+the shared store with a size limit of ``--max-mb`` to show the retention
+policy at work::
+
+    python -m benchmarks.bench_shared_store
+    python -m benchmarks.bench_shared_store --processes 8 --max-mb 100
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+from benchmarks.common import compare
+from utils.session_loader import LAPS_AND_TELEMETRY
+
+YEAR = 2023
+EVENT = 1
+
+
+def _load(root, event, parts, barrier):
+    # One process: load the session through its store, counting the loads
+    warnings.simplefilter('ignore')
+    from utils.fixtures import populate_session
+    from utils.session_store import SessionStore
+
+    loads = []
+
+    def load(session, missing):
+        loads.append(missing)
+        populate_session(session, missing)
+
+    store = SessionStore(root)
+    session = _session(event)
+    if barrier is not None:
+        barrier.wait()
+    start = time.perf_counter()
+    store.load(session, frozenset(parts), load)
+    return time.perf_counter() - start, len(loads), store.index.waits
+
+
+def _run(mode, root, processes, parts):
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Manager().Barrier(processes)
+    roots = [root if mode == 'shared' else os.path.join(root, str(i)) for i in range(processes)]
+    with context.Pool(processes) as pool:
+        results = pool.starmap(_load, [(r, EVENT, sorted(parts), barrier) for r in roots])
+    return {
+        'wall_s': max(wall for wall, _, _ in results),
+        'loads': sum(loads for _, loads, _ in results),
+        'waited': sum(waits for _, _, waits in results),
+    }
+
+
+def _retention(root, sessions, max_mb, parts):
+    # More sessions into the shared store than fit into max_mb
+    from utils.session_store import SessionStore
+
+    store = SessionStore(root, max_bytes=int(max_mb * 1024 ** 2))
+    for event in range(EVENT + 1, EVENT + 1 + sessions):
+        _load(root, event, sorted(parts), None)
+        # Each store applies the policy after writing a session
+        store.index.prune(keep=store.session_key(_session(event)))
+    return store.index.stats()
+
+
+def _session(event):
+    from utils.fixtures import make_session
+    return make_session(YEAR, event, 'R')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--parts', nargs='+', default=sorted(LAPS_AND_TELEMETRY))
+    parser.add_argument('--sessions', type=int, default=4,
+                        help="sessions to store for the retention check")
+    parser.add_argument('--max-mb', type=float, default=100,
+                        help="store size limit for the retention check")
+    parser.add_argument('--output', help="write the results as JSON")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative regression (default: 0.25)")
+    parser.add_argument('--min-ms', type=float, default=50.0,
+                        help="ignore timing regressions of faster stages")
+    args = parser.parse_args(argv)
+
+    rows = []
+    root = tempfile.mkdtemp(prefix='f1viz-store-')
+    try:
+        print(f"{'mode':<12}{'slowest s':>10}{'loads':>8}{'waited':>8}")
+        for mode in ('separate', 'shared'):
+            result = _run(mode, os.path.join(root, mode), args.processes, args.parts)
+            print(f"{mode:<12}{result['wall_s']:>10.1f}{result['loads']:>8}{result['waited']:>8}")
+            rows.append({'group': mode, 'stage': 'load', 'wall_ms': result['wall_s'] * 1000,
+                         'peak_rss_mb': None, 'net_blocks': None, 'alloc_peak_mb': None})
+
+        stats = _retention(os.path.join(root, 'shared'), args.sessions, args.max_mb, args.parts)
+        print(f"retention: {stats['sessions']} of {args.sessions + 1} sessions kept, "
+              f"{stats['size_mb']:.0f} MB of {args.max_mb:g} MB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(rows, f, indent=2)
+    if args.baseline:
+        regressions = compare(rows, args.baseline, args.tolerance, args.min_ms)
+        for row, metric, base in regressions:
+            print(f"REGRESSION {row['group']}/{row['stage']}: {metric} "
+                  f"{row[metric]:.1f} vs baseline {base:.1f}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
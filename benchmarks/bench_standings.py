@@ -0,0 +1,67 @@
+"""Benchmark of building season standings against a local mock Ergast API.
+
+Compares a serial fetch of every round with the concurrent standings engine,
+a repeated request served from memory and a new process reading the on-disk
+round cache::
+
+    python -m benchmarks.bench_standings --latency 0.05
+"""
+import argparse
+import tempfile
+
+from benchmarks.common import Recorder, add_common_arguments, finish
+from charts import driverstanding
+from utils.fixtures import MockErgastServer
+from utils.standings import StandingsEngine, StandingsTable
+
+YEAR = 2023
+
+
+def bench_standings(stage, server, workers):
+    with stage('serial'):
+        StandingsEngine(server.url, cache_dir=None, max_workers=1).season_results(YEAR)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        engine = StandingsEngine(server.url, cache_dir=cache_dir, max_workers=workers)
+        with stage('parallel'):
+            engine.season_results(YEAR)
+        with stage('memory'):
+            results = engine.season_results(YEAR)
+        with stage('disk'):
+            # Only the schedule is requested again
+            StandingsEngine(server.url, cache_dir=cache_dir).season_results(YEAR)
+
+    with stage('prepare'):
+        standings = StandingsTable(engine=None)
+        standings.add_results(YEAR, results)
+        table = standings.heatmap([YEAR])
+    with stage('plot'):
+        driverstanding.plot(table)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help="seconds the mock API waits per request")
+    parser.add_argument('--workers', type=int, default=8,
+                        help="concurrent requests of the engine")
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    recorder = Recorder()
+    with MockErgastServer(YEAR, latency=args.latency) as server:
+        def run():
+            bench_standings(lambda name: recorder.stage('standings', name),
+                            server, args.workers)
+
+        for _ in range(args.repeat):
+            run()
+        if not args.no_trace:
+            with recorder.tracing():
+                run()
+        print(f"{server.requests} requests over {server.connections} connections")
+    finish(recorder, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark of the race position and gap timeline.
+
+Compares a per-lap loop, which sorts the drivers again after every lap,
+with the grouped computation in :mod:`utils.timeline` on a 70 lap race
+with 20 cars::
+
+    python -m benchmarks.bench_timeline
+    python -m benchmarks.bench_timeline --recorded session_store
+"""
+import argparse
+import warnings
+
+import pandas as pd
+
+from benchmarks.common import Recorder, add_common_arguments, finish
+from utils import session_loader
+from utils.fixtures import FixtureSource
+from utils.session_loader import LAPS_ONLY
+from utils.timeline import race_timeline
+
+YEAR = 2023
+EVENT = 1
+
+
+def loop_timeline(laps):
+    # Straightforward version: accumulate the race time of every driver and
+    # rank the field lap by lap
+    race_time = {}
+    rows = []
+    for lap_number in sorted(laps['LapNumber'].dropna().unique()):
+        lap = laps.loc[laps['LapNumber'] == lap_number]
+        for _, row in lap.iterrows():
+            lap_time = row['LapTime']
+            if pd.isna(lap_time):
+                lap_time = row['Time'] - row['LapStartTime']
+            race_time[row['Driver']] = race_time.get(row['Driver'], 0.0) + lap_time.total_seconds()
+            rows.append({'Driver': row['Driver'], 'LapNumber': int(lap_number),
+                         'RaceTime': race_time[row['Driver']]})
+        ordered = sorted(rows[-len(lap):], key=lambda r: r['RaceTime'])
+        for position, r in enumerate(ordered, start=1):
+            r['Position'] = position
+            r['GapToLeader'] = r['RaceTime'] - ordered[0]['RaceTime']
+    return pd.DataFrame(rows)
+
+
+def bench_timeline(stage, session):
+    with stage('loop', 'timeline'):
+        expected = loop_timeline(session.laps)
+    with stage('grouped', 'timeline'):
+        timeline = race_timeline(session.laps)
+
+    merged = timeline.merge(expected, on=['Driver', 'LapNumber'], suffixes=('', '_loop'))
+    if len(merged) != len(expected) or not merged['Position'].equals(merged['Position_loop']):
+        raise AssertionError("grouped timeline differs from the loop")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recorded',
+                        help="session store directory with recorded sessions")
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter('ignore')
+    session_loader.use_source(FixtureSource(args.recorded))
+    session = session_loader.load_session(YEAR, EVENT, 'R', LAPS_ONLY)
+    print(f"{session}: {len(session.laps)} laps, "
+          f"{session.laps['Driver'].nunique()} drivers")
+
+    recorder = Recorder()
+    for _ in range(args.repeat):
+        bench_timeline(recorder.stage, session)
+    if not args.no_trace:
+        with recorder.tracing():
+            bench_timeline(recorder.stage, session)
+    finish(recorder, args)
+
+
+if __name__ == '__main__':
+    main()
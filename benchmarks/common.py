@@ -0,0 +1,116 @@
+"""Measurement helpers shared by the benchmark scripts."""
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from utils.instrument import peak_rss_mb
+
+
+class Recorder:
+    """Collects per-stage wall time, the process peak RSS after each stage
+    and allocation figures.
+
+    Wall time is kept as the minimum over all repetitions. Allocation peaks
+    are only recorded while ``tracemalloc`` is tracing, since tracing slows
+    everything down and would distort the timings.
+    """
+
+    def __init__(self):
+        self.records = {}
+
+    @contextmanager
+    def stage(self, group, name):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            start_traced = tracemalloc.get_traced_memory()[0]
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_ms = (time.perf_counter() - start) * 1000
+            record = self.records.setdefault((group, name), {
+                'group': group, 'stage': name, 'wall_ms': wall_ms,
+                'peak_rss_mb': None, 'net_blocks': None, 'alloc_peak_mb': None,
+            })
+            if tracing:
+                record['alloc_peak_mb'] = \
+                    (tracemalloc.get_traced_memory()[1] - start_traced) / 1024 ** 2
+            else:
+                record['wall_ms'] = min(record['wall_ms'], wall_ms)
+                record['peak_rss_mb'] = peak_rss_mb()
+                record['net_blocks'] = sys.getallocatedblocks() - blocks
+
+    @contextmanager
+    def tracing(self):
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            tracemalloc.stop()
+
+    def rows(self):
+        return list(self.records.values())
+
+    def print_table(self, title=None):
+        if title:
+            print(title)
+        print(f"{'group':<16}{'stage':<12}{'wall ms':>10}{'peak RSS MB':>13}"
+              f"{'net blocks':>12}{'alloc peak MB':>15}")
+        for row in self.rows():
+            alloc = '' if row['alloc_peak_mb'] is None else f"{row['alloc_peak_mb']:.1f}"
+            print(f"{row['group']:<16}{row['stage']:<12}{row['wall_ms']:>10.1f}"
+                  f"{row['peak_rss_mb']:>13.0f}{row['net_blocks']:>12}{alloc:>15}")
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.rows(), f, indent=2)
+
+
+def compare(rows, baseline_path, tolerance, min_ms):
+    """Return the stages that got slower or allocate more than the baseline."""
+    with open(baseline_path) as f:
+        baseline = {(row['group'], row['stage']): row for row in json.load(f)}
+    regressions = []
+    for row in rows:
+        base = baseline.get((row['group'], row['stage']))
+        if base is None:
+            continue
+        if (base['wall_ms'] >= min_ms
+                and row['wall_ms'] > base['wall_ms'] * (1 + tolerance)):
+            regressions.append((row, 'wall_ms', base['wall_ms']))
+        if (base.get('alloc_peak_mb') and row['alloc_peak_mb'] is not None
+                and row['alloc_peak_mb'] > base['alloc_peak_mb'] * (1 + tolerance)):
+            regressions.append((row, 'alloc_peak_mb', base['alloc_peak_mb']))
+    return regressions
+
+
+def add_common_arguments(parser):
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="timed repetitions, the fastest one is reported")
+    parser.add_argument('--no-trace', action='store_true',
+                        help="skip the extra tracemalloc pass for allocation peaks")
+    parser.add_argument('--output', help="write the results as JSON")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative regression (default: 0.25)")
+    parser.add_argument('--min-ms', type=float, default=5.0,
+                        help="ignore timing regressions of faster stages")
+
+
+def finish(recorder, args):
+    """Print and save the results; exit non-zero on regressions."""
+    recorder.print_table()
+    if args.output:
+        recorder.save(args.output)
+    if args.baseline:
+        regressions = compare(recorder.rows(), args.baseline, args.tolerance,
+                              args.min_ms)
+        for row, metric, base in regressions:
+            print(f"REGRESSION {row['group']}/{row['stage']}: {metric} "
+                  f"{row[metric]:.1f} vs baseline {base:.1f}")
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,6 @@
+"""Data preparation and figure building for the Streamlit pages.
+
+Each module mirrors one page in ``pages/``: a ``prepare`` function that
+turns a loaded session into the data to plot and a ``plot`` function that
+builds the figure, so the same code can run headlessly.
+"""
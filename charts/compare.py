@@ -0,0 +1,83 @@
+import fastf1.plotting
+import numpy as np
+from matplotlib import colormaps
+from matplotlib import pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+from utils.compare import compare_laps
+from utils.instrument import timed
+from utils.track import track_geometry
+
+
+@timed('prepare')
+def prepare(session, drivers, lap_numbers=None):
+    if len(drivers) < 2:
+        raise ValueError("Select at least two drivers to compare!")
+    return compare_laps(session, drivers, lap_numbers)
+
+
+def _driver_styles(session, drivers):
+    return {drv: fastf1.plotting.get_driver_style(drv, style=['color', 'linestyle'], session=session)
+            for drv in drivers}
+
+
+@timed('plot')
+def plot(session, comparison, reference, year):
+    styles = _driver_styles(session, comparison.drivers)
+    distance = comparison.distance
+    time_delta = comparison.time_delta(reference)
+
+    # Speed, throttle, brake and the running time delta along the lap
+    fig, axes = plt.subplots(4, 1, sharex=True, figsize=(12, 10),
+                             gridspec_kw={'height_ratios': [3, 1, 1, 2]})
+    for i, driver in enumerate(comparison.drivers):
+        axes[0].plot(distance, comparison.channels['Speed'][i], label=driver, **styles[driver])
+        axes[1].plot(distance, comparison.channels['Throttle'][i], **styles[driver])
+        axes[2].plot(distance, comparison.channels['Brake'][i], **styles[driver])
+        axes[3].plot(distance, time_delta[i], **styles[driver])
+
+    axes[0].set_ylabel("Speed [km/h]")
+    axes[0].legend(loc='lower right', ncol=min(len(comparison.drivers), 5))
+    axes[1].set_ylabel("Throttle [%]")
+    axes[2].set_ylabel("Brake")
+    axes[3].set_ylabel(f"Delta to {reference} [s]")
+    axes[3].axhline(0, color='grey', linewidth=0.8)
+    axes[3].set_xlabel("Distance [m]")
+    for ax in axes:
+        ax.grid(True, linestyle='--', alpha=0.4)
+
+    plt.suptitle(f"{session.event['EventName']} {year} {session.name} - Telemetry Comparison")
+    plt.tight_layout()
+    return fig
+
+
+@timed('plot')
+def plot_dominance(session, comparison, year, count=25):
+    bounds, _, fastest = comparison.mini_sectors(count)
+
+    # Teammates share a colour, use a qualitative palette if that happens
+    colors = {drv: style['color'] for drv, style in _driver_styles(session, comparison.drivers).items()}
+    if len(set(colors.values())) < len(colors):
+        palette = colormaps['tab20'].colors
+        colors = {drv: palette[i % len(palette)] for i, drv in enumerate(comparison.drivers)}
+
+    # One polyline per mini-sector on the cached circuit centerline
+    geometry = track_geometry(session)
+    x, y = geometry.rotate(*geometry.position_at(comparison.distance))
+    sectors = [np.column_stack([x[start:end + 1], y[start:end + 1]])
+               for start, end in zip(bounds[:-1], bounds[1:])]
+    winners = [comparison.drivers[i] for i in fastest]
+
+    fig, ax = plt.subplots(figsize=(12, 6.75))
+    ax.plot(*geometry.outline(), color='black', linewidth=12, zorder=0)
+    ax.add_collection(LineCollection(sectors, colors=[colors[drv] for drv in winners], linewidth=6))
+    ax.axis('equal')
+    ax.axis('off')
+
+    handles = [Line2D([0], [0], color=colors[drv], linewidth=6,
+                      label=f"{drv} ({winners.count(drv)})")
+               for drv in comparison.drivers if drv in winners]
+    ax.legend(handles=handles, loc='center left', bbox_to_anchor=(1, 0.5), title="Fastest")
+    plt.suptitle(f"{session.event['EventName']} {year} {session.name} - "
+                 f"Mini-Sector Dominance ({count} sectors)")
+    return fig
@@ -0,0 +1,128 @@
+import numpy as np
+import seaborn as sns
+from matplotlib import pyplot as plt
+import fastf1.plotting
+from fastf1.core import Laps
+from utils import distribution
+from utils.instrument import timed
+from utils.pace import session_pace
+
+VALID_COMPOUNDS = ["SOFT", "MEDIUM", "HARD", "INTERMEDIATE", "WET"]
+
+# Half width of the widest violin in lanes, and the point size in points
+VIOLIN_WIDTH = 0.4
+MARKER_SIZE = 4
+
+
+@timed('prepare')
+def prepare(session, n_drivers=10):
+    # Get top finishers (all drivers for n_drivers=None) and their laps
+    point_finishers = session.results.DriverNumber[:n_drivers]
+    if len(point_finishers) == 0:
+        raise ValueError("No finishing data available for this session!")
+
+    # Quick laps relative to the best lap of these drivers, lap times in
+    # seconds come from the shared pace analysis
+    laps = session_pace(session).laps
+    driver_laps = laps.loc[laps["DriverNumber"].isin(point_finishers)]
+    driver_laps = driver_laps.loc[
+        driver_laps["LapTimeSeconds"] < driver_laps["LapTimeSeconds"].min() * Laps.QUICKLAP_THRESHOLD
+    ].reset_index(drop=True)
+
+    if driver_laps.empty:
+        raise ValueError("No quick laps found for the session!")
+
+    # Drop rows with missing Compound data and filter out NaN
+    driver_laps = driver_laps.dropna(subset=["Compound"])
+
+    # Remove any invalid or unexpected compounds
+    driver_laps = driver_laps[driver_laps["Compound"].isin(VALID_COMPOUNDS)]
+
+    if driver_laps.empty:
+        raise ValueError("No valid compound data available after filtering!")
+
+    # Get drivers in finishing order
+    finishing_order = [session.get_driver(i)["Abbreviation"] for i in point_finishers]
+
+    return driver_laps, finishing_order
+
+
+@timed('plot')
+def plot(session, driver_laps, finishing_order, year, layout="swarm"):
+    # Lane of every lap's driver in finishing order
+    lane = {driver: i for i, driver in enumerate(finishing_order)}
+    codes = driver_laps["Driver"].map(lane).to_numpy()
+    lap_times = driver_laps["LapTimeSeconds"].to_numpy(dtype=float)
+
+    # Create the plot, wider for a full field
+    fig, ax = plt.subplots(figsize=(max(10, 0.6 * len(finishing_order)), 5))
+
+    # Violins from the density estimates of all drivers, scaled to equal
+    # areas with the widest one filling its lane
+    grid, density = distribution.kde_batch(lap_times, codes, len(finishing_order))
+    peak = np.nanmax(density) if np.isfinite(density).any() else 1
+    driver_colors = fastf1.plotting.get_driver_color_mapping(session=session)
+    for i, driver in enumerate(finishing_order):
+        width = density[i] / peak * VIOLIN_WIDTH
+        ax.fill_betweenx(grid, i - width, i + width, where=np.isfinite(width),
+                         color=driver_colors.get(driver, "grey"), edgecolor="0.25",
+                         linewidth=1, zorder=1)
+
+    # Aesthetic adjustments
+    ax.set_xticks(range(len(finishing_order)), finishing_order)
+    ax.set_xlim(-0.5, len(finishing_order) - 0.5)
+    ax.set_xlabel("Driver")
+    ax.set_ylabel("Lap Time (s)")
+    plt.suptitle(f"{session.event['EventName']} {year} - Lap Time Distributions")
+    sns.despine(left=True, bottom=True)
+    plt.tight_layout()
+
+    # Marker size in data units of the laid out axes
+    box = ax.get_window_extent()
+    marker_px = MARKER_SIZE * fig.dpi / 72
+    spacing = marker_px * np.ptp(ax.get_xlim()) / box.width
+    row_height = marker_px * np.ptp(ax.get_ylim()) / box.height
+
+    # Points for the actual lap times, spread across the lanes
+    if layout == "jitter":
+        offsets = distribution.jitter_offsets(lap_times, codes, grid, density, VIOLIN_WIDTH)
+    else:
+        offsets = distribution.swarm_offsets(lap_times, codes, row_height, spacing, VIOLIN_WIDTH)
+    compound_colors = fastf1.plotting.get_compound_mapping(session=session)
+    compounds = driver_laps["Compound"].to_numpy()
+    for compound in [c for c in VALID_COMPOUNDS if (compounds == c).any()]:
+        laps = compounds == compound
+        ax.scatter(codes[laps] + offsets[laps], lap_times[laps], s=MARKER_SIZE ** 2,
+                   color=compound_colors.get(compound, "grey"), linewidths=0,
+                   label=compound, zorder=2)
+    ax.legend(title="Compound")
+    return fig
+
+
+@timed('plot')
+def plot_season(table, summary, year, session_name):
+    # Gap of every driver's median lap to the fastest driver, one point per
+    # session, drivers ordered by their median gap over the season
+    drivers = table.loc[table["Kind"] == "driver"]
+    driver_palette = dict(zip(drivers["Name"], drivers["Color"]))
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.boxplot(
+        data=drivers,
+        x="Name",
+        y="DeltaPct",
+        hue="Name",
+        order=summary.index,
+        palette=driver_palette,
+        showfliers=False,
+    )
+    sns.stripplot(data=drivers, x="Name", y="DeltaPct", order=summary.index,
+                  color="grey", size=3, alpha=0.6)
+
+    ax.set_xlabel("Driver")
+    ax.set_ylabel("Gap to Fastest Driver (%)")
+    plt.suptitle(f"{year} Season - Lap Time Distributions ({session_name}, "
+                 f"{drivers['Round'].nunique()} sessions)")
+    sns.despine(left=True, bottom=True)
+    plt.tight_layout()
+    return fig
@@ -0,0 +1,21 @@
+import plotly.express as px
+from utils.instrument import timed
+
+
+@timed('plot')
+def plot(table):
+    fig = px.imshow(
+        table,
+        text_auto=True,
+        aspect='auto',
+        color_continuous_scale=[[0, 'rgb(198, 219, 239)'],
+                                [0.25, 'rgb(107, 174, 214)'],
+                                [0.5, 'rgb(33, 113, 181)'],
+                                [0.75, 'rgb(8, 81, 156)'],
+                                [1, 'rgb(8, 48, 107)']],
+        labels={'x': 'Race', 'y': 'Driver', 'color': 'Points'}
+    )
+    fig.update_xaxes(title_text='', side='top')
+    fig.update_yaxes(title_text='', tickmode='linear', showgrid=True, gridcolor='LightGrey')
+    fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', coloraxis_showscale=False, margin=dict(l=0, r=0, b=0, t=0))
+    return fig
@@ -0,0 +1,48 @@
+import numpy as np
+from matplotlib import pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib import colormaps
+from utils import lod
+from utils.instrument import timed
+from utils.track import track_geometry
+
+
+@timed('prepare')
+def prepare(session, driver):
+    # Get fastest lap for the specified driver
+    lap = session.laps.pick_driver(driver).pick_fastest()
+    if lap is None:
+        raise ValueError(f"No fastest lap data found for driver {driver}!")
+
+    tel = lap.get_telemetry()
+    if tel.empty:
+        raise ValueError(f"No telemetry data available for driver {driver} in this session!")
+    return tel
+
+
+@timed('plot')
+def plot(session, tel, driver, tolerance=lod.DEFAULT_TOLERANCE):
+    # Prepare data for plotting, turned like the official track map and
+    # merged into one polyline per run of the same gear
+    x, y = track_geometry(session).rotate(tel['X'], tel['Y'])
+    polylines, gear = lod.run_polylines(x, y, tel['nGear'], tolerance)
+
+    # Create line collection
+    cmap = colormaps['Paired']
+    lc_comp = LineCollection(polylines, norm=plt.Normalize(1, cmap.N+1), cmap=cmap)
+    lc_comp.set_array(gear.astype(float))
+    lc_comp.set_linewidth(4)
+
+    # Plot
+    fig, ax = plt.subplots()
+    ax.add_collection(lc_comp)
+    ax.axis('equal')
+    ax.tick_params(labelleft=False, left=False, labelbottom=False, bottom=False)
+
+    plt.suptitle(f"Fastest Lap Gear Shift Visualization\n{driver} - {session.event['EventName']} {session.event.year}")
+
+    # Add colorbar
+    cbar = plt.colorbar(mappable=lc_comp, label="Gear", boundaries=np.arange(1, 10))
+    cbar.set_ticks(np.arange(1.5, 9.5))
+    cbar.set_ticklabels(np.arange(1, 9))
+    return fig
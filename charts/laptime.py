@@ -0,0 +1,58 @@
+import fastf1.plotting
+import seaborn as sns
+from fastf1.core import Laps
+from matplotlib import pyplot as plt
+from utils.instrument import timed
+from utils.pace import session_pace
+
+STINT_COLUMNS = ['Stint', 'Compound', 'StartLap', 'EndLap', 'QuickLaps', 'MedianPace', 'Degradation']
+
+
+@timed('prepare')
+def prepare(session, driver):
+    # Quick laps relative to the driver's best lap, from the shared pace analysis
+    return session_pace(session).quick_laps([driver], per_driver=True).reset_index(drop=True)
+
+
+@timed('prepare')
+def prepare_live(live, driver):
+    # Laps of the driver so far without pit laps, quick relative to the
+    # driver's best lap as in a finished session
+    laps = live.laps
+    driver_laps = laps.loc[(laps["Driver"] == driver) & ~laps["PitLap"].astype(bool)]
+    return driver_laps.loc[
+        driver_laps["LapTimeSeconds"] < driver_laps["LapTimeSeconds"].min() * Laps.QUICKLAP_THRESHOLD
+    ].reset_index(drop=True)
+
+
+@timed('prepare')
+def stint_summary(session, driver):
+    # Fuel-corrected pace and degradation (s per lap of tyre age) per stint
+    stints = session_pace(session).stints
+    return stints.loc[stints['Driver'] == driver, STINT_COLUMNS] \
+        .set_index('Stint').round({'MedianPace': 3, 'Degradation': 3})
+
+
+@timed('plot')
+def plot(session, driver_laps, driver, year, race):
+    # Plot laptimes
+    fig, ax = plt.subplots(figsize=(8, 8))
+
+    sns.scatterplot(data=driver_laps,
+                    x="LapNumber",
+                    y="LapTime",
+                    ax=ax,
+                    hue="Compound",
+                    palette=fastf1.plotting.get_compound_mapping(session=session),
+                    s=80,
+                    linewidth=0,
+                    legend='auto')
+
+    ax.set_xlabel("Lap Number")
+    ax.set_ylabel("Lap Time")
+    ax.invert_yaxis()
+    plt.suptitle(f"{driver} Laptimes in the {year} {race}")
+    plt.grid(color='w', which='major', axis='both')
+    sns.despine(left=True, bottom=True)
+    plt.tight_layout()
+    return fig
@@ -0,0 +1,53 @@
+from matplotlib import pyplot as plt
+from fastf1 import plotting
+from utils.instrument import timed
+from utils.pace import session_pace
+
+# Custom styling for drivers
+CUSTOM_STYLES = [
+    {'color': 'auto', 'linestyle': 'solid', 'linewidth': 5, 'alpha': 0.3},  # First driver style
+    {'color': 'auto', 'linestyle': 'solid', 'linewidth': 1, 'alpha': 0.7}   # Second driver style
+]
+
+
+@timed('prepare')
+def prepare(session, n_drivers=5):
+    # Select drivers — let’s grab the top finishers for simplicity
+    point_finishers = session.results.DriverNumber[:n_drivers]
+    driver_abbreviations = [session.get_driver(i)["Abbreviation"] for i in point_finishers]
+
+    if len(driver_abbreviations) == 0:
+        raise ValueError("No finishing data available for this session!")
+
+    # Quick laps relative to each driver's best lap, from the shared pace analysis
+    laps = session_pace(session).quick_laps(driver_abbreviations, per_driver=True)
+    by_driver = dict(tuple(laps.groupby('Driver')))
+    return {
+        driver: by_driver.get(driver, laps.iloc[:0]).reset_index(drop=True)
+        for driver in driver_abbreviations
+    }
+
+
+@timed('plot')
+def plot(session, driver_laps, warn=None):
+    # Setup FastF1 dark color scheme and timedelta support
+    plotting.setup_mpl(mpl_timedelta_support=True, misc_mpl_mods=False, color_scheme='fastf1')
+
+    # Create the plot
+    fig, ax = plt.subplots(figsize=(8, 5))
+
+    for driver, laps in driver_laps.items():
+        if laps.empty:
+            if warn is not None:
+                warn(f"No valid lap data for {driver}")
+            continue
+
+        # Apply custom driver styles
+        style = plotting.get_driver_style(identifier=driver, style=CUSTOM_STYLES, session=session)
+        ax.plot(laps['LapNumber'], laps['LapTime'], **style, label=driver)
+
+    # Add axis labels and a sorted legend
+    ax.set_xlabel("Lap Number")
+    ax.set_ylabel("Lap Time")
+    plotting.add_sorted_driver_legend(ax, session)
+    return fig
@@ -0,0 +1,56 @@
+import fastf1.plotting
+from matplotlib import pyplot as plt
+from utils.instrument import timed
+from utils.timeline import session_timeline
+
+RACE_SESSIONS = ('Race', 'Sprint')
+
+
+@timed('prepare')
+def prepare(session):
+    if session.name not in RACE_SESSIONS:
+        raise ValueError("Position charts are only available for races and sprints!")
+    return session_timeline(session)
+
+
+@timed('prepare')
+def standings_after(timeline, lap):
+    # Running order with gaps after the given lap
+    return timeline.loc[timeline['LapNumber'] == lap,
+                        ['Position', 'Driver', 'Team', 'GapToLeader', 'Interval', 'LapsDown']] \
+        .set_index('Position').round({'GapToLeader': 3, 'Interval': 3})
+
+
+@timed('plot')
+def plot(session, timeline, year):
+    # Drivers in the order of their last completed lap
+    last_laps = timeline.sort_values('LapNumber', kind='stable').groupby('Driver').tail(1)
+    finishing_order = last_laps.sort_values(['LapNumber', 'Position'], ascending=[False, True])['Driver']
+    n_drivers = len(finishing_order)
+
+    fig, (ax_pos, ax_gap) = plt.subplots(2, 1, sharex=True, figsize=(12, 10),
+                                         gridspec_kw={'height_ratios': [3, 2]})
+    by_driver = timeline.groupby('Driver')
+    for driver in finishing_order:
+        laps = by_driver.get_group(driver)
+        style = fastf1.plotting.get_driver_style(driver, style=['color', 'linestyle'], session=session)
+        ax_pos.plot(laps['LapNumber'], laps['Position'], label=driver, **style)
+        ax_gap.plot(laps['LapNumber'], laps['GapToLeader'], **style)
+
+        # Mark pit stops on the position trace
+        pits = laps.loc[laps['PitStop']]
+        ax_pos.scatter(pits['LapNumber'], pits['Position'], color=style['color'], s=25, zorder=3)
+
+    ax_pos.set_ylim(n_drivers + 0.5, 0.5)
+    ax_pos.set_yticks(range(1, n_drivers + 1))
+    ax_pos.set_ylabel("Position")
+    ax_pos.legend(loc='center left', bbox_to_anchor=(1.0, 0.5))
+    ax_gap.invert_yaxis()
+    ax_gap.set_ylabel("Gap to Leader [s]")
+    ax_gap.set_xlabel("Lap")
+    for ax in (ax_pos, ax_gap):
+        ax.grid(True, linestyle='--', alpha=0.4)
+
+    plt.suptitle(f"{session.event['EventName']} {year} {session.name} - Positions and Gaps")
+    plt.tight_layout()
+    return fig
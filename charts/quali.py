@@ -0,0 +1,47 @@
+import fastf1.plotting
+import matplotlib.pyplot as plt
+import pandas as pd
+from timple.timedelta import strftimedelta
+from utils.instrument import timed
+from utils.laps import fastest_laps as grouped_fastest_laps, ideal_laps, segment_bests
+
+
+@timed('prepare')
+def prepare(session):
+    fastest_laps = grouped_fastest_laps(session.laps)
+    pole_lap = fastest_laps.pick_fastest()
+    return fastest_laps, pole_lap
+
+
+def format_times(table):
+    # Lap and sector times as m:ss.mmm strings for display
+    return table.apply(lambda column: column.map(
+        lambda t: strftimedelta(t.round('ms'), '%m:%s.%ms') if pd.notna(t) else ''))
+
+
+@timed('prepare')
+def summary(session):
+    # Best time per qualifying segment and ideal laps from the best sectors
+    return format_times(segment_bests(session.laps)), format_times(ideal_laps(session.laps))
+
+
+@timed('plot')
+def plot(session, fastest_laps, pole_lap):
+    # Look up each team colour once
+    colors = {team: fastf1.plotting.get_team_color(team, session=session)
+              for team in fastest_laps['Team'].unique()}
+    team_colors = fastest_laps['Team'].map(colors).tolist()
+
+    # Plot results
+    fig, ax = plt.subplots()
+    ax.barh(fastest_laps.index, fastest_laps['LapTimeDelta'], color=team_colors, edgecolor='grey')
+    ax.set_yticks(fastest_laps.index)
+    ax.set_yticklabels(fastest_laps['Driver'])
+    ax.invert_yaxis()
+    ax.set_axisbelow(True)
+    ax.xaxis.grid(True, which='major', linestyle='--', color='black', zorder=-1000)
+
+    lap_time_string = strftimedelta(pole_lap['LapTime'], '%m:%s.%ms')
+    plt.suptitle(f"{session.event['EventName']} {session.event.year} Qualifying\n"
+                 f"Fastest Lap: {lap_time_string} ({pole_lap['Driver']})")
+    return fig
@@ -0,0 +1,6 @@
+from utils.instrument import timed
+
+
+@timed('prepare')
+def prepare(session):
+    return session.laps.head()
@@ -0,0 +1,52 @@
+import matplotlib as mpl
+from matplotlib import pyplot as plt
+from matplotlib.collections import LineCollection
+from utils import lod
+from utils.instrument import timed
+from utils.track import track_geometry
+
+colormap = mpl.cm.plasma
+
+
+@timed('prepare')
+def prepare(session, driver):
+    lap = session.laps.pick_driver(driver).pick_fastest()
+    return lap.telemetry
+
+
+@timed('plot')
+def plot(session, telemetry, driver, year, tolerance=lod.DEFAULT_TOLERANCE):
+    # Get telemetry data, turned like the official track map
+    geometry = track_geometry(session)
+    x, y = geometry.rotate(telemetry['X'], telemetry['Y'])
+    color = telemetry['Speed']
+
+    # Create line segments for coloring, reduced to the visible detail
+    segments, segment_color = lod.line_segments(x, y, color, tolerance)
+
+    # Plotting
+    fig, ax = plt.subplots(sharex=True, sharey=True, figsize=(12, 6.75))
+    fig.suptitle(f'{session.event.name} {year} - {driver} - Speed', size=24, y=0.97)
+
+    # Adjust margins and turn off axis
+    plt.subplots_adjust(left=0.1, right=0.9, top=0.9, bottom=0.12)
+    ax.axis('off')
+
+    # Background track line from the cached circuit geometry
+    ax.plot(*geometry.outline(tolerance), color='black', linestyle='-', linewidth=16, zorder=0)
+
+    # Corner numbers next to the track
+    for label, tx, ty in geometry.corner_labels():
+        ax.text(tx, ty, label, size='small', ha='center', va='center')
+
+    # Line collection for speed color mapping
+    norm = plt.Normalize(color.min(), color.max())
+    lc = LineCollection(segments, cmap=colormap, norm=norm, linestyle='-', linewidth=5)
+    lc.set_array(segment_color)
+    ax.add_collection(lc)
+
+    # Colorbar legend
+    cbaxes = fig.add_axes([0.25, 0.05, 0.5, 0.05])
+    normlegend = mpl.colors.Normalize(vmin=color.min(), vmax=color.max())
+    mpl.colorbar.ColorbarBase(cbaxes, norm=normlegend, cmap=colormap, orientation="horizontal")
+    return fig
@@ -0,0 +1,109 @@
+import seaborn as sns
+from matplotlib import pyplot as plt
+import fastf1.plotting
+from fastf1.core import Laps
+from utils.instrument import timed
+from utils.pace import session_pace
+
+
+def pace_column(fuel_corrected=False):
+    return "FuelCorrectedSeconds" if fuel_corrected else "LapTimeSeconds"
+
+
+@timed('prepare')
+def prepare(session, fuel_corrected=False):
+    # Quick laps with lap times in seconds from the shared pace analysis
+    transformed_laps = session_pace(session).quick_laps()
+
+    # Order teams by median lap time
+    team_order = (
+        transformed_laps.groupby("Team")[pace_column(fuel_corrected)]
+        .median()
+        .sort_values()
+        .index
+    )
+    return transformed_laps, team_order
+
+
+@timed('prepare')
+def prepare_live(live):
+    # Quick laps of the live session so far, without pit laps
+    laps = live.laps
+    laps = laps.loc[~laps["PitLap"].astype(bool)]
+    transformed_laps = laps.loc[
+        laps["LapTimeSeconds"] < laps["LapTimeSeconds"].min() * Laps.QUICKLAP_THRESHOLD
+    ]
+    team_order = transformed_laps.groupby("Team")["LapTimeSeconds"].median().sort_values().index
+    return transformed_laps, team_order
+
+
+@timed('prepare')
+def degradation(session):
+    # Pooled degradation per compound in seconds per lap of tyre age
+    return session_pace(session).compounds.set_index("Compound").round({"Degradation": 3})
+
+
+@timed('plot')
+def plot(session, transformed_laps, team_order, year, fuel_corrected=False, team_palette=None):
+    # Make a color palette associating team names to hex codes, unless
+    # given (e.g. from the live driver list)
+    team_palette = team_palette or {
+        team: fastf1.plotting.get_team_color(team, session=session)
+        for team in team_order
+    }
+
+    # Create the plot
+    fig, ax = plt.subplots(figsize=(15, 10))
+    sns.boxplot(
+        data=transformed_laps,
+        x="Team",
+        y=pace_column(fuel_corrected),
+        hue="Team",
+        order=team_order,
+        palette=team_palette,
+        whiskerprops=dict(color="white"),
+        boxprops=dict(edgecolor="white"),
+        medianprops=dict(color="grey"),
+        capprops=dict(color="white"),
+    )
+
+    plt.title(f"{session.event['EventName']} {year} - Team Pace Comparison")
+    plt.grid(visible=False)
+    ax.set(xlabel=None)  # x-label is redundant
+    ax.set_ylabel("Fuel-Corrected Lap Time (s)" if fuel_corrected else "LapTime (s)")
+    plt.tight_layout()
+    return fig
+
+
+@timed('plot')
+def plot_season(table, summary, year, session_name, fuel_corrected=False):
+    # Gap of every team's median lap to the fastest team, one point per
+    # session, teams ordered by their median gap over the season
+    teams = table.loc[table["Kind"] == "team"]
+    team_palette = dict(zip(teams["Name"], teams["Color"]))
+
+    fig, ax = plt.subplots(figsize=(15, 10))
+    sns.boxplot(
+        data=teams,
+        x="Name",
+        y="DeltaPct",
+        hue="Name",
+        order=summary.index,
+        palette=team_palette,
+        whiskerprops=dict(color="white"),
+        boxprops=dict(edgecolor="white"),
+        medianprops=dict(color="grey"),
+        capprops=dict(color="white"),
+        showfliers=False,
+    )
+    sns.stripplot(data=teams, x="Name", y="DeltaPct", order=summary.index,
+                  color="white", size=4, alpha=0.6)
+
+    pace = "Fuel-Corrected " if fuel_corrected else ""
+    plt.title(f"{year} Season - Team {pace}Pace ({session_name}, "
+              f"{teams['Round'].nunique()} sessions)")
+    plt.grid(visible=False)
+    ax.set(xlabel=None)
+    ax.set_ylabel("Gap to Fastest Team (%)")
+    plt.tight_layout()
+    return fig
@@ -0,0 +1,55 @@
+import fastf1.plotting
+import matplotlib.pyplot as plt
+from utils.instrument import timed
+from utils.laps import stint_table
+
+
+@timed('prepare')
+def prepare(session):
+    # Get driver abbreviations
+    drivers = [session.get_driver(drv)["Abbreviation"] for drv in session.drivers]
+
+    # Calculate stints of all drivers in one grouped pass
+    stints = stint_table(session.laps)
+    return drivers, stints
+
+
+@timed('prepare')
+def prepare_live(live):
+    # Drivers in running order and the stints so far, from the live tables
+    return live.classification(), live.stints
+
+
+@timed('plot')
+def plot(session, drivers, stints, year, race):
+    # Drivers with stints keep their classification order from top to bottom
+    drivers = [driver for driver in drivers if driver in set(stints["Driver"])]
+    positions = {driver: i for i, driver in enumerate(drivers)}
+    stints = stints.assign(
+        y=stints["Driver"].map(positions),
+        left=stints.groupby("Driver")["StintLength"].cumsum() - stints["StintLength"]
+    ).dropna(subset=["y"])
+
+    # Plot strategies, one batched bar call per compound
+    fig, ax = plt.subplots(figsize=(5, 10))
+
+    for compound, compound_stints in stints.groupby("Compound", sort=False):
+        ax.barh(
+            y=compound_stints["y"],
+            width=compound_stints["StintLength"],
+            left=compound_stints["left"],
+            color=fastf1.plotting.get_compound_color(compound, session=session),
+            edgecolor="black",
+            fill=True
+        )
+
+    # Final plot adjustments
+    ax.set_yticks(range(len(drivers)), drivers)
+    plt.title(f"{year} {race} Strategies")
+    plt.xlabel("Lap Number")
+    ax.invert_yaxis()
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_visible(False)
+    plt.tight_layout()
+    return fig
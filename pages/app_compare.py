@@ -0,0 +1,81 @@
+import functools
+import streamlit as st
+from utils import instrument
+from utils.figure_cache import cached_figure
+from utils.lazy import lazy_import
+from utils.loading import load_with_progress
+from utils.schedule import calendar_index
+from utils.session_loader import LAPS_AND_TELEMETRY, RESULTS_ONLY
+
+# Chart module with matplotlib and seaborn, imported once a button is pressed
+compare = lazy_import('charts.compare')
+
+# Data this page needs from the session loader; the driver list only needs
+# the results, telemetry is loaded once the comparison is requested
+DATA_PARTS = LAPS_AND_TELEMETRY
+
+# Page title
+st.title("Driver Telemetry Comparison")
+
+# Season calendar, fetched once per season and shared by all pages
+year = st.selectbox("Select Year", calendar_index.seasons())
+try:
+    calendar = calendar_index.get(year)
+except Exception as e:
+    st.error(f"Could not fetch race schedule for {year}. Error: {e}")
+    st.stop()
+race = st.selectbox("Select Race", calendar.event_names())
+session_type = st.selectbox("Select Session", calendar.session_types(race, ['Q', 'R', 'FP1', 'FP2', 'FP3']))
+
+try:
+    results = load_with_progress(year, race, session_type, RESULTS_ONLY).results
+    available_drivers = results['Abbreviation'].dropna().tolist()
+except Exception as e:
+    st.error(f"An error occurred: {e}")
+    st.stop()
+
+drivers = st.multiselect("Select Drivers", available_drivers, default=available_drivers[:3])
+reference = st.selectbox("Reference Driver", drivers) if drivers else None
+mini_sectors = st.slider("Mini-Sectors", min_value=5, max_value=50, value=25)
+
+# Optional lap choice per driver, the fastest lap is used otherwise
+lap_numbers = {}
+with st.expander("Choose laps"):
+    for driver in drivers:
+        lap = st.number_input(f"{driver} lap (0 = fastest)", min_value=0, value=0, key=f"lap_{driver}")
+        if lap:
+            lap_numbers[driver] = lap
+
+# Button to trigger data loading and plotting
+if st.button("Compare Drivers"):
+    try:
+        with instrument.request('compare', (year, race, session_type, tuple(drivers))):
+            inputs = (year, race, session_type, tuple(drivers), tuple(sorted(lap_numbers.items())))
+
+            @functools.cache
+            def get_comparison():
+                # Resample all laps onto a common distance grid, at most once per run
+                session = load_with_progress(year, race, session_type, DATA_PARTS)
+                return session, compare.prepare(session, drivers, lap_numbers)
+
+            # Telemetry traces and time delta
+            st.image(cached_figure('compare', inputs + (reference,),
+                                   lambda: compare.plot(*get_comparison(), reference, year),
+                                   theme=st.get_option('theme.base')),
+                     use_container_width=True)
+
+            # Mini-sector dominance on the track map
+            st.image(cached_figure('compare-dominance', inputs + (mini_sectors,),
+                                   lambda: compare.plot_dominance(*get_comparison(), year, mini_sectors),
+                                   theme=st.get_option('theme.base')),
+                     use_container_width=True)
+
+            st.success("Driver comparison loaded successfully!")
+
+    except ValueError as e:
+        st.error(str(e))
+    except Exception as e:
+        st.error(f"An error occurred: {e}")
+
+# Recent timings of this page
+instrument.performance_panel('compare')
@@ -1,105 +1,102 @@
 import streamlit as st
-import seaborn as sns
-from matplotlib import pyplot as plt
-import fastf1
-import fastf1.plotting
-import pandas as pd
+from utils import instrument
+from utils.distribution import LAYOUTS
+from utils.figure_cache import cached_figure
+from utils.lazy import lazy_import
+from utils.loading import load_with_progress, wait_for
+from utils.schedule import calendar_index
+from utils.season import season_batch, season_summary
+from utils.session_loader import LAPS_ONLY
+
+# Chart module with matplotlib and seaborn, imported once a button is pressed
+driverdist = lazy_import('charts.driverdist')
+
+# Data this page needs from the session loader
+DATA_PARTS = LAPS_ONLY
 
 # Page title
 st.title("Driver Lap Time Distribution Visualization")
 
-# User inputs
-available_years = list(range(2018, 2024))
-year = st.selectbox("Select Year", available_years)
+# One session, or the distributions over all sessions of a season
+mode = st.radio("Show", ["Single session", "Whole season"], horizontal=True)
 
-# Fetch race names dynamically
+# Season calendar, fetched once per season and shared by all pages
+year = st.selectbox("Select Year", calendar_index.seasons())
 try:
-    schedule = fastf1.get_event_schedule(year)
-    available_races = schedule['EventName'].tolist()
-    race = st.selectbox("Select Race", available_races)
+    calendar = calendar_index.get(year)
 except Exception as e:
     st.error(f"Could not fetch race schedule for {year}. Error: {e}")
     st.stop()
 
-session_type = st.selectbox("Select Session", ['R', 'Q', 'FP1', 'FP2', 'FP3'])
+if mode == "Whole season":
+    session_type = st.selectbox("Select Session", ['R', 'S', 'Q', 'FP1', 'FP2', 'FP3'])
+
+    # Button to trigger the season visualization
+    if st.button("Visualize Season Lap Times"):
+        try:
+            with instrument.request('driverdist_season', (year, session_type)):
+                rounds = calendar.held_rounds(session_type)
+                if not rounds:
+                    raise ValueError(f"No {session_type} session of {year} has been held yet!")
+
+                # Per session pace statistics, loaded in parallel and cached
+                table, failed = wait_for(season_batch.submit(year, session_type, rounds))
+                for rnd, error in failed:
+                    st.warning(f"Skipped {calendar.event(int(rnd))['EventName']}: {error}")
+                if table.empty:
+                    raise ValueError(f"No {session_type} session of {year} could be loaded!")
+                summary = season_summary(table, 'driver')
+
+                # Rendered once per inputs, sessions and theme
+                image = cached_figure(
+                    'driverdist_season', (year, session_type, tuple(table['Round'].unique())),
+                    lambda: driverdist.plot_season(table, summary, year, table['Session'].iloc[0]),
+                    theme=st.get_option('theme.base'))
+                st.image(image, use_container_width=True)
+
+                # Gap to the fastest driver in percent, over all sessions
+                st.dataframe(summary)
+                st.success("Season lap time distributions loaded successfully!")
+        except ValueError as e:
+            st.error(str(e))
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
+    instrument.performance_panel('driverdist_season')
+    st.stop()
+
+race = st.selectbox("Select Race", calendar.event_names())
+session_type = st.selectbox("Select Session", calendar.session_types(race, ['R', 'Q', 'FP1', 'FP2', 'FP3']))
+
+# Top 10 finishers or every driver, and how the lap time points are spread
+full_field = st.checkbox("Full field")
+layout = st.radio("Points", LAYOUTS, horizontal=True, format_func=str.capitalize)
 
 # Button to trigger the visualization
 if st.button("Visualize Lap Times"):
     try:
-        # Load session data
-        session = fastf1.get_session(year, race, session_type)
-        session.load()
-        st.write(f"Session loaded: {session.event['EventName']} {year} - {session_type}")
-
-        # Get top 10 finishers and their laps
-        point_finishers = session.results.DriverNumber[:10]
-        if len(point_finishers) == 0:
-            st.error("No finishing data available for this session!")
-            st.stop()
-
-        driver_laps = session.laps.pick_drivers(point_finishers).pick_quicklaps().reset_index()
-
-        if driver_laps.empty:
-            st.error("No quick laps found for the session!")
-            st.stop()
-
-        # Drop rows with missing Compound data and filter out NaN
-        driver_laps = driver_laps.dropna(subset=["Compound"])
-
-        # Remove any invalid or unexpected compounds
-        valid_compounds = ["SOFT", "MEDIUM", "HARD", "INTERMEDIATE", "WET"]
-        driver_laps = driver_laps[driver_laps["Compound"].isin(valid_compounds)]
-
-        if driver_laps.empty:
-            st.error("No valid compound data available after filtering!")
-            st.stop()
-
-        # Get drivers in finishing order
-        finishing_order = [session.get_driver(i)["Abbreviation"] for i in point_finishers]
-
-        # Convert lap times to seconds for Seaborn
-        driver_laps["LapTime(s)"] = driver_laps["LapTime"].dt.total_seconds()
-
-        # Get unique tire compounds from the cleaned data
-        available_compounds = driver_laps["Compound"].unique().tolist()
-
-        # Create the plot
-        fig, ax = plt.subplots(figsize=(10, 5))
-
-        # Violin plot for distribution
-        sns.violinplot(
-            data=driver_laps,
-            x="Driver",
-            y="LapTime(s)",
-            hue="Driver",
-            inner=None,
-            density_norm="area",
-            order=finishing_order,
-            palette=fastf1.plotting.get_driver_color_mapping(session=session)
-        )
-
-        # Swarm plot for actual lap times
-        sns.swarmplot(
-            data=driver_laps,
-            x="Driver",
-            y="LapTime(s)",
-            order=finishing_order,
-            hue="Compound",
-            palette=fastf1.plotting.get_compound_mapping(session=session),
-            hue_order=available_compounds,  # Only valid compounds
-            linewidth=0,
-            size=4,
-        )
-
-        # Aesthetic adjustments
-        ax.set_xlabel("Driver")
-        ax.set_ylabel("Lap Time (s)")
-        plt.suptitle(f"{session.event['EventName']} {year} - Lap Time Distributions")
-        sns.despine(left=True, bottom=True)
-        plt.tight_layout()
-
-        # Display plot in Streamlit
-        st.pyplot(fig)
-        st.success("Lap time distribution visualization loaded successfully!")
+        with instrument.request('driverdist', (year, race, session_type, full_field, layout)):
+            def build_figure():
+                # Load session data
+                session = load_with_progress(year, race, session_type, DATA_PARTS)
+
+                # Get the top 10 finishers or the full field and their quick laps
+                driver_laps, finishing_order = driverdist.prepare(session, None if full_field else 10)
+
+                # Create the plot
+                return driverdist.plot(session, driver_laps, finishing_order, year, layout)
+
+            # Rendered once per inputs and theme, repeat views reuse the image
+            image = cached_figure('driverdist', (year, race, session_type, full_field, layout),
+                                  build_figure, theme=st.get_option('theme.base'))
+            st.write(f"Session loaded: {race} {year} - {session_type}")
+
+            # Display plot in Streamlit
+            st.image(image, use_container_width=True)
+            st.success("Lap time distribution visualization loaded successfully!")
+    except ValueError as e:
+        st.error(str(e))
     except Exception as e:
         st.error(f"An error occurred: {e}")
+
+# Recent timings of this page
+instrument.performance_panel('driverdist')
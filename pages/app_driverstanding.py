@@ -1,84 +1,67 @@
-import streamlit as st
 import pandas as pd
-import plotly.express as px
-from fastf1.ergast import Ergast
+import streamlit as st
+from utils import instrument
+from utils.lazy import lazy_import
+from utils.standings import FIRST_SEASON, standings_table
+
+# Chart module with plotly, imported once the heatmap is generated
+driverstanding = lazy_import('charts.driverstanding')
 
 # Streamlit app title
 st.title("F1 Driver Standings Heatmap")
 
-# Year selection
-year = st.selectbox("Select Season", list(range(2018, 2024)))
+# Season selection
+seasons = st.multiselect("Select Seasons",
+                         list(range(FIRST_SEASON, pd.Timestamp.now().year + 1)),
+                         default=[2023])
+kind = st.radio("Standings", ["driver", "constructor"], horizontal=True,
+                format_func=str.capitalize)
+cumulative = st.checkbox("Show cumulative points")
 
-# Button to generate heatmap
+# Button to generate heatmap, kept on so the round slider below can rerun
 if st.button("Generate Heatmap"):
-    try:
-        ergast = Ergast()
-        races = ergast.get_race_schedule(year)
-        results = []
-
-        # Debug race schedule
-        st.write("Race Schedule:", races)
-
-        # Fetch results for each race
-        for rnd, race in races['raceName'].items():
-            try:
-                temp = ergast.get_race_results(season=year, round=rnd + 1)
-                temp = temp.content[0]
-
-                # Handle sprint races
-                sprint = ergast.get_sprint_results(season=year, round=rnd + 1)
-                if sprint.content and sprint.description['round'][0] == rnd + 1:
-                    temp = pd.merge(temp, sprint.content[0], on='driverCode', how='left')
-                    temp['points'] = temp['points_x'] + temp['points_y']
-                    temp.drop(columns=['points_x', 'points_y'], inplace=True)
-
-                # Add race info
-                temp['round'] = rnd + 1
-                temp['race'] = race.removesuffix(' Grand Prix')
-                temp = temp[['round', 'race', 'driverCode', 'points']]
-
-                results.append(temp)
-
-            except Exception as race_error:
-                st.warning(f"Skipping {race} due to an error: {race_error}")
-
-        # Combine results
-        if not results:
-            st.error("No race results found!")
-            st.stop()
-
-        results = pd.concat(results)
-        st.write("Results DataFrame:", results)
-
-        # Pivot results
-        results = results.pivot(index='driverCode', columns='round', values='points')
-        results['total_points'] = results.sum(axis=1)
-        results = results.sort_values(by='total_points', ascending=False)
-        results.drop(columns='total_points', inplace=True)
-
-        races = results.columns
-        results.columns = races
-
-        # Debugging outputs
-        st.write("Final Results Table:", results)
-
-        # Plot heatmap
-        fig = px.imshow(
-            results,
-            text_auto=True,
-            aspect='auto',
-            color_continuous_scale=[[0, 'rgb(198, 219, 239)'],
-                                    [0.25, 'rgb(107, 174, 214)'],
-                                    [0.5, 'rgb(33, 113, 181)'],
-                                    [0.75, 'rgb(8, 81, 156)'],
-                                    [1, 'rgb(8, 48, 107)']],
-            labels={'x': 'Race', 'y': 'Driver', 'color': 'Points'}
-        )
-        fig.update_xaxes(title_text='', side='top')
-        fig.update_yaxes(title_text='', tickmode='linear', showgrid=True, gridcolor='LightGrey')
-        fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', coloraxis_showscale=False, margin=dict(l=0, r=0, b=0, t=0))
-
-        st.plotly_chart(fig)
+    st.session_state["standings_generated"] = True
 
+if st.session_state.get("standings_generated"):
+    try:
+        with instrument.request('driverstanding', (tuple(seasons), kind, cumulative)):
+            if not seasons:
+                st.error("Select at least one season!")
+                st.stop()
+
+            # Only rounds that are not in the standings table yet hit the API
+            standings_table.update(
+                seasons,
+                on_error=lambda race, race_error: st.warning(
+                    f"Skipping {race} due to an error: {race_error}")
+            )
+
+            seasons = [season for season in seasons if standings_table.rounds(season)]
+            if not seasons:
+                st.error("No race results found!")
+                st.stop()
+
+            table = standings_table.heatmap(seasons, kind, cumulative)
+
+            # Debugging outputs
+            st.write("Final Results Table:", table)
+
+            # Plot heatmap
+            fig = driverstanding.plot(table)
+
+            st.plotly_chart(fig)
+
+            # Standings after a given round of the last selected season
+            season = seasons[-1]
+            races = standings_table.rounds(season)
+            rnd = st.select_slider(f"{season} standings after", options=list(races),
+                                   value=max(races), format_func=races.get)
+            st.dataframe(standings_table.standings_after(season, rnd, kind))
+
+    except ValueError as e:
+        st.error(str(e))
     except Exception as e:
         st.error(f"An error occurred: {e}")
+
+# Recent timings of this page
+instrument.performance_panel('driverstanding')
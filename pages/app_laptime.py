@@ -1,56 +1,53 @@
 import streamlit as st
-import fastf1
-import fastf1.plotting
-import seaborn as sns
-from matplotlib import pyplot as plt
+from utils import instrument
+from utils.figure_cache import cached_view
+from utils.lazy import lazy_import
+from utils.loading import load_with_progress
+from utils.schedule import calendar_index
+from utils.session_loader import LAPS_ONLY
 
-# Page title
-st.title("Driver Laptimes Scatterplot")
+# Chart module with matplotlib and seaborn, imported once a button is pressed
+laptime = lazy_import('charts.laptime')
 
-# Fetch available years and races from FastF1 API
-@st.cache_data
-def get_available_races(year):
-    schedule = fastf1.get_event_schedule(year)
-    races = schedule['EventName'].unique().tolist()
-    return races
+# Data this page needs from the session loader
+DATA_PARTS = LAPS_ONLY
 
-available_years = list(range(2018, 2024))
+# Page title
+st.title("Driver Laptimes Scatterplot")
 
-# Dropdowns for parameter selection
-year = st.selectbox("Select Year", available_years)
-available_races = get_available_races(year)
-race = st.selectbox("Select Race", available_races)
-session_type = st.selectbox("Select Session", ['R', 'Q', 'FP1', 'FP2', 'FP3'])
+# Season calendar, fetched once per season and shared by all pages
+year = st.selectbox("Select Year", calendar_index.seasons())
+try:
+    calendar = calendar_index.get(year)
+except Exception as e:
+    st.error(f"Could not fetch race schedule for {year}. Error: {e}")
+    st.stop()
+race = st.selectbox("Select Race", calendar.event_names())
+session_type = st.selectbox("Select Session", calendar.session_types(race, ['R', 'Q', 'FP1', 'FP2', 'FP3']))
 driver = st.text_input("Enter Driver Code (e.g., ALO)")
 
 # Button to trigger data loading and plotting
 if st.button("Load and Visualize Driver Laptimes"):
-    session = fastf1.get_session(year, race, session_type)
-    session.load()
-
-    driver_laps = session.laps.pick_driver(driver).pick_quicklaps().reset_index()
-
-    # Plot laptimes
-    fig, ax = plt.subplots(figsize=(8, 8))
-
-    sns.scatterplot(data=driver_laps,
-                    x="LapNumber",
-                    y="LapTime",
-                    ax=ax,
-                    hue="Compound",
-                    palette=fastf1.plotting.get_compound_mapping(session=session),
-                    s=80,
-                    linewidth=0,
-                    legend='auto')
-
-    ax.set_xlabel("Lap Number")
-    ax.set_ylabel("Lap Time")
-    ax.invert_yaxis()
-    plt.suptitle(f"{driver} Laptimes in the {year} {race}")
-    plt.grid(color='w', which='major', axis='both')
-    sns.despine(left=True, bottom=True)
-    plt.tight_layout()
-
-    st.pyplot(fig)
-
-    st.success("Driver laptimes scatterplot loaded successfully!")
+    with instrument.request('laptime', (year, race, session_type, driver)):
+        def build_view():
+            session = load_with_progress(year, race, session_type, DATA_PARTS)
+
+            driver_laps = laptime.prepare(session, driver)
+
+            # Plot laptimes, with stint pace and tyre degradation (fuel
+            # corrected in races) for the table below
+            return (laptime.plot(session, driver_laps, driver, year, race),
+                    laptime.stint_summary(session, driver))
+
+        # Rendered once per inputs and theme, repeat views reuse the image and table
+        image, stints = cached_view('laptime', (year, race, session_type, driver), build_view,
+                                    theme=st.get_option('theme.base'))
+        st.image(image, use_container_width=True)
+
+        st.subheader("Stints")
+        st.dataframe(stints)
+
+        st.success("Driver laptimes scatterplot loaded successfully!")
+
+# Recent timings of this page
+instrument.performance_panel('laptime')
@@ -1,72 +1,59 @@
 import streamlit as st
-from matplotlib import pyplot as plt
-import fastf1
-from fastf1 import plotting
+from utils import instrument
+from utils.figure_cache import cached_view
+from utils.lazy import lazy_import
+from utils.loading import load_with_progress
+from utils.schedule import calendar_index
+from utils.session_loader import LAPS_ONLY
+
+# Chart module with matplotlib and seaborn, imported once a button is pressed
+laptimestyling = lazy_import('charts.laptimestyling')
+
+# Data this page needs from the session loader
+DATA_PARTS = LAPS_ONLY
 
 # Page title
 st.title("Driver-Specific Lap Time Styling")
 
-# User inputs
-available_years = list(range(2018, 2024))
-year = st.selectbox("Select Year", available_years)
-
-# Fetch race names dynamically
+# Season calendar, fetched once per season and shared by all pages
+year = st.selectbox("Select Year", calendar_index.seasons())
 try:
-    schedule = fastf1.get_event_schedule(year)
-    available_races = schedule['EventName'].tolist()
-    race = st.selectbox("Select Race", available_races)
+    calendar = calendar_index.get(year)
 except Exception as e:
     st.error(f"Could not fetch race schedule for {year}. Error: {e}")
     st.stop()
-
-session_type = st.selectbox("Select Session", ['R', 'Q', 'FP1', 'FP2', 'FP3'])
+race = st.selectbox("Select Race", calendar.event_names())
+session_type = st.selectbox("Select Session", calendar.session_types(race, ['R', 'Q', 'FP1', 'FP2', 'FP3']))
 
 # Button to trigger the visualization
 if st.button("Visualize Driver Lap Times"):
     try:
-        # Load session data
-        session = fastf1.get_session(year, race, session_type)
-        session.load()
-        st.write(f"Session loaded: {session.event['EventName']} {year} - {session_type}")
-
-        # Select drivers — let’s grab the top 5 finishers for simplicity
-        point_finishers = session.results.DriverNumber[:5]
-        driver_abbreviations = [session.get_driver(i)["Abbreviation"] for i in point_finishers]
-
-        if len(driver_abbreviations) == 0:
-            st.error("No finishing data available for this session!")
-            st.stop()
-
-        # Setup FastF1 dark color scheme and timedelta support
-        plotting.setup_mpl(mpl_timedelta_support=True, misc_mpl_mods=False, color_scheme='fastf1')
-
-        # Custom styling for drivers
-        custom_styles = [
-            {'color': 'auto', 'linestyle': 'solid', 'linewidth': 5, 'alpha': 0.3},  # First driver style
-            {'color': 'auto', 'linestyle': 'solid', 'linewidth': 1, 'alpha': 0.7}   # Second driver style
-        ]
-
-        # Create the plot
-        fig, ax = plt.subplots(figsize=(8, 5))
-
-        for idx, driver in enumerate(driver_abbreviations):
-            laps = session.laps.pick_driver(driver).pick_quicklaps().reset_index()
-
-            if laps.empty:
-                st.warning(f"No valid lap data for {driver}")
-                continue
-
-            # Apply custom driver styles
-            style = plotting.get_driver_style(identifier=driver, style=custom_styles, session=session)
-            ax.plot(laps['LapNumber'], laps['LapTime'], **style, label=driver)
-
-        # Add axis labels and a sorted legend
-        ax.set_xlabel("Lap Number")
-        ax.set_ylabel("Lap Time")
-        plotting.add_sorted_driver_legend(ax, session)
-
-        # Display the plot in Streamlit
-        st.pyplot(fig)
-        st.success("Driver-specific lap time plot loaded successfully!")
+        with instrument.request('laptimestyling', (year, race, session_type)):
+            def build_view():
+                # Load session data
+                session = load_with_progress(year, race, session_type, DATA_PARTS)
+
+                # Quick laps of the top 5 finishers
+                driver_laps = laptimestyling.prepare(session)
+
+                # Create the plot, noting drivers without valid laps
+                notes = []
+                return laptimestyling.plot(session, driver_laps, warn=notes.append), notes
+
+            # Rendered once per inputs and theme, repeat views reuse the image and notes
+            image, notes = cached_view('laptimestyling', (year, race, session_type), build_view,
+                                       theme=st.get_option('theme.base'))
+            for note in notes:
+                st.warning(note)
+            st.write(f"Session loaded: {race} {year} - {session_type}")
+
+            # Display the plot in Streamlit
+            st.image(image, use_container_width=True)
+            st.success("Driver-specific lap time plot loaded successfully!")
+    except ValueError as e:
+        st.error(str(e))
     except Exception as e:
         st.error(f"An error occurred: {e}")
+
+# Recent timings of this page
+instrument.performance_panel('laptimestyling')
@@ -0,0 +1,100 @@
+import streamlit as st
+from utils import instrument
+from utils.figure_cache import encode_figure
+from utils.lazy import lazy_import
+from utils.live import DEFAULT_URL, live_feeds
+
+# Chart modules with matplotlib and seaborn, imported once a view is drawn
+laptime = lazy_import('charts.laptime')
+teampace = lazy_import('charts.teampace')
+tyre = lazy_import('charts.tyre')
+
+# Seconds between refreshes of the live view
+REFRESH_SECONDS = 2
+
+# Views and the live table each one is drawn from
+VIEWS = {"Tyre Strategy": 'stints', "Lap Times": 'laps', "Team Pace": 'laps'}
+
+# Page title
+st.title("Live Timing")
+
+# Feed: a replay server or live timing client websocket, or a recording
+# that FastF1's live timing client is writing
+source = st.text_input("Feed", DEFAULT_URL,
+                       help="ws:// URL of a feed, or the path of a recording being written")
+col1, col2 = st.columns(2)
+if col1.button("Connect"):
+    live_feeds.connect(source)
+if col2.button("Disconnect"):
+    live_feeds.disconnect(source)
+
+feed = live_feeds.get(source)
+if feed is None:
+    st.info("Not connected. Start a replay with `python -m utils.replay recording.txt` "
+            "and connect to it, or connect to a live timing recording.")
+    instrument.performance_panel('live')
+    st.stop()
+
+view = st.radio("View", list(VIEWS), horizontal=True)
+
+
+def draw(live, view, driver):
+    # Figure of the view from the live tables so far
+    year = live.event['EventDate'].year
+    race = live.event['EventName']
+    if view == "Tyre Strategy":
+        drivers, stints = tyre.prepare_live(live)
+        return tyre.plot(live, drivers, stints, year, race)
+    if view == "Lap Times":
+        driver_laps = laptime.prepare_live(live, driver)
+        if driver_laps.empty:
+            raise ValueError(f"No quick laps of {driver} yet!")
+        return laptime.plot(live, driver_laps, driver, year, race)
+    transformed_laps, team_order = teampace.prepare_live(live)
+    if transformed_laps.empty:
+        raise ValueError("No quick laps yet!")
+    return teampace.plot(live, transformed_laps, team_order, year,
+                         team_palette=live.team_colors())
+
+
+@st.fragment(run_every=REFRESH_SECONDS)
+def live_view():
+    live = feed.session
+    current, total = live.lap_count()
+    status = "finished" if feed.finished else "connected"
+    st.caption(f"{status}, {feed.messages} messages"
+               + (f", lap {current} of {total}" if current else "")
+               + (f", last update {live.updated_at:%H:%M:%S} UTC" if live.updated_at else ""))
+    if feed.error:
+        st.error(f"Feed stopped: {feed.error}")
+
+    drivers = live.classification()
+    driver = st.selectbox("Select Driver", drivers) if view == "Lap Times" else None
+
+    # Redrawn only when the table behind the view got new rows
+    version = live.versions[VIEWS[view]]
+    images = st.session_state.setdefault('live_images', {})
+    key = (source, view, driver)
+    if version and images.get(key, (None,))[0] != version:
+        try:
+            with instrument.request('live', (view, driver, version)):
+                fig = draw(live, view, driver)
+                with instrument.stage('render'):
+                    images[key] = (version, encode_figure(fig))
+        except ValueError as e:
+            st.info(str(e))
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
+    if key in images:
+        st.image(images[key][1], use_container_width=True)
+
+    # Running order with the latest gaps and tyres
+    standings = live.standings()
+    if not standings.empty:
+        st.dataframe(standings, hide_index=True)
+
+
+live_view()
+
+# Recent timings of this page
+instrument.performance_panel('live')
@@ -0,0 +1,61 @@
+import streamlit as st
+from utils import instrument
+from utils.figure_cache import cached_view
+from utils.lazy import lazy_import
+from utils.loading import load_with_progress
+from utils.schedule import calendar_index
+from utils.session_loader import LAPS_ONLY
+
+# Chart module with matplotlib and seaborn, imported once a button is pressed
+positions = lazy_import('charts.positions')
+
+# Data this page needs from the session loader
+DATA_PARTS = LAPS_ONLY
+
+# Page title
+st.title("Race Positions and Gaps")
+
+# Season calendar, fetched once per season and shared by all pages
+year = st.selectbox("Select Year", calendar_index.seasons())
+try:
+    calendar = calendar_index.get(year)
+except Exception as e:
+    st.error(f"Could not fetch race schedule for {year}. Error: {e}")
+    st.stop()
+race = st.selectbox("Select Race", calendar.event_names())
+session_type = st.selectbox("Select Session", calendar.session_types(race, ['R', 'S']))
+
+# Keep the output visible while the lap slider is moved
+if st.button("Show Race Timeline"):
+    st.session_state["positions_inputs"] = (year, race, session_type)
+
+if st.session_state.get("positions_inputs") == (year, race, session_type):
+    try:
+        with instrument.request('positions', (year, race, session_type)):
+            def build_view():
+                session = load_with_progress(year, race, session_type, DATA_PARTS)
+
+                # Positions and gaps after every lap, computed once per session
+                timeline = positions.prepare(session)
+
+                return positions.plot(session, timeline, year), timeline
+
+            # Rendered once per inputs and theme, repeat views and moves of
+            # the lap slider reuse the image and timeline
+            image, timeline = cached_view('positions', (year, race, session_type), build_view,
+                                          theme=st.get_option('theme.base'))
+            st.image(image, use_container_width=True)
+
+            # Running order after a chosen lap, from the same timeline
+            last_lap = int(timeline['LapNumber'].max())
+            lap = st.slider("Order after lap", min_value=1, max_value=last_lap, value=last_lap)
+            st.dataframe(positions.standings_after(timeline, lap))
+
+            st.success("Race timeline loaded successfully!")
+    except ValueError as e:
+        st.error(str(e))
+    except Exception as e:
+        st.error(f"An error occurred: {e}")
+
+# Recent timings of this page
+instrument.performance_panel('positions')
@@ -1,56 +1,52 @@
 import streamlit as st
-import fastf1
-import fastf1.plotting
-import matplotlib.pyplot as plt
-import pandas as pd
-from timple.timedelta import strftimedelta
-from fastf1.core import Laps
+from utils import instrument
+from utils.figure_cache import cached_view
+from utils.lazy import lazy_import
+from utils.loading import load_with_progress
+from utils.schedule import calendar_index
+from utils.session_loader import LAPS_ONLY
 
-# Page title
-st.title("Qualifying Results Overview")
+# Chart module with matplotlib and seaborn, imported once a button is pressed
+quali = lazy_import('charts.quali')
 
-# Fetch available years and races from FastF1 API
-@st.cache_data
-def get_available_races(year):
-    schedule = fastf1.get_event_schedule(year)
-    races = schedule['EventName'].unique().tolist()
-    return races
+# Data this page needs from the session loader; race control messages
+# are needed so that deleted laps are not picked as fastest laps
+DATA_PARTS = LAPS_ONLY | {'messages'}
 
-available_years = list(range(2018, 2024))
+# Page title
+st.title("Qualifying Results Overview")
 
-# Dropdowns for parameter selection
-year = st.selectbox("Select Year", available_years)
-available_races = get_available_races(year)
-race = st.selectbox("Select Race", available_races)
+# Season calendar, fetched once per season and shared by all pages
+year = st.selectbox("Select Year", calendar_index.seasons())
+try:
+    calendar = calendar_index.get(year)
+except Exception as e:
+    st.error(f"Could not fetch race schedule for {year}. Error: {e}")
+    st.stop()
+race = st.selectbox("Select Race", calendar.event_names())
 
 # Button to trigger data loading and plotting
 if st.button("Load and Visualize Qualifying Results"):
-    session = fastf1.get_session(year, race, 'Q')
-    session.load()
-
-    drivers = pd.unique(session.laps['Driver'])
-
-    list_fastest_laps = [session.laps.pick_driver(drv).pick_fastest() for drv in drivers]
-    fastest_laps = Laps(list_fastest_laps).sort_values(by='LapTime').reset_index(drop=True)
+    with instrument.request('quali', (year, race)):
+        def build_view():
+            session = load_with_progress(year, race, 'Q', DATA_PARTS)
 
-    pole_lap = fastest_laps.pick_fastest()
-    fastest_laps['LapTimeDelta'] = fastest_laps['LapTime'] - pole_lap['LapTime']
+            fastest_laps, pole_lap = quali.prepare(session)
 
-    team_colors = [fastf1.plotting.get_team_color(lap['Team'], session=session) for _, lap in fastest_laps.iterlaps()]
+            # Plot results, with segment bests and ideal laps for the tables
+            return quali.plot(session, fastest_laps, pole_lap), quali.summary(session)
 
-    # Plot results
-    fig, ax = plt.subplots()
-    ax.barh(fastest_laps.index, fastest_laps['LapTimeDelta'], color=team_colors, edgecolor='grey')
-    ax.set_yticks(fastest_laps.index)
-    ax.set_yticklabels(fastest_laps['Driver'])
-    ax.invert_yaxis()
-    ax.set_axisbelow(True)
-    ax.xaxis.grid(True, which='major', linestyle='--', color='black', zorder=-1000)
+        # Rendered once per inputs and theme, repeat views reuse the image and tables
+        image, (segments, ideal) = cached_view('quali', (year, race), build_view,
+                                               theme=st.get_option('theme.base'))
+        st.image(image, use_container_width=True)
 
-    lap_time_string = strftimedelta(pole_lap['LapTime'], '%m:%s.%ms')
-    plt.suptitle(f"{session.event['EventName']} {session.event.year} Qualifying\n"
-                 f"Fastest Lap: {lap_time_string} ({pole_lap['Driver']})")
+        st.subheader("Best Lap per Qualifying Segment")
+        st.dataframe(segments)
+        st.subheader("Ideal Laps from Best Sectors")
+        st.dataframe(ideal)
 
-    st.pyplot(fig)
+        st.success("Qualifying results visualization loaded successfully!")
 
-    st.success("Qualifying results visualization loaded successfully!")
+# Recent timings of this page
+instrument.performance_panel('quali')
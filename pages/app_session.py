@@ -1,27 +1,32 @@
 import streamlit as st
-import fastf1 as ff1
-import os
+from charts import session as session_chart
+from utils import instrument
+from utils.loading import load_with_progress
+from utils.schedule import calendar_index
+from utils.session_loader import LAPS_ONLY
 
-cache_dir = 'fastf1_cache'
-if not os.path.exists(cache_dir):
-    os.makedirs(cache_dir)
-    
-# Enable FastF1 cache
-ff1.Cache.enable_cache('fastf1_cache')
+# Data this page needs from the session loader
+DATA_PARTS = LAPS_ONLY
 
 st.title("F1 Session Data Viewer")
 
-# Sidebar inputs
-season = st.number_input("Select Season", min_value=1996, max_value=2024, value=2021)
-round_number = st.number_input("Select Round", min_value=1, max_value=23, value=15)
-session_type = st.selectbox("Select Session Type", ['FP1', 'FP2', 'FP3', 'Q', 'S', 'R'], index=5)
+# Season calendar, fetched once per season and shared by all pages
+season = st.selectbox("Select Season", calendar_index.seasons())
+try:
+    calendar = calendar_index.get(season)
+except Exception as e:
+    st.error(f"Could not fetch race schedule for {season}. Error: {e}")
+    st.stop()
+race = st.selectbox("Select Race", calendar.event_names())
+session_types = calendar.session_types(race)
+session_type = st.selectbox("Select Session Type", session_types,
+                            index=session_types.index('R') if 'R' in session_types else 0)
 
 if st.button("Load Session Data"):
-    with st.spinner("Loading session data..."):
-        try:
+    try:
+        with instrument.request('session', (season, race, session_type)):
             # Get session
-            session = ff1.get_session(season, round_number, session_type)
-            session.load()
+            session = load_with_progress(season, race, session_type, DATA_PARTS)
 
             # Get laps
             laps = session.laps
@@ -30,7 +35,10 @@ if st.button("Load Session Data"):
                 st.warning("No lap data available for this session.")
             else:
                 st.success(f"Loaded data for {session.event['EventName']} {season}")
-                st.dataframe(laps.head())
+                st.dataframe(session_chart.prepare(session))
 
-        except Exception as e:
-            st.error(f"Failed to load session data: {e}")
+    except Exception as e:
+        st.error(f"Failed to load session data: {e}")
+
+# Recent timings of this page
+instrument.performance_panel('session')
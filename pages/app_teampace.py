@@ -1,78 +1,101 @@
 import streamlit as st
-import seaborn as sns
-from matplotlib import pyplot as plt
-import fastf1
-import fastf1.plotting
+from utils import instrument
+from utils.figure_cache import cached_figure, cached_view
+from utils.lazy import lazy_import
+from utils.loading import load_with_progress, wait_for
+from utils.schedule import calendar_index
+from utils.season import season_batch, season_summary
+from utils.session_loader import LAPS_ONLY
+
+# Chart module with matplotlib and seaborn, imported once a button is pressed
+teampace = lazy_import('charts.teampace')
+
+# Data this page needs from the session loader
+DATA_PARTS = LAPS_ONLY
 
 # Page title
 st.title("Team Pace Comparison")
 
-# Selectbox inputs
-available_years = list(range(2018, 2024))
-year = st.selectbox("Select Year", available_years)
+# One session, or the pace over all sessions of a season
+mode = st.radio("Compare", ["Single session", "Whole season"], horizontal=True)
 
-# Fetch available races dynamically
+# Season calendar, fetched once per season and shared by all pages
+year = st.selectbox("Select Year", calendar_index.seasons())
 try:
-    schedule = fastf1.get_event_schedule(year)
-    available_races = schedule['EventName'].tolist()
-    race = st.selectbox("Select Race", available_races)
+    calendar = calendar_index.get(year)
 except Exception as e:
     st.error(f"Could not fetch race schedule for {year}. Error: {e}")
     st.stop()
 
-session_type = st.selectbox("Select Session", ['R', 'Q', 'FP1', 'FP2', 'FP3'])
+if mode == "Whole season":
+    session_type = st.selectbox("Select Session", ['R', 'S', 'Q', 'FP1', 'FP2', 'FP3'])
+    fuel_corrected = st.checkbox("Fuel-corrected lap times", disabled=session_type not in ('R', 'S'))
+
+    # Button to trigger the season comparison
+    if st.button("Compare Season Pace"):
+        try:
+            with instrument.request('teampace_season', (year, session_type, fuel_corrected)):
+                rounds = calendar.held_rounds(session_type)
+                if not rounds:
+                    raise ValueError(f"No {session_type} session of {year} has been held yet!")
+
+                # Per session pace statistics, loaded in parallel and cached
+                table, failed = wait_for(season_batch.submit(year, session_type, rounds, fuel_corrected))
+                for rnd, error in failed:
+                    st.warning(f"Skipped {calendar.event(int(rnd))['EventName']}: {error}")
+                if table.empty:
+                    raise ValueError(f"No {session_type} session of {year} could be loaded!")
+                summary = season_summary(table)
+
+                # Rendered once per inputs, sessions and theme
+                image = cached_figure(
+                    'teampace_season', (year, session_type, fuel_corrected, tuple(table['Round'].unique())),
+                    lambda: teampace.plot_season(table, summary, year, table['Session'].iloc[0], fuel_corrected),
+                    theme=st.get_option('theme.base'))
+                st.image(image, use_container_width=True)
+
+                # Gap to the fastest team in percent, over all sessions
+                st.dataframe(summary)
+                st.success("Season pace comparison loaded successfully!")
+        except ValueError as e:
+            st.error(str(e))
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
+    instrument.performance_panel('teampace_season')
+    st.stop()
+
+race = st.selectbox("Select Race", calendar.event_names())
+session_type = st.selectbox("Select Session", calendar.session_types(race, ['R', 'Q', 'FP1', 'FP2', 'FP3']))
+fuel_corrected = st.checkbox("Fuel-corrected lap times", disabled=session_type not in ('R', 'S'))
 
 # Button to trigger the plot
 if st.button("Compare Team Pace"):
     try:
-        # Load session
-        session = fastf1.get_session(year, race, session_type)
-        session.load()
-
-        # Get quick laps
-        laps = session.laps.pick_quicklaps()
-
-        # Convert lap times to seconds for Seaborn
-        transformed_laps = laps.copy()
-        transformed_laps.loc[:, "LapTime (s)"] = laps["LapTime"].dt.total_seconds()
-
-        # Order teams by median lap time
-        team_order = (
-            transformed_laps[["Team", "LapTime (s)"]]
-            .groupby("Team")
-            .median()["LapTime (s)"]
-            .sort_values()
-            .index
-        )
-
-        # Make a color palette associating team names to hex codes
-        team_palette = {
-            team: fastf1.plotting.get_team_color(team, session=session)
-            for team in team_order
-        }
-
-        # Create the plot
-        fig, ax = plt.subplots(figsize=(15, 10))
-        sns.boxplot(
-            data=transformed_laps,
-            x="Team",
-            y="LapTime (s)",
-            hue="Team",
-            order=team_order,
-            palette=team_palette,
-            whiskerprops=dict(color="white"),
-            boxprops=dict(edgecolor="white"),
-            medianprops=dict(color="grey"),
-            capprops=dict(color="white"),
-        )
-
-        plt.title(f"{session.event['EventName']} {year} - Team Pace Comparison")
-        plt.grid(visible=False)
-        ax.set(xlabel=None)  # x-label is redundant
-        plt.tight_layout()
-
-        # Display plot in Streamlit
-        st.pyplot(fig)
-        st.success("Team pace comparison loaded successfully!")
+        with instrument.request('teampace', (year, race, session_type, fuel_corrected)):
+            def build_view():
+                # Load session
+                session = load_with_progress(year, race, session_type, DATA_PARTS)
+
+                # Quick laps in seconds and teams ordered by median lap time
+                transformed_laps, team_order = teampace.prepare(session, fuel_corrected)
+
+                # Create the plot, and tyre degradation per compound from the
+                # same pace analysis for the table
+                return (teampace.plot(session, transformed_laps, team_order, year, fuel_corrected),
+                        teampace.degradation(session))
+
+            # Rendered once per inputs and theme, repeat views reuse the image and table
+            image, degradation = cached_view('teampace', (year, race, session_type, fuel_corrected),
+                                             build_view, theme=st.get_option('theme.base'))
+
+            # Display plot in Streamlit
+            st.image(image, use_container_width=True)
+
+            st.subheader("Tyre Degradation (s per lap)")
+            st.dataframe(degradation)
+            st.success("Team pace comparison loaded successfully!")
     except Exception as e:
         st.error(f"An error occurred: {e}")
+
+# Recent timings of this page
+instrument.performance_panel('teampace')
@@ -1,74 +1,59 @@
 import streamlit as st
-import fastf1
-import fastf1.plotting
-import matplotlib.pyplot as plt
+from utils import instrument
+from utils.figure_cache import cached_view
+from utils.lazy import lazy_import
+from utils.loading import load_with_progress
+from utils.schedule import calendar_index
+from utils.session_loader import LAPS_ONLY
 
-# Page title
-st.title("Tyre Strategies During a Race")
-
-# Fetch available years and races from FastF1 API
-@st.cache_data
-def get_available_races(year):
-    schedule = fastf1.get_event_schedule(year)
-    races = schedule['EventName'].unique().tolist()
-    return races
+# Chart module with matplotlib and seaborn, imported once a button is pressed
+tyre = lazy_import('charts.tyre')
 
-available_years = list(range(2018, 2024))  # Example range of years
+# Data this page needs from the session loader
+DATA_PARTS = LAPS_ONLY
 
-# Dropdowns for parameter selection
-year = st.selectbox("Select Year", available_years)
-available_races = get_available_races(year)
-race = st.selectbox("Select Race", available_races)
-session_type = st.selectbox("Select Session", ['R', 'Q', 'FP1', 'FP2', 'FP3'])
+# Page title
+st.title("Tyre Strategies During a Race")
 
-# Load the race session
-@st.cache_data
-def load_race_data(year, race, session_type):
-    session = fastf1.get_session(year, race, session_type)
-    session.load()
-    return session
+# Season calendar, fetched once per season and shared by all pages
+year = st.selectbox("Select Year", calendar_index.seasons())
+try:
+    calendar = calendar_index.get(year)
+except Exception as e:
+    st.error(f"Could not fetch race schedule for {year}. Error: {e}")
+    st.stop()
+race = st.selectbox("Select Race", calendar.event_names())
+session_type = st.selectbox("Select Session", calendar.session_types(race, ['R', 'Q', 'FP1', 'FP2', 'FP3']))
 
 # Button to trigger data loading and plotting
 if st.button("Load and Visualize Tyre Strategy"):
-    session = load_race_data(year, race, session_type)
-    laps = session.laps
+    with instrument.request('tyre', (year, race, session_type)):
+        def build_view():
+            session = load_with_progress(year, race, session_type, DATA_PARTS)
 
-    # Get driver abbreviations
-    drivers = [session.get_driver(drv)["Abbreviation"] for drv in session.drivers]
+            # Calculate stints
+            drivers, stints = tyre.prepare(session)
 
-    # Calculate stints
-    stints = laps[["Driver", "Stint", "Compound", "LapNumber"]]
-    stints = stints.groupby(["Driver", "Stint", "Compound"]).count().reset_index()
-    stints = stints.rename(columns={"LapNumber": "StintLength"})
+            # Plot strategies, with the stints for the table
+            return tyre.plot(session, drivers, stints, year, race), stints
 
-    # Plot strategies
-    fig, ax = plt.subplots(figsize=(5, 10))
+        # Rendered once per inputs and theme, repeat views reuse the image and table
+        image, stints = cached_view('tyre', (year, race, session_type), build_view,
+                                    theme=st.get_option('theme.base'))
 
-    for driver in drivers:
-        driver_stints = stints.loc[stints["Driver"] == driver]
-        previous_stint_end = 0
-        for _, row in driver_stints.iterrows():
-            compound_color = fastf1.plotting.get_compound_color(row["Compound"], session=session)
-            plt.barh(
-                y=driver,
-                width=row["StintLength"],
-                left=previous_stint_end,
-                color=compound_color,
-                edgecolor="black",
-                fill=True
-            )
-            previous_stint_end += row["StintLength"]
+        # Show plot in Streamlit
+        st.image(image, use_container_width=True)
 
-    # Final plot adjustments
-    plt.title(f"{year} {race} Strategies")
-    plt.xlabel("Lap Number")
-    ax.invert_yaxis()
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.spines['left'].set_visible(False)
-    plt.tight_layout()
+        # Stint table with exports
+        st.dataframe(stints, hide_index=True)
+        file_name = f"{year}_{race.replace(' ', '_')}_{session_type}_stints"
+        col1, col2 = st.columns(2)
+        col1.download_button("Download CSV", stints.to_csv(index=False),
+                             file_name=f"{file_name}.csv", mime="text/csv")
+        col2.download_button("Download JSON", stints.to_json(orient="records"),
+                             file_name=f"{file_name}.json", mime="application/json")
 
-    # Show plot in Streamlit
-    st.pyplot(fig)
+        st.success("Tyre strategy visualization loaded successfully!")
 
-    st.success("Tyre strategy visualization loaded successfully!")
+# Recent timings of this page
+instrument.performance_panel('tyre')
@@ -0,0 +1,12 @@
+import os
+import shutil
+import tempfile
+
+# The loader modules read their store directory at import, so the tests get
+# a scratch store before any of them is imported
+_store_dir = tempfile.mkdtemp(prefix='f1viz-tests-')
+os.environ['F1VIZ_STORE_DIR'] = _store_dir
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_store_dir, ignore_errors=True)
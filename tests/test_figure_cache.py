@@ -0,0 +1,25 @@
+import matplotlib
+import pandas as pd
+
+from utils.figure_cache import FigureCache
+
+matplotlib.use('Agg')
+
+
+def test_view_data_is_cached():
+    from matplotlib import pyplot as plt
+
+    cache = FigureCache(memory_budget=1024 ** 3)
+    table = pd.DataFrame({'LapTime': range(100)})
+    builds = []
+
+    def build():
+        builds.append(1)
+        return plt.figure(), (table, ["No valid lap data for VER"])
+
+    image, data = cache.get_or_render('laptime', build)
+    assert cache.get_or_render('laptime', build) == (image, data)
+    assert len(builds) == 1
+    assert data[1] == ["No valid lap data for VER"]
+    # The table counts against the budget with the image
+    assert cache.memory_used > len(image) + table.memory_usage(deep=True).sum() - 1
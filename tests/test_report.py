@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from charts import compare, driverdist
+from utils import report, session_loader
+from utils.fixtures import FixtureSource
+from utils.report import CHARTS
+
+
+@pytest.fixture
+def recorded_source(tmp_path):
+    previous = session_loader.source
+    session_loader.use_source(FixtureSource(str(tmp_path / 'store')))
+    yield session_loader.source
+    session_loader.use_source(previous)
+
+
+def test_dependencies_in_fingerprint():
+    assert {'utils.distribution', 'utils.pace'} <= set(report.dependencies(driverdist))
+    # utils.laps only through utils.compare
+    assert 'utils.laps' in report.dependencies(compare)
+
+
+def test_stored_data_in_fingerprint(recorded_source, tmp_path):
+    output = str(tmp_path / 'reports')
+    chart = CHARTS['tyre']
+    entry = report.render_session(2023, 1, 'R', ['tyre'], output, ['svg'])
+    previous = entry['charts']['tyre']
+
+    def up_to_date():
+        frames = report.stored_frames((2023, 1, 'R'), chart.parts)
+        return report._up_to_date(previous, chart.fingerprint(['svg'], frames), output)
+
+    assert up_to_date()
+    # The laps are stored again, e.g. with corrected timing data
+    session = recorded_source.get_session(2023, 1, 'R')
+    laps = os.path.join(recorded_source.store.session_dir(session), 'laps.parquet')
+    os.utime(laps, ns=(0, os.stat(laps).st_mtime_ns + 10 ** 9))
+    assert not up_to_date()
@@ -0,0 +1,26 @@
+import sys
+
+from utils import session_loader
+from utils.fixtures import FixtureSource
+from utils.season import SeasonBatch
+
+
+def test_pool_kept_across_batches(tmp_path):
+    previous = session_loader.source
+    main = sys.modules['__main__']
+    batch = SeasonBatch(max_workers=2)
+    try:
+        session_loader.use_source(FixtureSource())
+        assert set(batch.season(2023, 'R', [1, 2])['Round']) == {1, 2}
+        pool = batch._pool
+        assert sys.modules['__main__'] is main
+
+        # Sessions of later batches come from the source in use by then
+        source = FixtureSource(str(tmp_path))
+        session_loader.use_source(source)
+        assert set(batch.season(2023, 'Q', [1])['Round']) == {1}
+        assert batch._pool is pool
+        assert source.store.stored_parts(source.get_session(2023, 1, 'Q'))
+    finally:
+        batch.close()
+        session_loader.use_source(previous)
@@ -0,0 +1,55 @@
+import pickle
+
+import pytest
+
+from utils import session_loader
+from utils.fixtures import FixtureSource, make_session, populate_session
+from utils.session_loader import ALL_PARTS, LAPS_AND_TELEMETRY, LAPS_ONLY, SessionCache
+from utils.session_store import fastf1_load
+
+
+def _fixture_race():
+    session = make_session(2023, 1, 'R')
+    populate_session(session, LAPS_ONLY)
+    return session
+
+
+@pytest.fixture
+def fixture_source():
+    previous = session_loader.source
+    session_loader.use_source(FixtureSource())
+    yield
+    session_loader.use_source(previous)
+
+
+def test_default_source_pickles():
+    # Worker processes of the season and report runs get the source as an
+    # argument of their tasks or initializer
+    source = session_loader.FastF1Source(session_loader.default_store())
+    copy = pickle.loads(pickle.dumps(source))
+    assert copy.store.root == source.store.root
+    assert copy.store.index.stats()['sessions'] == 0
+
+
+def test_upgrades_keep_laps():
+    # Upgrading a cached session loads only the missing parts, so FastF1's
+    # post-processing does not append retired cars' laps again
+    cache = SessionCache(memory_budget=1024 ** 3)
+    session = cache.get_or_load('race', LAPS_ONLY, _fixture_race, fastf1_load)
+    laps = len(session.laps)
+    for parts in (LAPS_AND_TELEMETRY, ALL_PARTS):
+        assert cache.get_or_load('race', parts, _fixture_race, fastf1_load) is session
+        assert len(session.laps) == laps
+    assert cache.stats()['upgrades'] == 2
+
+
+def test_messages_flag_deleted_laps_after_compaction(fixture_source):
+    # FastF1 writes the deleted lap flags into laps that were compacted
+    # when the session was first loaded without race control messages
+    session = session_loader.load_session(2023, 1, 'Q', LAPS_ONLY)
+    assert session.laps['Driver'].dtype == 'category'
+    assert session_loader.load_session(2023, 1, 'Q', LAPS_ONLY | {'messages'}) is session
+    deleted = session.laps.loc[session.laps['Deleted']]
+    assert len(deleted) == 1
+    assert not deleted['IsPersonalBest'].any()
+    assert deleted['DeletedReason'].iloc[0].startswith('TRACK LIMITS')
@@ -0,0 +1,109 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from utils.compact import compact_session
+from utils.fixtures import FixtureSource, make_session, populate_session
+from utils.session_loader import ALL_PARTS, LAPS_AND_TELEMETRY, LAPS_ONLY
+from utils.session_store import SessionStore
+
+
+def _loaded(parts):
+    session = make_session(2023, 1, 'R')
+    populate_session(session, parts)
+    compact_session(session)
+    return session
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SessionStore(str(tmp_path))
+
+
+def _assert_telemetry_equal(restored, session):
+    for name in ('car_data', 'pos_data'):
+        original = getattr(session, name)
+        assert sorted(getattr(restored, name)) == sorted(original)
+        for drv, frame in original.items():
+            pd.testing.assert_frame_equal(getattr(restored, name)[drv], frame)
+
+
+def test_round_trip(store):
+    session = _loaded(ALL_PARTS)
+    store.save(session, ALL_PARTS)
+
+    restored = make_session(2023, 1, 'R')
+    assert store.restore(restored, ALL_PARTS) == ALL_PARTS
+    pd.testing.assert_frame_equal(restored.laps, session.laps.reset_index(drop=True))
+    assert restored.laps['Driver'].dtype == session.laps['Driver'].dtype == 'category'
+    pd.testing.assert_frame_equal(restored.results.reset_index(drop=True),
+                                  session.results.reset_index(drop=True))
+    _assert_telemetry_equal(restored, session)
+    for name in ('weather_data', 'race_control_messages', 'session_status', 'track_status'):
+        pd.testing.assert_frame_equal(getattr(restored, name), getattr(session, name))
+    assert restored.t0_date == session.t0_date
+    assert restored.total_laps == session.total_laps
+
+
+def test_partial_parts(store):
+    session = make_session(2023, 1, 'R')
+    assert store.restore(session, LAPS_ONLY) is None
+
+    session = _loaded(LAPS_ONLY)
+    store.save(session, LAPS_ONLY)
+    restored = make_session(2023, 1, 'R')
+    assert store.restore(restored, LAPS_AND_TELEMETRY) == LAPS_ONLY
+    assert not hasattr(restored, '_car_data')
+    pd.testing.assert_frame_equal(restored.laps, session.laps.reset_index(drop=True))
+
+    # Telemetry stored later is added to the stored laps
+    session = _loaded(LAPS_AND_TELEMETRY)
+    store.save(session, {'telemetry'})
+    assert store.stored_parts(session) == LAPS_AND_TELEMETRY
+    restored = make_session(2023, 1, 'R')
+    assert store.restore(restored, LAPS_AND_TELEMETRY) == LAPS_AND_TELEMETRY
+    _assert_telemetry_equal(restored, session)
+
+
+def test_messages_added_to_stored_laps(store):
+    store.save(_loaded(LAPS_ONLY), LAPS_ONLY)
+
+    # The messages loaded later flag a deleted lap in the stored laps
+    source = FixtureSource(store.root)
+    session = source.get_session(2023, 1, 'R')
+    source.load(session, LAPS_ONLY | {'messages'})
+    assert session.laps['Deleted'].sum() == 1
+    restored = make_session(2023, 1, 'R')
+    store.restore(restored, LAPS_ONLY | {'messages'})
+    pd.testing.assert_series_equal(restored.laps['Deleted'], session.laps['Deleted'])
+
+
+def test_fixture_source_fills_missing_parts(store):
+    store.save(_loaded(LAPS_ONLY), LAPS_ONLY)
+
+    source = FixtureSource(store.root)
+    session = source.get_session(2023, 1, 'R')
+    source.load(session, LAPS_AND_TELEMETRY)
+    assert session.car_data and session.pos_data
+    assert store.stored_parts(session) == LAPS_AND_TELEMETRY
+
+
+def test_removed_while_restoring(store, monkeypatch):
+    session = _loaded(LAPS_ONLY)
+    store.save(session, LAPS_ONLY)
+
+    # Another process prunes the session after its meta.json was read
+    read_meta = store._read_meta
+
+    def read_and_remove(path):
+        meta = read_meta(path)
+        shutil.rmtree(path)
+        return meta
+
+    monkeypatch.setattr(store, '_read_meta', read_and_remove)
+    restored = make_session(2023, 1, 'R')
+    assert store.restore(restored, LAPS_ONLY) is None
+    assert not hasattr(restored, '_laps')
+    assert not os.path.exists(store.session_dir(session))
@@ -0,0 +1,54 @@
+import pytest
+
+from utils import standings
+from utils.fixtures import MockErgastServer
+from utils.standings import StandingsEngine
+
+YEAR = 2023
+SCHEDULE = f'/ergast/f1/{YEAR}.json'
+
+
+def _round_paths(paths):
+    return sorted(path for path in paths if path != SCHEDULE)
+
+
+@pytest.fixture
+def server():
+    with MockErgastServer(YEAR, n_rounds=12, published=10, latency=0.02) as server:
+        yield server
+
+
+def test_fetches_are_bounded(server):
+    engine = StandingsEngine(server.url, cache_dir=None, max_workers=3)
+    results = engine.season_results(YEAR)
+    assert [frame['round'].iloc[0] for frame in results] == list(range(1, 11))
+    # Concurrent, but never more requests at once than workers
+    assert 1 < server.max_active <= 3
+
+
+def test_rounds_are_cached(server, tmp_path):
+    engine = StandingsEngine(server.url, cache_dir=str(tmp_path))
+    engine.season_results(YEAR)
+    assert len(_round_paths(server.paths)) == 2 * 10  # results and sprint
+
+    # A repeated request and a new engine on the same directory only ask
+    # for the schedule
+    del server.paths[:]
+    engine.season_results(YEAR)
+    results = StandingsEngine(server.url, cache_dir=str(tmp_path)).season_results(YEAR)
+    assert _round_paths(server.paths) == []
+    assert len(results) == 10
+
+
+def test_only_new_rounds_are_fetched(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(standings, 'SCHEDULE_TTL', 0)
+    engine = StandingsEngine(server.url, cache_dir=str(tmp_path))
+    engine.season_results(YEAR)
+
+    server.published = 12
+    del server.paths[:]
+    results = engine.season_results(YEAR)
+    assert len(results) == 12
+    assert _round_paths(server.paths) == sorted(
+        f'/ergast/f1/{YEAR}/{rnd}/{kind}.json' for rnd in (11, 12)
+        for kind in ('results', 'sprint'))
@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+
+import pytest
+
+from utils import store_index
+from utils.store_index import StoreIndex
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(store_index, 'POLL_SECONDS', 0.02)
+
+
+def _hold(index, key, seconds):
+    # Hold the lease of ``key`` in another thread, i.e. as another owner
+    held = threading.Event()
+
+    def run():
+        with index.lease(key):
+            held.set()
+            time.sleep(seconds)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    held.wait()
+    return thread
+
+
+def _store(index, key, size):
+    path = os.path.join(index.root, key)
+    os.makedirs(path)
+    with open(os.path.join(path, 'laps.parquet'), 'wb') as f:
+        f.write(b'\0' * size)
+    index.stored(key)
+    time.sleep(0.01)  # distinct last use times
+
+
+def test_lease_waits_for_holder(tmp_path):
+    index = StoreIndex(str(tmp_path))
+    thread = _hold(index, '2023/01/Race', 0.3)
+    start = time.monotonic()
+    with index.lease('2023/01/Race') as waited:
+        assert waited
+        assert time.monotonic() - start > 0.2
+    thread.join()
+    assert index.waits == 1
+    assert index.stats()['loading'] == 0
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    index = StoreIndex(str(tmp_path), lease_seconds=0.2)
+    # A process that died while loading never releases its lease
+    assert index._acquire('2023/01/Race', 'dead-process')
+    with index.lease('2023/01/Race') as waited:
+        assert waited
+        assert not index._acquire('2023/01/Race', 'other-process')
+
+
+def test_lease_is_renewed(tmp_path):
+    index = StoreIndex(str(tmp_path), lease_seconds=0.3)
+    thread = _hold(index, '2023/01/Race', 1.0)
+    # Held for longer than lease_seconds, but kept alive by its renewals
+    time.sleep(0.6)
+    assert not index._acquire('2023/01/Race', 'other-process')
+    thread.join()
+    assert index._acquire('2023/01/Race', 'other-process')
+
+
+def test_gives_up_waiting(tmp_path):
+    index = StoreIndex(str(tmp_path), wait_seconds=0.2)
+    assert index._acquire('2023/01/Race', 'other-process')
+    with index.lease('2023/01/Race') as waited:
+        assert waited
+    # The other process still holds its lease
+    assert index.stats()['loading'] == 1
+
+
+def test_least_recently_used_removed_by_size(tmp_path):
+    index = StoreIndex(str(tmp_path), max_bytes=2500)
+    _store(index, '2023/01/Race', 1000)
+    _store(index, '2023/02/Race', 1000)
+    index.used('2023/01/Race')
+    _store(index, '2023/03/Race', 1000)
+
+    assert not os.path.exists(tmp_path / '2023' / '02' / 'Race')
+    assert os.path.exists(tmp_path / '2023' / '01' / 'Race')
+    assert os.path.exists(tmp_path / '2023' / '03' / 'Race')
+    stats = index.stats()
+    assert (stats['sessions'], stats['removed']) == (2, 1)
+
+
+def test_old_sessions_removed(tmp_path):
+    index = StoreIndex(str(tmp_path), max_age=60)
+    _store(index, '2023/01/Race', 1000)
+    index._connect().execute('UPDATE sessions SET used_at = ?', (time.time() - 120,))
+    _store(index, '2023/02/Race', 1000)
+
+    assert not os.path.exists(tmp_path / '2023' / '01' / 'Race')
+    assert index.stats()['sessions'] == 1
+
+
+def test_leased_session_kept(tmp_path):
+    index = StoreIndex(str(tmp_path), max_bytes=1500)
+    _store(index, '2023/01/Race', 1000)
+    assert index._acquire('2023/01/Race', 'other-process')
+    _store(index, '2023/02/Race', 1000)
+
+    assert os.path.exists(tmp_path / '2023' / '01' / 'Race')
+    assert index.stats()['sessions'] == 2
+    # Still over the limit, only the session that is not leased goes
+    assert index.prune() == ['2023/02/Race']
+    assert os.path.exists(tmp_path / '2023' / '01' / 'Race')
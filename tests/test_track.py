@@ -0,0 +1,30 @@
+from utils.fixtures import make_session, populate_session
+from utils.session_loader import LAPS_AND_TELEMETRY
+from utils.track import TrackCache, TrackGeometry
+
+
+def _fixture_race():
+    session = make_session(2023, 1, 'R')
+    populate_session(session, LAPS_AND_TELEMETRY)
+    return session
+
+
+def test_fixture_geometry_is_complete():
+    # Built from the fixture's circuit info, without network access
+    geometry = TrackGeometry.from_session(_fixture_race())
+    assert geometry.complete
+    assert len(geometry.corner_labels()) == len(geometry.corners) > 0
+    assert geometry.corners['Distance'].between(0, geometry.length).all()
+
+
+def test_incomplete_geometry_not_cached():
+    session = _fixture_race()
+    circuit_info = session.get_circuit_info
+    session.get_circuit_info = lambda: None
+    cache = TrackCache()
+    assert not cache.get(session).complete
+
+    # Circuit info available again, e.g. after a failed request
+    session.get_circuit_info = circuit_info
+    assert cache.get(session).complete
+    assert cache.get(session) is cache.get(session)
@@ -0,0 +1,88 @@
+"""Compact in-memory representation of loaded session data.
+
+FastF1 keeps driver, team and compound names as Python strings and every
+measurement as float64 or int64. :func:`compact_session` converts the laps
+and telemetry frames of a loaded session in place:
+
+* repeated strings (drivers, teams, compounds, track status, data source)
+  become categoricals; their dictionaries are shared between all sessions
+  with the same values, so a season's sessions reuse one driver and one
+  team dictionary
+* speeds, positions, tyre age and lap counters become float32, gears and
+  DRS states int8
+
+Timedelta and datetime columns stay as they are, since FastF1 slices laps
+and telemetry by them. The frames keep their FastF1 classes, so
+``pick_drivers``, ``pick_quicklaps``, ``pick_fastest``, ``get_telemetry``
+and the plotting colour mappings work unchanged.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Not DeletedReason: FastF1 writes it when race control messages are
+# loaded into a session whose laps are already loaded
+LAP_CATEGORIES = ['Driver', 'DriverNumber', 'Team', 'Compound', 'TrackStatus']
+LAP_FLOATS = ['LapNumber', 'Stint', 'TyreLife', 'Position',
+              'SpeedI1', 'SpeedI2', 'SpeedFL', 'SpeedST']
+
+TELEMETRY_CATEGORIES = ['Source', 'Status']
+TELEMETRY_FLOATS = ['RPM', 'Speed', 'Throttle', 'X', 'Y', 'Z']
+TELEMETRY_INTS = ['nGear', 'DRS']
+
+# Values FastF1 adds later on, e.g. when merging car and position data
+KNOWN_CATEGORIES = {'Source': ['car', 'pos', 'interpolation']}
+
+_dtypes = {}  # sorted categories -> CategoricalDtype shared by all sessions
+_lock = threading.Lock()
+
+
+def _shared_dtype(values, known=()):
+    categories = tuple(sorted(set(pd.unique(values.dropna())) | set(known), key=str))
+    with _lock:
+        return _dtypes.setdefault(categories, pd.CategoricalDtype(list(categories)))
+
+
+def frame_size(frame):
+    return int(frame.memory_usage(deep=True).sum()) if frame is not None else 0
+
+
+def compact_frame(frame, categories=(), floats=(), ints=()):
+    """Convert the given columns of ``frame`` in place, where present."""
+    for column in categories:
+        if column in frame and frame[column].dtype == object:
+            dtype = _shared_dtype(frame[column], KNOWN_CATEGORIES.get(column, ()))
+            frame[column] = frame[column].astype(dtype)
+    for column in floats:
+        if column in frame and frame[column].dtype == np.float64:
+            frame[column] = frame[column].astype(np.float32)
+    for column in ints:
+        if column in frame and frame[column].dtype.kind in 'iu' \
+                and frame[column].between(-128, 127).all():
+            frame[column] = frame[column].astype(np.int8)
+    return frame
+
+
+def _frames(session):
+    laps = getattr(session, '_laps', None)
+    if laps is not None:
+        yield laps, LAP_CATEGORIES, LAP_FLOATS, ()
+    for name in ('_car_data', '_pos_data'):
+        for frame in getattr(session, name, {}).values():
+            yield frame, TELEMETRY_CATEGORIES, TELEMETRY_FLOATS, TELEMETRY_INTS
+
+
+def compact_session(session):
+    """Compact the laps and telemetry of ``session`` in place.
+
+    Returns the memory used by these frames before and after in bytes.
+    Frames that are already compact are left alone, so this can run again
+    after more data parts were loaded into the session.
+    """
+    before = after = 0
+    for frame, categories, floats, ints in _frames(session):
+        before += frame_size(frame)
+        compact_frame(frame, categories, floats, ints)
+        after += frame_size(frame)
+    return before, after
@@ -0,0 +1,114 @@
+"""Distance aligned comparison of laps of several drivers.
+
+The laps are cut straight out of the car data that is already loaded for
+the session, instead of calling ``get_telemetry()`` once per driver, and
+are resampled onto one common distance grid with ``np.interp``. All
+channels then are plain ``(drivers, samples)`` arrays, so deltas between
+drivers and mini-sector times are array arithmetic.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.laps import fastest_laps
+
+CHANNELS = ['Speed', 'Throttle', 'Brake', 'nGear', 'RPM']
+DEFAULT_STEP = 5.0  # metres between grid points
+
+
+def _seconds(values):
+    return values.to_numpy(dtype='timedelta64[ns]').astype(np.int64) / 1e9
+
+
+class Comparison:
+    """Channels of the compared laps on a common distance grid.
+
+    ``time`` and each channel in ``channels`` are arrays with one row per
+    driver (in the order of ``drivers``) and one column per grid point in
+    ``distance``.
+    """
+
+    def __init__(self, drivers, laps, distance, time, channels):
+        self.drivers = drivers
+        self.laps = laps
+        self.distance = distance
+        self.time = time
+        self.channels = channels
+
+    def _row(self, reference):
+        if reference not in self.drivers:
+            raise ValueError(f"Driver {reference} is not part of the comparison!")
+        return self.drivers.index(reference)
+
+    def delta(self, channel, reference):
+        """Difference of ``channel`` to the ``reference`` driver."""
+        values = self.channels[channel]
+        return values - values[self._row(reference)]
+
+    def time_delta(self, reference):
+        """Cumulative time gained (negative) or lost to ``reference``."""
+        return self.time - self.time[self._row(reference)]
+
+    def mini_sectors(self, count=25):
+        """Split the lap into ``count`` mini-sectors of equal length.
+
+        Returns the sector boundaries as grid indices, the time of every
+        driver in each mini-sector and the index of the fastest driver per
+        mini-sector.
+        """
+        bounds = np.linspace(0, len(self.distance) - 1, count + 1).round().astype(int)
+        times = np.diff(self.time[:, bounds], axis=1)
+        return bounds, times, times.argmin(axis=0)
+
+
+def _lap_trace(car_data, start, end):
+    # Samples of one lap with the lap start and end interpolated in, so the
+    # trace covers exactly the timed lap
+    session_time = _seconds(car_data['SessionTime'])
+    first, last = np.searchsorted(session_time, [start, end])
+    t = np.concatenate([[start], session_time[first:last], [end]])
+    values = {
+        channel: np.interp(t, session_time, car_data[channel].to_numpy(dtype=float))
+        for channel in CHANNELS
+    }
+    speed = values['Speed'] / 3.6
+    distance = np.concatenate([[0], np.cumsum(np.diff(t) * (speed[1:] + speed[:-1]) / 2)])
+    return t - start, distance, values
+
+
+def compare_laps(session, drivers, lap_numbers=None, step=DEFAULT_STEP):
+    """Resample laps of ``drivers`` onto a common distance grid.
+
+    By default the fastest lap of each driver is used; ``lap_numbers`` maps
+    drivers to a chosen lap number instead. The session needs laps and
+    telemetry loaded.
+    """
+    lap_numbers = lap_numbers or {}
+    laps = session.laps.loc[session.laps['Driver'].isin(drivers)]
+    chosen = laps.loc[laps['LapNumber'] == laps['Driver'].map(lap_numbers)]
+    rest = laps.loc[~laps['Driver'].isin(list(lap_numbers))]
+    selected = chosen if rest.empty else pd.concat([chosen, fastest_laps(rest)])
+    selected = selected.loc[selected['LapStartTime'].notna() & selected['Time'].notna()] \
+        .set_index('Driver')
+    missing = [drv for drv in drivers if drv not in selected.index]
+    if missing:
+        raise ValueError(f"No lap data found for driver(s) {', '.join(missing)}!")
+    selected = selected.loc[list(drivers)]
+
+    traces = []
+    for driver, lap in selected.iterrows():
+        car_data = session.car_data.get(str(lap['DriverNumber']))
+        if car_data is None or car_data.empty:
+            raise ValueError(f"No telemetry data available for driver {driver}!")
+        traces.append(_lap_trace(car_data, lap['LapStartTime'].total_seconds(),
+                                 lap['Time'].total_seconds()))
+
+    # Grid up to the shortest measured lap, so no trace is extrapolated
+    length = min(distance[-1] for _, distance, _ in traces)
+    grid = np.arange(0, length, step)
+    time = np.stack([np.interp(grid, distance, t) for t, distance, _ in traces])
+    channels = {
+        channel: np.stack([np.interp(grid, distance, values[channel])
+                           for _, distance, values in traces])
+        for channel in CHANNELS
+    }
+    return Comparison(list(drivers), selected.reset_index(), grid, time, channels)
@@ -0,0 +1,138 @@
+"""Process-wide cache of rendered page figures.
+
+Pages render their matplotlib figures through :func:`cached_figure`, which
+keys the encoded image bytes by page, page inputs and theme. Pages that
+show tables or notes next to the figure use :func:`cached_view`, which
+caches that data with the image. A repeat view of the same inputs, from
+any user, is then served from memory without loading, preparing or
+drawing anything. The cache is bounded by a memory budget and evicts the
+least recently used images first. Every figure is closed as soon as it is
+encoded, so figures do not pile up in pyplot.
+"""
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from utils import instrument
+
+# Memory budget for cached images, configurable through the environment
+DEFAULT_FIGURE_CACHE_MB = 256
+
+# Same output as st.pyplot
+SAVEFIG_OPTIONS = {'bbox_inches': 'tight', 'dpi': 200}
+
+
+def encode_figure(fig, fmt='png'):
+    """Encode ``fig`` as PNG or SVG bytes and close it."""
+    # Imported here, so that pages do not load pyplot before drawing
+    from matplotlib import pyplot as plt
+
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, **SAVEFIG_OPTIONS)
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def _data_size(data):
+    # Approximate bytes of the page data cached with an image
+    if data is None:
+        return 0
+    if hasattr(data, 'memory_usage'):
+        return int(data.memory_usage(deep=True).sum())
+    if isinstance(data, (list, tuple)):
+        return sum(_data_size(item) for item in data)
+    if isinstance(data, dict):
+        return sum(_data_size(item) for item in data.values())
+    return len(str(data))
+
+
+class FigureCache:
+    """LRU cache of encoded figures and their page data bounded by a byte
+    budget."""
+
+    def __init__(self, memory_budget):
+        self.memory_budget = memory_budget
+        self.memory_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._images = OrderedDict()  # key -> (image bytes, data, size)
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, build, fmt='png'):
+        """(image bytes, data) for ``key``; ``build()`` returns the figure
+        and its data on a miss."""
+        with self._lock:
+            entry = self._images.get(key)
+            if entry is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                instrument.mark('figure', 'hit')
+                return entry[0], entry[1]
+            self.misses += 1
+        instrument.mark('figure', 'miss')
+
+        fig, data = build()
+        with instrument.stage('render'):
+            image = encode_figure(fig, fmt)
+        size = len(image) + _data_size(data)
+        with self._lock:
+            previous = self._images.pop(key, None)
+            if previous is not None:
+                self.memory_used -= previous[2]
+            self._images[key] = (image, data, size)
+            self.memory_used += size
+            self._evict()
+        return image, data
+
+    def _evict(self):
+        while self.memory_used > self.memory_budget and len(self._images) > 1:
+            _, (_, _, size) = self._images.popitem(last=False)
+            self.memory_used -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self.memory_used = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'figures': len(self._images),
+                'memory_used_mb': self.memory_used / 1024 ** 2,
+                'memory_budget_mb': self.memory_budget / 1024 ** 2,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+figure_cache = FigureCache(
+    int(os.environ.get('F1VIZ_FIGURE_CACHE_MB', DEFAULT_FIGURE_CACHE_MB)) * 1024 ** 2
+)
+
+
+def cached_figure(page, inputs, build, theme=None, fmt='png'):
+    """Encoded figure of ``page`` for ``inputs``, rendered at most once.
+
+    ``build`` loads, prepares and plots the figure; it is only called when
+    the image is not cached yet. Errors raised by ``build`` are not cached.
+    """
+    return figure_cache.get_or_render((page, tuple(inputs), theme, fmt),
+                                      lambda: (build(), None), fmt)[0]
+
+
+def cached_view(page, inputs, build, theme=None, fmt='png'):
+    """Encoded figure of ``page`` for ``inputs`` and the data shown with it.
+
+    ``build`` loads and prepares the session and returns the figure and
+    the page data (tables, notes); it is only called when the view is not
+    cached yet, so a cached view loads nothing. The data is shared by all
+    users and must not be modified. Notes for the user belong in the data,
+    as calls to ``st.warning`` inside ``build`` are skipped on hits.
+    """
+    return figure_cache.get_or_render((page, tuple(inputs), theme, fmt), build, fmt)
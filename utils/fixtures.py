@@ -0,0 +1,763 @@
+"""Offline stand-in for FastF1 sessions.
+
+Builds real :class:`fastf1.core.Session` objects filled with synthetic but
+realistically sized data, so that the page code can be run, timed and
+profiled without access to the F1 live timing API or Ergast:
+
+* 20 drivers of the 2023 grid, so the FastF1 plotting colour tables work
+* a 70 lap race, a three part qualifying and one hour practice sessions
+* 10 Hz car telemetry and 4 Hz position telemetry on a closed track, with
+  the circuit info (corners) FastF1 would fetch from MultiViewer
+
+Sessions are deterministic for a given year, round and session type.
+Recorded sessions can be served as well by pointing :class:`FixtureSource`
+at a session store directory (see :mod:`utils.session_store`).
+Season standings are served by :class:`MockErgastServer`, a local stand-in
+for the Ergast HTTP API.
+"""
+import functools
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+from fastf1.core import Laps, Session, SessionResults, Telemetry
+from fastf1.events import Event
+from fastf1.mvapi import CircuitInfo
+from fastf1.plotting import _interface as _plotting_interface
+from fastf1.plotting._base import (
+    _Driver,
+    _DriverTeamMapping,
+    _normalize_string,
+    _Team
+)
+from fastf1.plotting._constants import Constants
+
+from utils import jobs
+from utils.session_store import SessionStore
+
+# Driver number, abbreviation, first name, last name, team name, team colour
+DRIVERS = [
+    ('1', 'VER', 'Max', 'Verstappen', 'Red Bull Racing', '3671C6'),
+    ('11', 'PER', 'Sergio', 'Perez', 'Red Bull Racing', '3671C6'),
+    ('16', 'LEC', 'Charles', 'Leclerc', 'Ferrari', 'F91536'),
+    ('55', 'SAI', 'Carlos', 'Sainz', 'Ferrari', 'F91536'),
+    ('44', 'HAM', 'Lewis', 'Hamilton', 'Mercedes', '6CD3BF'),
+    ('63', 'RUS', 'George', 'Russell', 'Mercedes', '6CD3BF'),
+    ('14', 'ALO', 'Fernando', 'Alonso', 'Aston Martin', '358C75'),
+    ('18', 'STR', 'Lance', 'Stroll', 'Aston Martin', '358C75'),
+    ('4', 'NOR', 'Lando', 'Norris', 'McLaren', 'F58020'),
+    ('81', 'PIA', 'Oscar', 'Piastri', 'McLaren', 'F58020'),
+    ('10', 'GAS', 'Pierre', 'Gasly', 'Alpine', '2293D1'),
+    ('31', 'OCO', 'Esteban', 'Ocon', 'Alpine', '2293D1'),
+    ('23', 'ALB', 'Alexander', 'Albon', 'Williams', '37BEDD'),
+    ('2', 'SAR', 'Logan', 'Sargeant', 'Williams', '37BEDD'),
+    ('22', 'TSU', 'Yuki', 'Tsunoda', 'AlphaTauri', '5E8FAA'),
+    ('21', 'DEV', 'Nyck', 'De Vries', 'AlphaTauri', '5E8FAA'),
+    ('77', 'BOT', 'Valtteri', 'Bottas', 'Alfa Romeo', 'C92D4B'),
+    ('24', 'ZHO', 'Guanyu', 'Zhou', 'Alfa Romeo', 'C92D4B'),
+    ('27', 'HUL', 'Nico', 'Hulkenberg', 'Haas F1 Team', 'B6BABD'),
+    ('20', 'MAG', 'Kevin', 'Magnussen', 'Haas F1 Team', 'B6BABD'),
+]
+
+RACE_LAPS = 70
+BASE_LAP_TIME = 92.0
+CAR_DATA_HZ = 10
+POS_DATA_HZ = 4
+# Session time at which the session is started, FastF1 sessions usually
+# have some data before the start
+SESSION_START = pd.Timedelta(minutes=10)
+
+POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+SPRINT_ROUNDS = (4, 9, 12, 17, 19, 21)
+SECTOR_SPLIT = np.array([0.31, 0.38, 0.31])
+COMPOUND_DEGRADATION = {'SOFT': 0.09, 'MEDIUM': 0.055, 'HARD': 0.035}
+GEAR_SPEEDS = np.array([80, 110, 140, 170, 200, 235, 270])
+
+
+def _seed(*parts):
+    return zlib.crc32(repr(parts).encode())
+
+
+class _Track:
+    """A closed synthetic circuit with a speed profile derived from its
+    curvature."""
+
+    SAMPLES = 2000
+
+    def __init__(self):
+        s = np.linspace(0, 1, self.SAMPLES, endpoint=False)
+        angle = 2 * np.pi * s
+        # X/Y in 1/10 m like the FastF1 position data
+        self.x = 22000 * np.cos(angle) + 5000 * np.cos(3 * angle) + 2500 * np.sin(5 * angle)
+        self.y = 12000 * np.sin(angle) + 3500 * np.sin(2 * angle) - 2000 * np.cos(4 * angle)
+
+        dx = np.roll(self.x, -1) - self.x
+        dy = np.roll(self.y, -1) - self.y
+        step = np.hypot(dx, dy) / 10
+        heading = np.unwrap(np.arctan2(dy, dx))
+        turn = np.abs(np.diff(heading, append=heading[0] + 2 * np.pi))
+        curvature = np.convolve(np.tile(turn / step, 3), np.ones(25) / 25,
+                                mode='same')[self.SAMPLES:2 * self.SAMPLES]
+        self.speed = 330 - 250 * np.sqrt(curvature / curvature.max())
+
+        # normalised time through the lap at each sample and at the finish
+        dt = step / (self.speed / 3.6)
+        self.time = np.concatenate([[0], np.cumsum(dt)]) / dt.sum()
+        self.progress = np.concatenate([s, [1.0]])
+        self.length = step.sum()
+
+        # Corners at the slowest point of every bend, with the markers set
+        # off away from the middle of the circuit
+        slow = np.flatnonzero((self.speed < np.roll(self.speed, 1))
+                              & (self.speed <= np.roll(self.speed, -1)) & (self.speed < 315))
+        self.corners = pd.DataFrame({
+            'X': self.x[slow], 'Y': self.y[slow],
+            'Number': np.arange(1, len(slow) + 1), 'Letter': '',
+            'Angle': np.degrees(np.arctan2(self.y[slow], self.x[slow])),
+        })
+
+    def sample(self, frac, lap_time):
+        """Position and speed at the lap fractions (by time) ``frac``."""
+        progress = np.interp(frac, self.time, self.progress) % 1
+        idx = progress * self.SAMPLES
+        lo = idx.astype(int) % self.SAMPLES
+        hi = (lo + 1) % self.SAMPLES
+        w = idx - np.floor(idx)
+        x = self.x[lo] * (1 - w) + self.x[hi] * w
+        y = self.y[lo] * (1 - w) + self.y[hi] * w
+        speed = (self.speed[lo] * (1 - w) + self.speed[hi] * w) \
+            * (BASE_LAP_TIME / lap_time)
+        return x, y, speed
+
+
+_TRACK = _Track()
+
+
+def _circuit_info(session):
+    # Circuit info of the synthetic track, in place of the MultiViewer API
+    markers = pd.DataFrame(columns=['X', 'Y', 'Number', 'Letter', 'Angle'])
+    circuit_info = CircuitInfo(corners=_TRACK.corners.copy(), marshal_lights=markers.copy(),
+                               marshal_sectors=markers.copy(), rotation=0.0)
+    circuit_info.add_marker_distance(reference_lap=session.laps.pick_fastest())
+    return circuit_info
+
+
+def _no_circuit_info():
+    # Recorded sessions have no circuit info without network access, their
+    # track maps are drawn unrotated and without corners
+    return None
+
+
+def make_event(year=2023, round_number=1, name='Synthetic Grand Prix'):
+    """Event with a conventional weekend format held in the past."""
+    # Ten days apart, so that a full season ends within its year
+    race_date = pd.Timestamp(f'{year}-03-01 15:00') + pd.Timedelta(days=10 * round_number)
+    offsets = [('Practice 1', -2, -3.5), ('Practice 2', -2, 0),
+               ('Practice 3', -1, -3.5), ('Qualifying', -1, 0), ('Race', 0, 0)]
+    data = {
+        'RoundNumber': round_number,
+        'Country': 'Synthetica',
+        'Location': 'Synthetic Park',
+        'OfficialEventName': f'FORMULA 1 {name.upper()} {year}',
+        'EventDate': race_date.normalize(),
+        'EventName': name,
+        'EventFormat': 'conventional',
+        'F1ApiSupport': True,
+    }
+    for i, (session_name, days, hours) in enumerate(offsets, start=1):
+        date = race_date + pd.Timedelta(days=days, hours=hours)
+        data[f'Session{i}'] = session_name
+        data[f'Session{i}Date'] = date.tz_localize('UTC')
+        data[f'Session{i}DateUtc'] = date
+    return Event(data, year=year)
+
+
+def _race_laps(rng, pace):
+    rows = []
+    for drv_idx, (number, abbr, _, _, team, _) in enumerate(DRIVERS):
+        n_laps = RACE_LAPS
+        if drv_idx == len(DRIVERS) - 1:
+            # one retirement
+            n_laps = int(rng.integers(25, 50))
+        stops = int(rng.choice([1, 2], p=[0.6, 0.4]))
+        if stops == 1:
+            pit_laps = [int(rng.integers(22, 38))]
+            compounds = [rng.choice(['MEDIUM', 'SOFT']), 'HARD']
+        else:
+            pit_laps = sorted(rng.choice(np.arange(15, 55), 2, replace=False).tolist())
+            compounds = ['SOFT', 'HARD', rng.choice(['MEDIUM', 'SOFT'])]
+
+        lap = np.arange(1, n_laps + 1)
+        stint = 1 + np.searchsorted(pit_laps, lap, side='left')
+        stint_start = np.concatenate([[1], np.array(pit_laps) + 1])[stint - 1]
+        tyre_life = lap - stint_start + 1 + 2 * (stint == 1)
+        compound = np.array(compounds)[stint - 1]
+        degradation = np.vectorize(COMPOUND_DEGRADATION.get)(compound)
+
+        lap_time = (BASE_LAP_TIME + pace[drv_idx]
+                    + 0.06 * (RACE_LAPS - lap)
+                    + degradation * tyre_life
+                    + rng.normal(0, 0.25, n_laps))
+        lap_time[0] += 4.0
+        in_lap = np.isin(lap, pit_laps)
+        out_lap = np.isin(lap - 1, pit_laps)
+        lap_time[in_lap] += 7.0
+        lap_time[out_lap] += 14.0
+
+        time = SESSION_START.total_seconds() + np.cumsum(lap_time)
+        rows.append(pd.DataFrame({
+            'Driver': abbr, 'DriverNumber': number, 'Team': team,
+            'LapNumber': lap.astype(float), 'Stint': stint.astype(float),
+            'Compound': compound, 'TyreLife': tyre_life.astype(float),
+            'FreshTyre': True, 'LapTime': lap_time, 'Time': time,
+            'PitInTime': np.where(in_lap, time - 2.0, np.nan),
+            'PitOutTime': np.where(out_lap, time - lap_time + 20.0, np.nan),
+        }))
+    return pd.concat(rows, ignore_index=True)
+
+
+def _run_laps(rng, pace, segments, runs, push_laps, compounds):
+    """Laps for run based sessions (practice and qualifying).
+
+    ``segments`` is a list of (start, end, number of drivers taking part)
+    in seconds of session time; drivers are eliminated by their best lap
+    after each segment.
+    """
+    rows = []
+    lap_counts = np.zeros(len(DRIVERS), dtype=int)
+    stints = np.zeros(len(DRIVERS), dtype=int)
+    active = np.arange(len(DRIVERS))
+    for seg_idx, (start, end, n_active) in enumerate(segments):
+        active = active[:n_active]
+        best = {}
+        for drv_idx in active:
+            number, abbr, _, _, team, _ = DRIVERS[drv_idx]
+            run_starts = np.sort(rng.uniform(start, end - 600, runs))
+            next_free = start
+            for run_idx, run_start in enumerate(run_starts):
+                stints[drv_idx] += 1
+                n = push_laps + 2
+                kind = np.array(['out'] + ['push'] * push_laps + ['in'])
+                lap_time = np.where(
+                    kind == 'push',
+                    BASE_LAP_TIME - 5 + pace[drv_idx] - 0.3 * seg_idx
+                    + rng.normal(0, 0.25, n),
+                    BASE_LAP_TIME + 25 + rng.normal(0, 3, n)
+                )
+                # runs of one driver must not overlap
+                run_start = max(run_start, next_free)
+                next_free = run_start + lap_time.sum() + 120
+                time = run_start + np.cumsum(lap_time)
+                lap = lap_counts[drv_idx] + np.arange(1, n + 1)
+                lap_counts[drv_idx] += n
+                compound = compounds[(seg_idx + run_idx) % len(compounds)]
+                rows.append(pd.DataFrame({
+                    'Driver': abbr, 'DriverNumber': number, 'Team': team,
+                    'LapNumber': lap.astype(float),
+                    'Stint': float(stints[drv_idx]), 'Compound': compound,
+                    'TyreLife': np.arange(1, n + 1, dtype=float),
+                    'FreshTyre': True,
+                    # out and in laps have no valid lap time
+                    'LapTime': np.where(kind == 'push', lap_time, np.nan),
+                    'Time': time,
+                    'PitInTime': np.where(kind == 'in', time - 2.0, np.nan),
+                    'PitOutTime': np.where(kind == 'out', run_start + 15.0, np.nan),
+                }))
+                best[drv_idx] = min(best.get(drv_idx, np.inf),
+                                    lap_time[kind == 'push'].min())
+        active = np.array(sorted(best, key=best.get))
+    return pd.concat(rows, ignore_index=True)
+
+
+def _finish_laps(laps, session):
+    """Derive the remaining lap columns the way FastF1 would provide them."""
+    to_td = lambda values: pd.to_timedelta(values, unit='s')
+    # Timed to the millisecond, as in the timing data
+    lap_time = np.round(laps['LapTime'].to_numpy(), 3)
+    # out and in laps still take time on track
+    elapsed = laps.groupby('Driver')['Time'].diff().to_numpy()
+    duration = np.where(np.isnan(lap_time), elapsed, lap_time)
+    duration = np.where(np.isnan(duration), BASE_LAP_TIME + 25, duration)
+    start = laps['Time'].to_numpy() - duration
+
+    sectors = duration[:, None] * SECTOR_SPLIT[None, :]
+    sector_end = start[:, None] + np.cumsum(sectors, axis=1)
+    for i in range(3):
+        laps[f'Sector{i + 1}Time'] = to_td(np.where(np.isnan(lap_time), np.nan, sectors[:, i]))
+        laps[f'Sector{i + 1}SessionTime'] = to_td(sector_end[:, i])
+
+    scale = BASE_LAP_TIME / duration
+    laps['SpeedI1'] = 290 * scale
+    laps['SpeedI2'] = 270 * scale
+    laps['SpeedFL'] = 280 * scale
+    laps['SpeedST'] = 315 * scale
+
+    laps['LapStartTime'] = to_td(start)
+    laps['LapTime'] = to_td(lap_time)
+    laps['Time'] = to_td(laps['Time'])
+    laps['PitInTime'] = to_td(laps['PitInTime'])
+    laps['PitOutTime'] = to_td(laps['PitOutTime'])
+    laps['LapStartDate'] = laps['LapStartTime'] + session.t0_date
+
+    laps['IsPersonalBest'] = (
+        laps['LapTime'].notna()
+        & (laps['LapTime'] == laps.groupby('Driver')['LapTime'].cummin())
+    )
+    laps['TrackStatus'] = '1'
+    laps['DeletedReason'] = ''
+    laps['FastF1Generated'] = False
+    laps['IsAccurate'] = laps['LapTime'].notna() & laps['PitOutTime'].isna() \
+        & laps['PitInTime'].isna()
+    if session.name == 'Race':
+        laps['Position'] = laps.groupby('LapNumber')['Time'].rank(method='first')
+    else:
+        laps['Position'] = np.nan
+    laps = Laps(laps.sort_values(['Driver', 'LapNumber']).reset_index(drop=True),
+                session=session, force_default_cols=True)
+    # FastF1 only sets this optional column after loading race control messages
+    laps['Deleted'] = False
+    return laps
+
+
+def _results(laps, session, quali_parts=None):
+    rows = []
+    for number, abbr, first, last, team, color in DRIVERS:
+        rows.append({
+            'DriverNumber': number, 'BroadcastName': f'{first[0]} {last.upper()}',
+            'Abbreviation': abbr, 'DriverId': last.lower().replace(' ', '_'),
+            'TeamName': team, 'TeamColor': color,
+            'TeamId': team.lower().replace(' ', '_'), 'FirstName': first,
+            'LastName': last, 'FullName': f'{first} {last}', 'HeadshotUrl': '',
+            'CountryCode': '',
+        })
+    results = pd.DataFrame(rows).set_index('DriverNumber', drop=False)
+    results.index.name = None
+
+    if session.name == 'Race':
+        last_laps = laps.sort_values('LapNumber').groupby('DriverNumber').last()
+        order = last_laps.sort_values(['LapNumber', 'Time'],
+                                      ascending=[False, True]).index
+        winner = last_laps.loc[order[0]]
+        results = results.loc[order]
+        results['Position'] = np.arange(1, len(order) + 1, dtype=float)
+        results['ClassifiedPosition'] = results['Position'].astype(int).astype(str)
+        results['GridPosition'] = np.arange(1, len(order) + 1, dtype=float)
+        laps_down = winner['LapNumber'] - last_laps.loc[order, 'LapNumber']
+        results['Status'] = np.where(
+            laps_down == 0, 'Finished',
+            np.where(laps_down > 3, 'Retired', '+' + laps_down.astype(int).astype(str) + ' Lap')
+        )
+        results.loc[results['Status'] == 'Retired', 'ClassifiedPosition'] = 'R'
+        race_time = last_laps.loc[order, 'Time'] - SESSION_START
+        results['Time'] = np.where(laps_down == 0, race_time - race_time.iloc[0], pd.NaT)
+        results.iloc[0, results.columns.get_loc('Time')] = race_time.iloc[0]
+        results['Points'] = [float(p) for p in POINTS] + [0.0] * (len(order) - len(POINTS))
+    else:
+        best = laps.groupby('DriverNumber')['LapTime'].min().sort_values()
+        if quali_parts is not None:
+            for i, part in enumerate(quali_parts, start=1):
+                results[f'Q{i}'] = part.groupby('DriverNumber')['LapTime'].min()
+            order = results.sort_values(['Q3', 'Q2', 'Q1']).index
+        else:
+            order = best.index
+        results = results.loc[order]
+        results['Position'] = np.arange(1, len(order) + 1, dtype=float)
+        results['ClassifiedPosition'] = ''
+        results['Status'] = ''
+    return SessionResults(results, force_default_cols=True)
+
+
+def _telemetry(laps, session, hz, channels):
+    data = {}
+    t0 = session.t0_date
+    for number, group in laps.groupby('DriverNumber', sort=False):
+        lap_start = group['LapStartTime'].dt.total_seconds().to_numpy()
+        lap_end = group['Time'].dt.total_seconds().to_numpy()
+        duration = lap_end - lap_start
+        # all drivers share the same sample times, like in the live timing data
+        times = np.arange(np.floor((lap_start.min() - 30) * hz),
+                          np.ceil((lap_end.max() + 30) * hz)) / hz
+        idx = np.clip(np.searchsorted(lap_start, times, side='right') - 1, 0, None)
+        on_track = (times >= lap_start[idx]) & (times < lap_end[idx])
+        frac = np.clip((times - lap_start[idx]) / duration[idx], 0, 1)
+        x, y, speed = _TRACK.sample(frac, duration[idx])
+        speed = np.where(on_track, speed, 0.0)
+
+        session_time = pd.to_timedelta(np.round(times, 3), unit='s')
+        frame = {'Date': t0 + session_time, 'SessionTime': session_time,
+                 'Time': session_time}
+        if channels == 'car':
+            gear = np.where(on_track, 1 + np.searchsorted(GEAR_SPEEDS, speed), 0)
+            accel = np.gradient(speed)
+            frame.update({
+                'RPM': np.where(on_track, 10500 + 25 * (speed % 35), 4000.0),
+                'Speed': speed,
+                'nGear': gear,
+                'Throttle': np.where(accel >= -0.5, 100.0, 0.0) * on_track,
+                'Brake': accel < -1.5,
+                'DRS': np.where(speed > 300, 12, 0),
+                'Source': 'car',
+            })
+        else:
+            frame.update({
+                'X': np.where(on_track, x, _TRACK.x[0]),
+                'Y': np.where(on_track, y, _TRACK.y[0]),
+                'Z': np.zeros_like(x),
+                'Status': np.where(on_track, 'OnTrack', 'OffTrack'),
+                'Source': 'pos',
+            })
+        data[number] = Telemetry(frame, session=session, driver=number)
+    return data
+
+
+def _register_plotting_teams(session, drivers):
+    # FastF1's plotting module requests the driver list for a session from
+    # the live timing API; provide it from the fixture instead
+    year = str(session.event['EventDate'].year)
+    teams = {}
+    for abbr, first, last, team_name in drivers:
+        if team_name not in teams:
+            team = _Team()
+            team.value = team_name
+            normalized = _normalize_string(team_name).lower()
+            for ref_name, consts in Constants[year].Teams.items():
+                if ref_name in normalized:
+                    team.normalized_value = ref_name
+                    team.constants = consts
+                    break
+            teams[team_name] = team
+        driver = _Driver()
+        driver.value = f'{first} {last}'
+        driver.normalized_value = _normalize_string(driver.value).lower()
+        driver.abbreviation = abbr
+        driver.team = teams[team_name]
+        teams[team_name].drivers.append(driver)
+    _plotting_interface._DRIVER_TEAM_MAPPINGS[session.api_path] = \
+        _DriverTeamMapping(year, list(teams.values()))
+
+
+def _event_name(round_number):
+    return 'Synthetic Grand Prix' if round_number == 1 else f'Synthetic {round_number} Grand Prix'
+
+
+def make_schedule(year=2023, n_rounds=22):
+    """Event schedule of a synthetic season with ``n_rounds`` events."""
+    return pd.DataFrame([make_event(year, rnd, _event_name(rnd))
+                         for rnd in range(1, n_rounds + 1)]).reset_index(drop=True)
+
+
+def make_session(year=2023, event=1, session_type='R'):
+    """Return an unloaded session of the synthetic event."""
+    if isinstance(event, str):
+        round_number = next((rnd for rnd in range(1, 31) if _event_name(rnd) == event), 1)
+        name = event
+    else:
+        round_number, name = event, _event_name(event)
+    fixture_event = make_event(year, round_number, name)
+    session = Session(fixture_event, fixture_event.get_session_name(session_type),
+                      f1_api_support=True)
+    _register_plotting_teams(session, [(abbr, first, last, team) for
+                                       _, abbr, first, last, team, _ in DRIVERS])
+    session.get_circuit_info = functools.partial(_circuit_info, session)
+    return session
+
+
+def populate_session(session, parts):
+    """Fill ``session`` with synthetic data for the given data parts."""
+    jobs.report('results')
+    rng = np.random.default_rng(_seed(session.event.year,
+                                      int(session.event['RoundNumber']),
+                                      session.name))
+    pace = np.sort(rng.uniform(0, 1.8, len(DRIVERS)))
+
+    session._t0_date = session.date - SESSION_START
+    session._session_start_time = SESSION_START
+    start = SESSION_START.total_seconds()
+    quali_parts = None
+    if session.name == 'Race':
+        laps = _race_laps(rng, pace)
+        status_times = [(0, 'Inactive'), (start, 'Started')]
+        split_times = None
+        session._total_laps = RACE_LAPS
+    elif session.name == 'Qualifying':
+        segments = [(start, start + 1080, 20), (start + 1560, start + 2460, 15),
+                    (start + 2940, start + 3660, 10)]
+        laps = _run_laps(rng, pace, segments, runs=2, push_laps=1,
+                         compounds=['SOFT'])
+        status_times = [(0, 'Inactive')]
+        for seg_start, seg_end, _ in segments:
+            status_times += [(seg_start, 'Started'), (seg_end, 'Finished')]
+        split_times = [pd.Timedelta(seconds=s) for s, _, _ in segments]
+        session._total_laps = None
+    else:
+        laps = _run_laps(rng, pace, [(start, start + 3600, 20)], runs=4,
+                         push_laps=5, compounds=['SOFT', 'MEDIUM', 'HARD'])
+        status_times = [(0, 'Inactive'), (start, 'Started')]
+        split_times = None
+        session._total_laps = None
+
+    laps = _finish_laps(laps, session)
+    end = laps['Time'].max().total_seconds()
+    if session.name != 'Qualifying':
+        status_times.append((end, 'Finished'))
+    status_times += [(end + 60, 'Finalised'), (end + 120, 'Ends')]
+
+    if split_times is not None:
+        quali_parts = [
+            laps[(laps['LapStartTime'] >= split)
+                 & (laps['LapStartTime'] < split_times[i + 1]
+                    if i + 1 < len(split_times) else True)]
+            for i, split in enumerate(split_times)
+        ]
+    session._session_split_times = split_times
+    session._session_info = {
+        'Meeting': {'Name': session.event['EventName'],
+                    'Location': session.event['Location'],
+                    'Circuit': {'Key': 0, 'ShortName': 'Synthetic'}},
+        'Name': session.name, 'Path': session.api_path,
+    }
+    session._results = _results(laps, session, quali_parts)
+
+    if 'laps' in parts:
+        jobs.report('timing data')
+        session._laps = laps
+        session._session_status = pd.DataFrame({
+            'Time': pd.to_timedelta([t for t, _ in status_times], unit='s'),
+            'Status': [s for _, s in status_times],
+        })
+        session._track_status = pd.DataFrame({
+            'Time': [pd.Timedelta(0)], 'Status': ['1'], 'Message': ['AllClear'],
+        })
+    if 'telemetry' in parts:
+        jobs.report('telemetry')
+        session._car_data = _telemetry(laps, session, CAR_DATA_HZ, 'car')
+        session._pos_data = _telemetry(laps, session, POS_DATA_HZ, 'pos')
+    if 'weather' in parts:
+        jobs.report('weather')
+        minutes = np.arange(0, int(end // 60) + 1)
+        session._weather_data = pd.DataFrame({
+            'Time': pd.to_timedelta(minutes, unit='min'),
+            'AirTemp': 24 + 0.01 * minutes, 'Humidity': 45.0,
+            'Pressure': 1012.0, 'Rainfall': False,
+            'TrackTemp': 38 + 0.02 * minutes, 'WindDirection': 180,
+            'WindSpeed': 1.5,
+        })
+    if 'messages' in parts:
+        jobs.report('messages')
+        # The second fastest lap of the session is deleted for track limits
+        deleted = laps.loc[laps['LapTime'].notna()].sort_values('LapTime').iloc[1]
+        seconds = deleted['LapTime'].total_seconds()
+        number = str(deleted['DriverNumber'])
+        session._race_control_messages = pd.DataFrame({
+            'Time': [session.t0_date + SESSION_START, session.t0_date + deleted['Time']],
+            'Category': ['Flag', 'Other'],
+            'Message': ['GREEN LIGHT - PIT EXIT OPEN',
+                        f"CAR {number} ({deleted['Driver']}) TIME {int(seconds // 60)}:"
+                        f"{seconds % 60:06.3f} DELETED - TRACK LIMITS AT TURN 4 "
+                        f"LAP {int(deleted['LapNumber'])} 15:04:05"],
+            'Status': [None, None], 'Flag': ['GREEN', None], 'Scope': ['Track', None],
+            'Sector': [np.nan, np.nan], 'RacingNumber': [None, number],
+            'Lap': [1, int(deleted['LapNumber'])],
+        })
+        # Flags the deleted lap, as FastF1 does after loading the messages
+        session._set_laps_deleted_from_rcm()
+    return session
+
+
+def _standings_points(year, n_rounds, sprint_rounds):
+    rng = np.random.default_rng(_seed(year, 'standings'))
+    pace = np.linspace(0, 3, len(DRIVERS))
+    for rnd in range(1, n_rounds + 1):
+        race = np.zeros(len(DRIVERS))
+        race[np.argsort(pace + rng.normal(0, 1.2, len(DRIVERS)))[:len(POINTS)]] = POINTS
+        sprint = None
+        if rnd in sprint_rounds:
+            sprint = np.zeros(len(DRIVERS))
+            sprint[np.argsort(pace + rng.normal(0, 1.2, len(DRIVERS)))[:8]] = \
+                np.arange(8, 0, -1)
+        yield rnd, race, sprint
+
+
+def make_standings_results(year=2023, n_rounds=22, sprint_rounds=SPRINT_ROUNDS):
+    """Per round race results in the shape the standings page builds from
+    Ergast: one frame per round with round, race, driverCode, constructor
+    and points."""
+    return [
+        pd.DataFrame({
+            'round': rnd,
+            'race': f'Synthetic {rnd}',
+            'driverCode': [d[1] for d in DRIVERS],
+            'constructor': [d[4] for d in DRIVERS],
+            'points': race if sprint is None else race + sprint,
+        })
+        for rnd, race, sprint in _standings_points(year, n_rounds, sprint_rounds)
+    ]
+
+
+class MockErgastServer:
+    """Local HTTP server answering the Ergast endpoints that
+    :mod:`utils.standings` uses, with the synthetic standings results.
+
+    ``latency`` delays every response to mimic the round trip to the real
+    API. Only the first ``published`` rounds (all by default) have results;
+    raising it during a run publishes the next ones. ``paths`` logs the
+    requested paths and ``max_active`` the most requests served at once.
+    Use it as a context manager::
+
+        with MockErgastServer(latency=0.05) as server:
+            engine = StandingsEngine(base_url=server.url, cache_dir=None)
+    """
+
+    def __init__(self, year=2023, n_rounds=22, sprint_rounds=SPRINT_ROUNDS,
+                 latency=0.0, published=None):
+        self.year = year
+        self.latency = latency
+        self.published = n_rounds if published is None else published
+        self.requests = 0
+        self.connections = 0
+        self.paths = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._rounds = {
+            rnd: (race, sprint)
+            for rnd, race, sprint in _standings_points(year, n_rounds, sprint_rounds)
+        }
+
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with mock._lock:
+                    mock.connections += 1
+
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                with mock._lock:
+                    mock.requests += 1
+                    mock.paths.append(path)
+                    mock.active += 1
+                    mock.max_active = max(mock.max_active, mock.active)
+                try:
+                    time.sleep(mock.latency)
+                    body = mock._respond(path)
+                finally:
+                    with mock._lock:
+                        mock.active -= 1
+                if body is None:
+                    self.send_error(404)
+                    return
+                data = json.dumps({'MRData': body}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self._server.server_port}/ergast/f1'
+
+    def _race(self, rnd):
+        date = pd.Timestamp(f'{self.year}-03-05') + pd.Timedelta(weeks=2 * (rnd - 1))
+        return {'season': str(self.year), 'round': str(rnd),
+                'raceName': f'Synthetic {rnd} Grand Prix',
+                'date': date.strftime('%Y-%m-%d'), 'time': '15:00:00Z'}
+
+    def _rows(self, points):
+        return [{
+            'number': str(number), 'points': str(float(pts)),
+            'Driver': {'driverId': last.lower().replace(' ', '_'), 'code': abbr},
+            'Constructor': {'constructorId': team.lower().replace(' ', '_'),
+                            'name': team},
+        } for (number, abbr, first, last, team, _), pts in zip(DRIVERS, points)]
+
+    def _respond(self, path):
+        parts = path.removeprefix('/ergast/f1/').removesuffix('.json').split('/')
+        if parts[0] != str(self.year):
+            return {'RaceTable': {'Races': []}}
+        if len(parts) == 1:
+            return {'RaceTable': {'Races': [self._race(rnd) for rnd in self._rounds
+                                            if rnd <= self.published]}}
+        if len(parts) != 3 or int(parts[1]) not in self._rounds \
+                or int(parts[1]) > self.published:
+            return None
+        rnd = int(parts[1])
+        race, sprint = self._rounds[rnd]
+        if parts[2] == 'results':
+            return {'RaceTable': {'Races': [
+                dict(self._race(rnd), Results=self._rows(race))]}}
+        if parts[2] == 'sprint':
+            return {'RaceTable': {'Races': [] if sprint is None else [
+                dict(self._race(rnd), SprintResults=self._rows(sprint))]}}
+        return None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class FixtureSource:
+    """Session source for :mod:`utils.session_loader` that never uses the
+    network.
+
+    Sessions found in the session store at ``recorded`` are served from
+    there, everything else is synthesized. Parts a stored session lacks
+    are synthesized and added to the store, keeping the stored results.
+
+    Example::
+
+        from utils import session_loader
+        session_loader.use_source(FixtureSource())
+    """
+
+    def __init__(self, recorded=None):
+        self.store = SessionStore(recorded) if recorded else None
+
+    def get_session(self, year, event, session_type):
+        if self.store is not None:
+            session = self.store.open_session(year, event, session_type)
+            if session is not None:
+                session.get_circuit_info = _no_circuit_info
+                return session
+        return make_session(year, event, session_type)
+
+    def get_event_schedule(self, year):
+        return make_schedule(year)
+
+    def load(self, session, parts):
+        if self.store is None:
+            populate_session(session, parts)
+            return
+        self.store.load(session, parts, _populate_missing)
+        results = session.results
+        _register_plotting_teams(session, zip(
+            results['Abbreviation'], results['FirstName'],
+            results['LastName'], results['TeamName']))
+
+
+def _populate_missing(session, parts):
+    # Parts the store lacks; results restored from the store stay
+    results = getattr(session, '_results', None)
+    populate_session(session, parts)
+    if results is not None:
+        session._results = results
@@ -0,0 +1,267 @@
+"""Per-stage timing of page requests.
+
+A page wraps the work triggered by a button in :func:`request` and the
+steps inside it in :func:`stage` (or decorates functions with
+:func:`timed`)::
+
+    with instrument.request('teampace', (year, race, session_type)):
+        with instrument.stage('prepare'):
+            ...
+
+The shared infrastructure adds its own stages to the current request: the
+session load with the FastF1 loading stages, the figure encoding and the
+event schedule fetch, as well as whether the session and figure caches
+had the data (:func:`mark`). Stages nest; a stage inside another one is
+recorded as ``outer/inner``.
+
+Every finished request records the wall time of each stage, the peak RSS
+the process has reached by its end and, while :mod:`tracemalloc` is
+tracing, the peak of the memory allocated during the stage. The process
+peak only ever grows, so it does not measure the stage's own memory use.
+The most recent requests are kept in memory for :func:`percentiles` and
+the performance panel, and appended as JSON lines to
+``F1VIZ_TIMING_LOG`` if that is set.
+
+``F1VIZ_TIMING=0`` switches all of this off; :func:`stage` then returns a
+shared no-op context. ``F1VIZ_TIMING=memory`` also starts tracemalloc,
+which slows everything down noticeably.
+"""
+import functools
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+MODE = os.environ.get('F1VIZ_TIMING', '1')
+ENABLED = MODE != '0'
+LOG_PATH = os.environ.get('F1VIZ_TIMING_LOG')
+
+# Requests kept for the performance panel
+HISTORY = 500
+
+_NULL = nullcontext()
+_current = threading.local()
+_logger = logging.getLogger(__name__)
+
+
+def peak_rss_mb():
+    """Peak resident set size of the process so far in MB."""
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+
+class Request:
+    """Stages and cache outcomes of one page request."""
+
+    def __init__(self, page, inputs):
+        self.page = page
+        self.inputs = inputs
+        self.started_at = time.time()
+        self.stages = []  # dicts in the order the stages finished
+        self.cache = {}  # cache name -> 'hit' or 'miss'
+        self.error = None
+        self.total_ms = None
+        self._path = []  # names of the stages currently running
+
+    def add_stage(self, name, wall_ms, alloc_peak_mb=None):
+        self.stages.append({
+            'stage': '/'.join(self._path + [name]),
+            'wall_ms': wall_ms,
+            'process_peak_rss_mb': peak_rss_mb(),
+            'alloc_peak_mb': alloc_peak_mb,
+        })
+
+    def record(self):
+        return {
+            'time': self.started_at,
+            'page': self.page,
+            'inputs': [str(value) for value in self.inputs],
+            'total_ms': self.total_ms,
+            'stages': self.stages,
+            'cache': self.cache,
+            'error': self.error,
+        }
+
+
+class Recorder:
+    """The most recent finished requests, optionally logged to a file."""
+
+    def __init__(self, history=HISTORY, log_path=None):
+        self.log_path = log_path
+        self._requests = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def add(self, request):
+        record = request.record()
+        with self._lock:
+            self._requests.append(record)
+            if self.log_path:
+                try:
+                    with open(self.log_path, 'a') as f:
+                        f.write(json.dumps(record) + '\n')
+                except OSError:
+                    _logger.warning("Failed to write the timing log", exc_info=True)
+
+    def requests(self, page=None):
+        with self._lock:
+            return [record for record in self._requests
+                    if page is None or record['page'] == page]
+
+    def clear(self):
+        with self._lock:
+            self._requests.clear()
+
+
+recorder = Recorder(log_path=LOG_PATH)
+
+if MODE == 'memory':
+    tracemalloc.start()
+
+
+@contextmanager
+def _request(page, inputs):
+    current = Request(page, inputs)
+    _current.request = current
+    start = time.perf_counter()
+    try:
+        yield current
+    except Exception as exc:
+        # Streamlit's st.stop() and reruns are not errors of the request
+        current.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        current.total_ms = (time.perf_counter() - start) * 1000
+        _current.request = None
+        recorder.add(current)
+
+
+def request(page, inputs=()):
+    """Record the stages run in this block as one request of ``page``.
+
+    Inside another request this is a stage of that request instead.
+    """
+    if not ENABLED:
+        return _NULL
+    if getattr(_current, 'request', None) is not None:
+        return _stage(_current.request, page)
+    return _request(page, inputs)
+
+
+@contextmanager
+def _stage(current, name):
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        start_traced = tracemalloc.get_traced_memory()[0]
+    current._path.append(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall_ms = (time.perf_counter() - start) * 1000
+        current._path.pop()
+        alloc_peak_mb = None
+        if tracing:
+            alloc_peak_mb = (tracemalloc.get_traced_memory()[1] - start_traced) / 1024 ** 2
+        current.add_stage(name, wall_ms, alloc_peak_mb)
+
+
+def stage(name):
+    """Time the block as stage ``name`` of the current request; a no-op
+    outside a request."""
+    current = getattr(_current, 'request', None) if ENABLED else None
+    return _NULL if current is None else _stage(current, name)
+
+
+def timed(name):
+    """Decorator form of :func:`stage`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def mark(cache, outcome):
+    """Note whether ``cache`` had what the current request needed
+    ('hit' or 'miss'); the first lookup of a request counts."""
+    current = getattr(_current, 'request', None) if ENABLED else None
+    if current is not None:
+        current.cache.setdefault(cache, outcome)
+
+
+def add_timings(prefix, timings):
+    """Add stages measured elsewhere, e.g. by a background job, as
+    (name, seconds) pairs below the stage ``prefix``."""
+    current = getattr(_current, 'request', None) if ENABLED else None
+    if current is not None:
+        current._path.append(prefix)
+        for name, seconds in timings:
+            current.add_stage(name, seconds * 1000)
+        current._path.pop()
+
+
+def percentiles(page=None, quantiles=(50, 90, 99)):
+    """Wall time percentiles in ms of every stage over the recent requests
+    of ``page`` (default all pages).
+
+    Returns one dict per stage with ``stage``, ``count`` and ``p50`` etc.,
+    the total of the requests coming first.
+    """
+    samples = {'total': []}
+    for record in recorder.requests(page):
+        samples['total'].append(record['total_ms'])
+        for entry in record['stages']:
+            samples.setdefault(entry['stage'], []).append(entry['wall_ms'])
+    rows = []
+    for name, values in samples.items():
+        if values:
+            row = {'stage': name, 'count': len(values)}
+            row.update({f'p{q}': float(value) for q, value
+                        in zip(quantiles, np.percentile(values, quantiles))})
+            rows.append(row)
+    return rows
+
+
+def cache_rates(page=None):
+    """Share of the recent requests of ``page`` that hit each cache."""
+    outcomes = {}
+    for record in recorder.requests(page):
+        for cache, outcome in record['cache'].items():
+            outcomes.setdefault(cache, []).append(outcome == 'hit')
+    return {cache: sum(hits) / len(hits) for cache, hits in outcomes.items()}
+
+
+def performance_panel(page=None):
+    """Collapsible panel with the recent timings of ``page`` (default all
+    pages), for the bottom of a page."""
+    import streamlit as st
+
+    if not ENABLED:
+        return
+    with st.expander("Performance"):
+        requests = recorder.requests(page)
+        if not requests:
+            st.caption("No requests recorded yet")
+            return
+        last = requests[-1]
+        st.caption(f"Last request: {last['total_ms']:.0f} ms"
+                   + (f", failed with {last['error']}" if last['error'] else ""))
+        st.dataframe(last['stages'], hide_index=True)
+        st.caption(f"Percentiles (ms) over the last {len(requests)} requests")
+        st.dataframe(percentiles(page), hide_index=True)
+        rates = cache_rates(page)
+        if rates:
+            st.caption(", ".join(f"{cache} cache hit rate {rate:.0%}"
+                                 for cache, rate in rates.items()))
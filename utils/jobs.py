@@ -0,0 +1,118 @@
+"""Background jobs that outlive a Streamlit script run.
+
+Every widget change stops the running page script and starts it again from
+the top. Work submitted to a :class:`JobRegistry` runs on its own executor
+and keeps going in the meantime; jobs are keyed, so the next run attaches
+to the job in progress instead of starting the same work again.
+
+Code running inside a job reports the stage it is in with :func:`report`.
+This also works from places that know nothing about jobs, such as a log
+handler, since the current job is tracked per thread.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_current = threading.local()
+
+
+def report(stage):
+    """Mark the job running in this thread as being in ``stage``."""
+    job = getattr(_current, 'job', None)
+    if job is not None:
+        job._enter(stage)
+
+
+class Job:
+    """A keyed unit of background work and the stages it went through.
+
+    ``stages`` are the stages the job is expected to pass in order; they
+    only serve to estimate :meth:`progress`. ``timings`` lists the
+    finished stages with their duration in seconds.
+    """
+
+    def __init__(self, key, stages, label):
+        self.key = key
+        self.stages = list(stages)
+        self.label = label
+        self.future = None
+        self.stage = None
+        self.timings = []
+        self.started_at = time.time()
+        self.finished_at = None
+        self._stage_started = self.started_at
+        self._reached = 0  # number of expected stages reached so far
+
+    def _enter(self, stage):
+        if stage == self.stage:
+            return
+        now = time.time()
+        if self.stage is not None:
+            self.timings.append((self.stage, now - self._stage_started))
+        self.stage = stage
+        self._stage_started = now
+        if stage in self.stages:
+            self._reached = max(self._reached, self.stages.index(stage) + 1)
+
+    def _finish(self):
+        self._enter(None)
+        self.finished_at = time.time()
+
+    @property
+    def done(self):
+        return self.future.done()
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.time()) - self.started_at
+
+    def progress(self):
+        """Estimated fraction of the work done, between 0 and 1."""
+        if self.done:
+            return 1.0
+        if not self.stages:
+            return 0.0
+        # A stage counts as half done while it is running
+        return max(self._reached - 0.5, 0) / len(self.stages)
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+
+class JobRegistry:
+    """Runs jobs on a thread pool, at most one per key at a time.
+
+    Finished jobs are dropped from the registry; whoever holds the
+    :class:`Job` can still read its result.
+    """
+
+    def __init__(self, max_workers):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}  # key -> running Job
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, stages=(), label=None):
+        """Run ``fn()`` in the background, or return the job already
+        running under ``key``."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                job = Job(key, stages, label or str(key))
+                self._jobs[key] = job
+                job.future = self._executor.submit(self._run, job, fn)
+            return job
+
+    def _run(self, job, fn):
+        _current.job = job
+        try:
+            return fn()
+        finally:
+            job._finish()
+            _current.job = None
+            with self._lock:
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
+
+    def running(self):
+        with self._lock:
+            return list(self._jobs.values())
@@ -0,0 +1,81 @@
+"""Grouped lap and stint computations shared by the pages.
+
+Each function works on a whole :class:`fastf1.core.Laps` frame in one
+grouped pass instead of picking the laps of one driver at a time.
+"""
+import pandas as pd
+
+SECTORS = ['Sector1Time', 'Sector2Time', 'Sector3Time']
+SEGMENTS = ['Q1', 'Q2', 'Q3']
+
+
+def _valid(laps):
+    # Laps that count: timed and not deleted for track limits
+    return laps.loc[laps['LapTime'].notna() & laps['Deleted'].ne(True)]
+
+
+def fastest_laps(laps):
+    """Fastest lap of every driver, quickest first, with ``LapTimeDelta``
+    to the overall fastest lap.
+
+    Like :meth:`Laps.pick_fastest` only laps marked as personal best are
+    considered.
+    """
+    personal_best = laps.loc[laps['IsPersonalBest'].eq(True) & laps['LapTime'].notna()]
+    if personal_best.empty:
+        raise ValueError("No valid laps found in this session!")
+    best = personal_best.groupby('Driver', sort=False, observed=True)['LapTime'].idxmin()
+    fastest = laps.loc[best.values].sort_values(by='LapTime', kind='stable') \
+        .reset_index(drop=True)
+    fastest['LapTimeDelta'] = fastest['LapTime'] - fastest['LapTime'].iloc[0]
+    return fastest
+
+
+def segment_bests(laps):
+    """Best lap time of every driver in each qualifying segment.
+
+    Returns a frame indexed by driver with one column per segment (Q1, Q2,
+    Q3); drivers knocked out of a segment have no time in the later ones.
+    """
+    segments = laps.split_qualifying_sessions()
+    bests = {
+        name: _valid(segment).groupby('Driver', observed=True)['LapTime'].min()
+        for name, segment in zip(SEGMENTS, segments) if segment is not None
+    }
+    if not bests:
+        raise ValueError("No qualifying segments found in this session!")
+    table = pd.DataFrame(bests).reindex(columns=SEGMENTS)
+    return table.sort_values(by=SEGMENTS[::-1], na_position='last')
+
+
+def ideal_laps(laps):
+    """Ideal lap of every driver built from their best sectors.
+
+    Returns a frame indexed by driver with the best sector times, the
+    ``IdealLapTime`` (their sum), the fastest actual ``LapTime`` and the
+    ``TimeLost`` between the two, ordered by ideal lap time.
+    """
+    valid = _valid(laps)
+    grouped = valid.groupby('Driver', observed=True)
+    table = grouped[SECTORS].min()
+    table['IdealLapTime'] = table[SECTORS].sum(axis=1, min_count=len(SECTORS))
+    table['LapTime'] = grouped['LapTime'].min()
+    table['TimeLost'] = table['LapTime'] - table['IdealLapTime']
+    return table.sort_values(by='IdealLapTime', na_position='last')
+
+
+def stint_table(laps):
+    """One row per stint of every driver with its compound, first and last
+    lap number and length in laps, ordered by driver and stint."""
+    stints = laps.loc[laps['Stint'].notna()].assign(
+        Driver=laps['Driver'].astype(object),
+        Compound=laps['Compound'].astype(object).fillna('UNKNOWN'))
+    table = stints.groupby(['Driver', 'Stint', 'Compound'], sort=False) \
+        .agg(StartLap=('LapNumber', 'min'), EndLap=('LapNumber', 'max'),
+             StintLength=('LapNumber', 'count')) \
+        .reset_index() \
+        .sort_values(by=['Driver', 'Stint', 'StartLap'], kind='stable') \
+        .reset_index(drop=True)
+    table['Stint'] = table['Stint'].astype(int)
+    table[['StartLap', 'EndLap']] = table[['StartLap', 'EndLap']].astype(int)
+    return table
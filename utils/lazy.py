@@ -0,0 +1,39 @@
+"""Deferred imports of heavy modules.
+
+Importing the chart modules pulls in matplotlib, seaborn and the FastF1
+plotting tables, which takes seconds in a fresh process. Pages only need
+them once a button triggers work, so they refer to their chart module
+through :func:`lazy_import`, which imports it on first attribute access::
+
+    tyre = lazy_import('charts.tyre')
+    ...
+    drivers, stints = tyre.prepare(session)  # imported here
+
+:mod:`utils.warmup` imports the same modules ahead of time at server start.
+"""
+import importlib
+import sys
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name):
+        self.__name = name
+        self.__module = None
+
+    def __getattr__(self, attr):
+        module = self.__module
+        if module is None:
+            # importlib serializes concurrent imports of the same module
+            module = self.__module = importlib.import_module(self.__name)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = 'imported' if self.__module is not None else 'not imported'
+        return f"<lazy module '{self.__name}' ({state})>"
+
+
+def lazy_import(name):
+    """``name`` itself if it is imported already, else a :class:`LazyModule`."""
+    return sys.modules.get(name) or LazyModule(name)
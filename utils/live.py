@@ -0,0 +1,404 @@
+"""Live timing: session tables kept up to date from the F1 timing feed.
+
+The live timing feed sends one message per change: a topic such as
+``TimingData`` and a partial update of that topic's nested state, e.g.
+the new lap count and last lap time of one driver. :class:`LiveSession`
+merges the updates into the state and turns the ones that matter into
+rows of three tables, which grow by appending only the new rows:
+
+* ``laps``: one row per completed lap, with lap time, position, compound,
+  stint and tyre age at the end of the lap
+* ``stints``: one row per stint of every driver, shaped like
+  :func:`utils.laps.stint_table`, so that the tyre chart can draw it
+* ``gaps``: the gap to the leader and the interval to the car ahead every
+  time they change
+
+Each table has a version that counts its changes, so that a view only
+redraws when the table it shows has changed.
+
+Messages come from a :class:`LiveFeed`, which reads them on a background
+thread from either
+
+* a recording of FastF1's live timing client
+  (``python -m fastf1.livetiming save live.txt``), followed while the
+  client keeps appending to it, or
+* a websocket that sends one recording line per message, like the replay
+  server in :mod:`utils.replay`.
+"""
+import ast
+import logging
+import os
+import threading
+
+import pandas as pd
+
+DEFAULT_URL = os.environ.get('F1VIZ_LIVE_URL', 'ws://localhost:8765')
+
+# Topics the tables are built from; car data, positions, weather etc. are skipped
+TOPICS = {'SessionInfo', 'DriverList', 'TimingData', 'TimingAppData', 'LapCount'}
+
+LAP_COLUMNS = ['Date', 'Driver', 'DriverNumber', 'Team', 'LapNumber', 'LapTime',
+               'LapTimeSeconds', 'Position', 'Stint', 'Compound', 'TyreLife', 'PitLap']
+STINT_COLUMNS = ['Driver', 'Stint', 'Compound', 'StartLap', 'EndLap', 'StintLength']
+GAP_COLUMNS = ['Date', 'Driver', 'Position', 'GapToLeader', 'Interval']
+
+_logger = logging.getLogger(__name__)
+
+
+def parse_line(line):
+    """(topic, data, timestamp) of a recording line, or None for lines of
+    other topics and lines that cannot be parsed.
+
+    Lines are the ``str()`` of a ``[topic, data, utc]`` list, as FastF1's
+    client writes them.
+    """
+    line = line.strip()
+    if not line.startswith("['") or line.split("'", 2)[1] not in TOPICS:
+        return None
+    try:
+        topic, data, utc = ast.literal_eval(line)
+        return topic, data, pd.Timestamp(utc).tz_localize(None)
+    except (ValueError, SyntaxError, TypeError):
+        return None
+
+
+def parse_time(value):
+    """Seconds of a feed time like ``1:35.123`` or ``+1.234``; NaN for
+    empty values and laps down (``1 L``)."""
+    try:
+        minutes, _, seconds = str(value).lstrip('+').rpartition(':')
+        return (int(minutes) * 60 if minutes else 0) + float(seconds)
+    except ValueError:
+        return float('nan')
+
+
+def _merge(state, update):
+    # Updates change nested dicts in place. Lists arrive as snapshots and
+    # are updated by index later, so they are kept as dicts by index.
+    if isinstance(update, list):
+        update = {str(i): value for i, value in enumerate(update)}
+    for key, value in update.items():
+        if isinstance(value, (dict, list)):
+            if not isinstance(state.get(key), dict):
+                state[key] = {}
+            _merge(state[key], value)
+        else:
+            state[key] = value
+    return state
+
+
+def _value(entry, key):
+    # Some fields are plain values, others {'Value': ...}
+    value = entry.get(key)
+    return value.get('Value') if isinstance(value, dict) else value
+
+
+def _ordered(entries):
+    # Dicts by index in index order
+    return [entries[key] for key in sorted(entries, key=int)]
+
+
+class _Table:
+    """Rows appended by the feed, as a DataFrame built incrementally."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.version = 0
+        self._rows = []
+        self._frame = pd.DataFrame(columns=columns)
+        self._framed = 0  # rows already in the frame
+
+    def append(self, rows):
+        if rows:
+            self._rows.extend(rows)
+            self.version += 1
+
+    def frame(self):
+        if self._framed < len(self._rows):
+            new = pd.DataFrame(self._rows[self._framed:], columns=self.columns)
+            self._frame = new if self._framed == 0 else pd.concat([self._frame, new],
+                                                                  ignore_index=True)
+            self._framed = len(self._rows)
+        return self._frame
+
+
+class LiveSession:
+    """Tables of a session that is still running, updated message by
+    message with :meth:`apply`.
+
+    ``event`` and ``name`` mirror the attributes of a FastF1 session that
+    the chart modules use for titles and compound colours.
+    """
+
+    def __init__(self):
+        self.state = {}  # merged feed state per topic
+        self.event = pd.Series({'EventName': 'Live Session', 'EventDate': pd.Timestamp.now()})
+        self.name = None
+        self.started_at = None
+        self.updated_at = None
+        self._laps = _Table(LAP_COLUMNS)
+        self._gaps = _Table(GAP_COLUMNS)
+        self._stints_version = 0
+        self._stints = None
+        self._completed = {}  # driver number -> laps recorded
+        self._pitted = set()  # driver numbers in or out of the pits this lap
+        self._lock = threading.RLock()
+
+    def apply(self, topic, data, timestamp):
+        """Merge one message into the state and append the rows it
+        completes. Returns the tables that changed."""
+        with self._lock:
+            self.started_at = self.started_at or timestamp
+            self.updated_at = timestamp
+            state = _merge(self.state.setdefault(topic, {}), data)
+            if topic == 'SessionInfo':
+                self._session_info(state)
+            elif topic == 'TimingData':
+                return self._timing(data.get('Lines', {}), timestamp)
+            elif topic == 'TimingAppData':
+                self._stints_version += 1
+                self._stints = None
+                return {'stints'}
+            return set()
+
+    def _session_info(self, info):
+        self.name = info.get('Name', self.name)
+        meeting = info.get('Meeting', {})
+        self.event = pd.Series({
+            'EventName': meeting.get('Name', self.event['EventName']),
+            'EventDate': pd.Timestamp(info['StartDate']) if 'StartDate' in info
+            else self.event['EventDate'],
+        })
+
+    def _timing(self, lines, timestamp):
+        timing = self.state['TimingData'].get('Lines', {})
+        laps, gaps = [], []
+        for number, update in lines.items():
+            line = timing[number]
+            if update.get('InPit') or update.get('PitOut'):
+                self._pitted.add(number)
+            if 'GapToLeader' in update or 'IntervalToPositionAhead' in update:
+                gaps.append([timestamp, self._driver(number)['Tla'],
+                             int(line.get('Position') or 0) or None,
+                             parse_time(line.get('GapToLeader')),
+                             parse_time(_value(line, 'IntervalToPositionAhead'))])
+            completed = int(line.get('NumberOfLaps') or 0)
+            if completed > self._completed.get(number, 0):
+                self._completed[number] = completed
+                laps.append(self._lap_row(number, line, completed, timestamp))
+                self._pitted.discard(number)
+        self._laps.append(laps)
+        self._gaps.append(gaps)
+        return {name for name, rows in (('laps', laps), ('gaps', gaps)) if rows}
+
+    def _driver(self, number):
+        driver = self.state.get('DriverList', {}).get(number, {})
+        return {'Tla': driver.get('Tla', number), 'TeamName': driver.get('TeamName'),
+                'TeamColour': driver.get('TeamColour')}
+
+    def _lap_row(self, number, line, completed, timestamp):
+        driver = self._driver(number)
+        stints = _ordered(self.state.get('TimingAppData', {}).get('Lines', {})
+                          .get(number, {}).get('Stints', {}))
+        stint = stints[-1] if stints else {}
+        seconds = parse_time(_value(line, 'LastLapTime'))
+        return [timestamp, driver['Tla'], number, driver['TeamName'], completed,
+                pd.to_timedelta(seconds, unit='s'), seconds,
+                int(line.get('Position') or 0) or None, len(stints) or None,
+                stint.get('Compound', 'UNKNOWN'), stint.get('TotalLaps'),
+                number in self._pitted or bool(line.get('InPit'))]
+
+    @property
+    def versions(self):
+        with self._lock:
+            return {'laps': self._laps.version, 'stints': self._stints_version,
+                    'gaps': self._gaps.version}
+
+    @property
+    def laps(self):
+        with self._lock:
+            return self._laps.frame()
+
+    @property
+    def gaps(self):
+        with self._lock:
+            return self._gaps.frame()
+
+    @property
+    def stints(self):
+        with self._lock:
+            if self._stints is None:
+                rows = []
+                lines = self.state.get('TimingAppData', {}).get('Lines', {})
+                for number, line in lines.items():
+                    start = 1
+                    for i, stint in enumerate(_ordered(line.get('Stints', {}))):
+                        length = int(stint.get('TotalLaps') or 0) - int(stint.get('StartLaps') or 0)
+                        if length > 0:
+                            rows.append([self._driver(number)['Tla'], i + 1,
+                                         stint.get('Compound', 'UNKNOWN'),
+                                         start, start + length - 1, length])
+                        start += max(length, 0)
+                self._stints = pd.DataFrame(rows, columns=STINT_COLUMNS) \
+                    .sort_values(by=['Driver', 'Stint'], kind='stable').reset_index(drop=True)
+            return self._stints
+
+    def classification(self):
+        """Driver abbreviations in running order."""
+        with self._lock:
+            timing = self.state.get('TimingData', {}).get('Lines', {})
+            drivers = self.state.get('DriverList', {})
+            numbers = set(timing) | {number for number in drivers if number.isdigit()}
+
+            def position(number):
+                value = timing.get(number, {}).get('Position') or drivers.get(number, {}).get('Line')
+                return int(value) if value else 99
+            return [self._driver(number)['Tla'] for number in sorted(numbers, key=position)]
+
+    def team_colors(self):
+        """Team name to hex colour, as sent in the driver list."""
+        with self._lock:
+            return {driver['TeamName']: f"#{driver['TeamColour']}"
+                    for driver in self.state.get('DriverList', {}).values()
+                    if isinstance(driver, dict) and driver.get('TeamName') and driver.get('TeamColour')}
+
+    def lap_count(self):
+        """(current lap, total laps) of the race; (None, None) elsewhere."""
+        with self._lock:
+            count = self.state.get('LapCount', {})
+            return count.get('CurrentLap'), count.get('TotalLaps')
+
+    def standings(self):
+        """One row per driver in running order with the latest gaps and
+        the tyre they are on."""
+        with self._lock:
+            timing = self.state.get('TimingData', {}).get('Lines', {})
+            app = self.state.get('TimingAppData', {}).get('Lines', {})
+            rows = []
+            for number, line in timing.items():
+                stints = _ordered(app.get(number, {}).get('Stints', {}))
+                stint = stints[-1] if stints else {}
+                driver = self._driver(number)
+                rows.append({
+                    'Position': int(line.get('Position') or 0) or None,
+                    'Driver': driver['Tla'],
+                    'Team': driver['TeamName'],
+                    'Laps': int(line.get('NumberOfLaps') or 0),
+                    'GapToLeader': line.get('GapToLeader'),
+                    'Interval': _value(line, 'IntervalToPositionAhead'),
+                    'LastLap': _value(line, 'LastLapTime'),
+                    'Compound': stint.get('Compound'),
+                    'TyreLife': stint.get('TotalLaps'),
+                    'PitStops': line.get('NumberOfPitStops', 0),
+                })
+            table = pd.DataFrame(rows)
+            return table.sort_values(by='Position', kind='stable', ignore_index=True) \
+                if not table.empty else table
+
+
+def recording_lines(path, stop, follow=True, poll=0.5):
+    """Lines of a live timing recording; with ``follow``, also the lines
+    appended later, until ``stop`` is set."""
+    with open(path, 'rb') as f:
+        partial = b''
+        while not stop.is_set():
+            partial += f.readline()
+            if partial.endswith(b'\n'):
+                yield partial.decode()
+                partial = b''
+            elif not follow:
+                if partial:
+                    yield partial.decode()
+                return
+            else:
+                # No complete line yet, wait for the writer
+                stop.wait(poll)
+
+
+def websocket_lines(url, stop, poll=0.5):
+    """Messages of a websocket feed, one recording line each, until the
+    server closes the connection or ``stop`` is set."""
+    from websockets.exceptions import ConnectionClosedOK
+    from websockets.sync.client import connect
+
+    with connect(url) as websocket:
+        while not stop.is_set():
+            try:
+                yield websocket.recv(timeout=poll)
+            except TimeoutError:
+                continue
+            except ConnectionClosedOK:
+                return
+
+
+class LiveFeed:
+    """A live timing source read into a :class:`LiveSession` on a
+    background thread."""
+
+    def __init__(self, source):
+        self.source = source
+        self.session = LiveSession()
+        self.messages = 0
+        self.error = None
+        self.finished = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='live-feed', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def lines(self):
+        if self.source.startswith(('ws://', 'wss://')):
+            return websocket_lines(self.source, self._stop)
+        return recording_lines(self.source, self._stop)
+
+    def _run(self):
+        try:
+            for line in self.lines():
+                message = parse_line(line)
+                if message is not None:
+                    self.session.apply(*message)
+                    self.messages += 1
+        except Exception as exc:
+            _logger.warning("Live feed %s failed", self.source, exc_info=True)
+            self.error = f"{type(exc).__name__}: {exc}"
+        finally:
+            self.finished = True
+
+
+class LiveFeeds:
+    """The feeds of this process by source, shared by all page runs and
+    users, so that a rerun attaches to the feed already running."""
+
+    def __init__(self):
+        self._feeds = {}
+        self._lock = threading.Lock()
+
+    def connect(self, source):
+        """The feed of ``source``, started unless it is running already."""
+        with self._lock:
+            feed = self._feeds.get(source)
+            if feed is None or feed.finished:
+                feed = self._feeds[source] = LiveFeed(source).start()
+            return feed
+
+    def get(self, source):
+        with self._lock:
+            return self._feeds.get(source)
+
+    def disconnect(self, source):
+        with self._lock:
+            feed = self._feeds.pop(source, None)
+        if feed is not None:
+            feed.stop()
+
+
+live_feeds = LiveFeeds()
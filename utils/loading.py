@@ -0,0 +1,41 @@
+"""Session loading with a progress bar for the pages.
+
+The load runs as a background job of :mod:`utils.session_loader`, and the
+page only polls it. When a widget change reruns the page while a session
+is still loading, the load keeps going and the next run attaches to it.
+"""
+import time
+
+import streamlit as st
+
+from utils import instrument, session_loader
+
+POLL_INTERVAL = 0.2  # seconds between progress updates
+
+
+def load_with_progress(year, event, session_type, parts=session_loader.ALL_PARTS):
+    """Like :func:`utils.session_loader.load_session`, showing the loading
+    stage in a progress bar while the session is not cached yet."""
+    session = session_loader.cached_session(year, event, session_type, parts)
+    if session is not None:
+        instrument.mark('session', 'hit')
+        return session
+
+    instrument.mark('session', 'miss')
+    return wait_for(session_loader.load_session_async(year, event, session_type, parts))
+
+
+def wait_for(job):
+    """Result of the background ``job``, showing its stage in a progress
+    bar until it is done. The stages of the job are timed as stages of
+    the current request below 'load'."""
+    with instrument.stage('load'):
+        progress = st.empty()
+        while not job.done:
+            progress.progress(job.progress(),
+                              text=f"Loading {job.label}: {job.stage or 'waiting'} "
+                                   f"({job.elapsed:.0f} s)")
+            time.sleep(POLL_INTERVAL)
+        progress.empty()
+    instrument.add_timings('load', job.timings)
+    return job.result()
@@ -0,0 +1,158 @@
+"""Lap time analytics shared by the pace pages.
+
+:func:`session_pace` computes in one vectorized pass over all laps of a
+session:
+
+* lap times in seconds and fuel-corrected lap times (race and sprint
+  sessions only, other sessions are not corrected)
+* quick lap flags relative to the session best and to each driver's best,
+  matching :meth:`fastf1.core.Laps.pick_quicklaps` on the whole session
+  and on the laps of a single driver
+* a least squares fit of fuel-corrected lap time over tyre age for every
+  stint, from grouped sums instead of one fit per stint
+* a pooled degradation slope per compound
+
+The result is memoized per session object, so the pages that show the same
+session share a single computation.
+"""
+import threading
+import weakref
+
+import pandas as pd
+from fastf1.core import Laps
+
+# Fuel load at the start of a race and lap time cost of the fuel mass
+START_FUEL_KG = 110.0
+FUEL_EFFECT_S_PER_KG = 0.03
+
+# Stints need this many quick laps for a degradation fit
+MIN_FIT_LAPS = 3
+
+FUEL_CORRECTED_SESSIONS = ('Race', 'Sprint')
+
+_COLUMNS = ['Driver', 'DriverNumber', 'Team', 'LapNumber', 'Stint', 'Compound',
+            'TyreLife', 'LapTime']
+
+
+def fuel_correction(lap_number, total_laps):
+    """Lap time in seconds that the remaining fuel costs on ``lap_number``."""
+    remaining = START_FUEL_KG * (1 - (lap_number - 1) / total_laps)
+    return remaining.clip(lower=0) * FUEL_EFFECT_S_PER_KG
+
+
+def _fit(frame, keys, x, y):
+    # Least squares line y = intercept + slope * x for every group, from
+    # grouped sums of x, y, x² and xy
+    grouped = frame.assign(_x=x, _y=y, _xx=x * x, _xy=x * y).groupby(keys)
+    n = grouped.size()
+    sums = grouped[['_x', '_y', '_xx', '_xy']].sum()
+    sx, sy, sxx, sxy = sums['_x'], sums['_y'], sums['_xx'], sums['_xy']
+    denominator = n * sxx - sx * sx
+    slope = (n * sxy - sx * sy) / denominator.where(denominator > 0)
+    slope = slope.where(n >= MIN_FIT_LAPS)
+    intercept = (sy - slope * sx) / n
+    return slope, intercept
+
+
+class PaceAnalysis:
+    """Precomputed pace columns and stint statistics of one session.
+
+    ``laps`` has one row per timed lap with the columns ``LapTimeSeconds``,
+    ``FuelCorrectedSeconds``, ``IsQuickLap`` and ``IsDriverQuickLap``
+    added; ``stints`` and ``compounds`` are described at
+    :func:`analyze_laps`.
+    """
+
+    def __init__(self, laps, stints, compounds, fuel_corrected):
+        self.laps = laps
+        self.stints = stints
+        self.compounds = compounds
+        self.fuel_corrected = fuel_corrected
+
+    def quick_laps(self, drivers=None, per_driver=False):
+        """Quick laps of ``drivers`` (default all), relative to each
+        driver's best lap if ``per_driver`` else to the session best."""
+        mask = self.laps['IsDriverQuickLap' if per_driver else 'IsQuickLap']
+        if drivers is not None:
+            mask &= self.laps['Driver'].isin(drivers)
+        return self.laps.loc[mask]
+
+
+def analyze_laps(laps, fuel_corrected=True):
+    """Pace analysis of ``laps`` (a whole session).
+
+    ``stints`` has one row per driver and stint with the compound, the lap
+    range, the number of quick laps, mean and median fuel-corrected pace,
+    and the ``Degradation`` slope (seconds per lap of tyre age) with its
+    ``Intercept``. ``compounds`` has the pooled degradation slope of every
+    compound, fitted within stints so that differences in pace between
+    drivers do not count as degradation.
+    """
+    timed = laps.loc[laps['LapTime'].notna(), _COLUMNS]
+    if timed.empty:
+        raise ValueError("No timed laps found in this session!")
+    timed = pd.DataFrame(timed).reset_index(drop=True)
+    # Plain strings, so that the plots only see the drivers, teams and
+    # compounds present in the analysed laps
+    for column in ('Driver', 'Team', 'Compound'):
+        timed[column] = timed[column].astype(object)
+    timed['Compound'] = timed['Compound'].fillna('UNKNOWN')
+
+    seconds = timed['LapTime'].dt.total_seconds()
+    timed['LapTimeSeconds'] = seconds
+    if fuel_corrected:
+        correction = fuel_correction(timed['LapNumber'], timed['LapNumber'].max())
+        timed['FuelCorrectedSeconds'] = seconds - correction
+    else:
+        timed['FuelCorrectedSeconds'] = seconds
+    timed['IsQuickLap'] = seconds < seconds.min() * Laps.QUICKLAP_THRESHOLD
+    timed['IsDriverQuickLap'] = \
+        seconds < timed.groupby('Driver')['LapTimeSeconds'].transform('min') * Laps.QUICKLAP_THRESHOLD
+
+    # Stint fits on quick laps with a known tyre age
+    quick = timed.loc[timed['IsQuickLap'] & timed['TyreLife'].notna() & timed['Stint'].notna()]
+    keys = ['Driver', 'Stint']
+    x = quick['TyreLife'].to_numpy(dtype=float)
+    y = quick['FuelCorrectedSeconds'].to_numpy()
+    slope, intercept = _fit(quick, keys, x, y)
+
+    grouped = timed.loc[timed['Stint'].notna()].groupby(keys)
+    stints = grouped.agg(Team=('Team', 'first'), Compound=('Compound', 'first'),
+                         StartLap=('LapNumber', 'min'), EndLap=('LapNumber', 'max'))
+    pace = quick.groupby(keys)['FuelCorrectedSeconds']
+    stints['QuickLaps'] = pace.count().reindex(stints.index, fill_value=0)
+    stints['MeanPace'] = pace.mean()
+    stints['MedianPace'] = pace.median()
+    stints['Degradation'] = slope
+    stints['Intercept'] = intercept
+    stints = stints.reset_index()
+    stints[['Stint', 'StartLap', 'EndLap']] = stints[['Stint', 'StartLap', 'EndLap']].astype(int)
+
+    # Pooled slope per compound on stint-demeaned tyre age and lap time
+    stint_means = quick.groupby(keys)[['TyreLife', 'FuelCorrectedSeconds']].transform('mean')
+    dx = x - stint_means['TyreLife'].to_numpy(dtype=float)
+    dy = y - stint_means['FuelCorrectedSeconds'].to_numpy()
+    pooled = pd.DataFrame({'Compound': quick['Compound'].to_numpy(), 'dxdy': dx * dy, 'dxdx': dx * dx}) \
+        .groupby('Compound')[['dxdy', 'dxdx']].sum()
+    compounds = pd.DataFrame({
+        'Degradation': pooled['dxdy'] / pooled['dxdx'].where(pooled['dxdx'] > 0),
+        'Laps': quick.groupby('Compound').size(),
+        'Stints': stints.loc[stints['QuickLaps'] > 0].groupby('Compound').size(),
+    }).rename_axis('Compound').reset_index()
+
+    return PaceAnalysis(timed, stints, compounds, fuel_corrected)
+
+
+_analyses = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def session_pace(session):
+    """Memoized :func:`analyze_laps` of a session with laps loaded."""
+    with _lock:
+        analysis = _analyses.get(session)
+    if analysis is None:
+        analysis = analyze_laps(session.laps, session.name in FUEL_CORRECTED_SESSIONS)
+        with _lock:
+            analysis = _analyses.setdefault(session, analysis)
+    return analysis
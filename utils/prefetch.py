@@ -0,0 +1,255 @@
+"""Warm-up of the session cache ahead of traffic.
+
+Race weekends send most users to the same few sessions, and a cold
+``session.load()`` is the slowest thing a page does. The scheduler loads
+the sessions of the latest race weekend (practice, sprint, qualifying and
+race, as far as they have taken place) plus a configurable list of
+popular sessions through the shared session loader, so that they end up
+in the in-memory cache, the on-disk session store and the FastF1 cache.
+
+It runs as a background thread of the Streamlit app (set F1VIZ_PREFETCH=1)
+or as a separate process that fills the disk caches::
+
+    python -m utils.prefetch --popular "2023:Monaco Grand Prix:R" --top 5
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fastf1
+import pandas as pd
+
+from utils import session_loader
+from utils.schedule import calendar_index
+from utils.session_loader import LAPS_AND_TELEMETRY
+
+# What the pages need most: laps, telemetry for the track maps and race
+# control messages for deleted laps
+DEFAULT_PARTS = LAPS_AND_TELEMETRY | {'messages'}
+DEFAULT_WORKERS = 2
+DEFAULT_DISK_BUDGET_MB = 20 * 1024
+DEFAULT_INTERVAL = 3600
+
+_logger = logging.getLogger(__name__)
+
+
+def latest_weekend(now=None):
+    """Sessions of the latest race weekend that have started by ``now``.
+
+    Returns (year, round, session name) tuples in the order they were held.
+    """
+    now = pd.Timestamp.now(tz='UTC').tz_localize(None) if now is None else now
+    for year in (now.year, now.year - 1):
+        events = calendar_index.get(year).events
+        started = events.loc[events['Session1DateUtc'] <= now]
+        if started.empty:
+            continue
+        event = started.iloc[-1]
+        return [
+            (year, int(event['RoundNumber']), event[f'Session{i}'])
+            for i in range(1, 6)
+            if event[f'Session{i}'] and event[f'Session{i}DateUtc'] <= now
+        ]
+    return []
+
+
+def parse_session(spec):
+    """Parse a ``year:event:session`` spec; the event may be a round number."""
+    year, event, session_type = spec.split(':')
+    return int(year), int(event) if event.isdigit() else event, session_type
+
+
+def popular_sessions():
+    """Popular sessions from F1VIZ_PREFETCH_POPULAR (comma separated
+    ``year:event:session`` specs)."""
+    specs = os.environ.get('F1VIZ_PREFETCH_POPULAR', '').split(',')
+    return [parse_session(spec.strip()) for spec in specs if spec.strip()]
+
+
+def disk_usage(paths):
+    """Total size in bytes of all files below ``paths``."""
+    total = 0
+    for path in paths:
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+    return total
+
+
+def cache_dirs():
+    """Directories the warm-up writes to: the FastF1 cache and the store."""
+    dirs = []
+    store = getattr(session_loader.source, 'store', None)
+    if store is not None:
+        dirs.append(store.root)
+    fastf1_dir, _ = fastf1.Cache.get_cache_info()
+    if fastf1_dir and not any(os.path.abspath(fastf1_dir).startswith(os.path.abspath(d) + os.sep)
+                              for d in dirs):
+        # Not counted twice when it is inside the session store
+        dirs.append(fastf1_dir)
+    return dirs
+
+
+class PrefetchScheduler:
+    """Loads a list of sessions with bounded concurrency and disk usage.
+
+    Progress can be read at any time through :meth:`status`, also while
+    :meth:`run` is still working in another thread.
+    """
+
+    def __init__(self, parts=DEFAULT_PARTS, workers=DEFAULT_WORKERS,
+                 disk_budget=DEFAULT_DISK_BUDGET_MB * 1024 ** 2, top=None):
+        self.parts = frozenset(parts)
+        self.workers = workers
+        self.disk_budget = disk_budget
+        self.top = top
+        self._lock = threading.Lock()
+        self._planned = []
+        self._running = set()
+        self._done = []
+        self._failed = []  # (session, error message)
+        self._skipped = []
+        self._finished_at = None
+
+    def plan(self, popular=(), weekend=True):
+        """Latest weekend first, then the first ``top`` popular sessions
+        (``popular`` followed by F1VIZ_PREFETCH_POPULAR)."""
+        sessions = []
+        if weekend:
+            try:
+                sessions += latest_weekend()
+            except Exception as exc:
+                _logger.warning("Could not read the event schedule: %s", exc)
+        for session in (list(popular) + popular_sessions())[:self.top]:
+            if session not in sessions:
+                sessions.append(session)
+        return sessions
+
+    def _warm(self, session):
+        if disk_usage(cache_dirs()) > self.disk_budget:
+            with self._lock:
+                self._skipped.append(session)
+            return
+        with self._lock:
+            self._running.add(session)
+        try:
+            session_loader.load_session(*session, parts=self.parts)
+        except Exception as exc:
+            _logger.warning("Prefetching %s failed: %s", session, exc)
+            with self._lock:
+                self._failed.append((session, str(exc)))
+        else:
+            with self._lock:
+                self._done.append(session)
+        finally:
+            with self._lock:
+                self._running.discard(session)
+
+    def run(self, sessions=None):
+        """Warm ``sessions`` (by default :meth:`plan`) and wait for them."""
+        sessions = self.plan() if sessions is None else list(sessions)
+        with self._lock:
+            self._planned = sessions
+            self._done, self._failed, self._skipped = [], [], []
+            self._finished_at = None
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(self._warm, sessions))
+        with self._lock:
+            self._finished_at = time.time()
+        return self.status()
+
+    def status(self):
+        with self._lock:
+            return {
+                'planned': len(self._planned),
+                'done': list(self._done),
+                'running': sorted(self._running, key=str),
+                'failed': list(self._failed),
+                'skipped': list(self._skipped),
+                'finished_at': self._finished_at,
+            }
+
+
+_background = None
+_background_lock = threading.Lock()
+
+
+def start_background(interval=DEFAULT_INTERVAL, **kwargs):
+    """Start the warm-up thread once per process and return its scheduler.
+
+    The plan is refreshed every ``interval`` seconds, so sessions of a
+    weekend in progress are picked up as they take place.
+    """
+    global _background
+    with _background_lock:
+        if _background is None:
+            scheduler = PrefetchScheduler(**kwargs)
+
+            def loop():
+                while True:
+                    scheduler.run()
+                    time.sleep(interval)
+
+            threading.Thread(target=loop, name='prefetch', daemon=True).start()
+            _background = scheduler
+        return _background
+
+
+def background_scheduler():
+    """The running background scheduler, or None."""
+    return _background
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Warm the session caches for the latest weekend and popular sessions.")
+    parser.add_argument('--popular', nargs='*', default=[],
+                        help="extra year:event:session specs (added to F1VIZ_PREFETCH_POPULAR)")
+    parser.add_argument('--top', type=int, default=None,
+                        help="only warm the first N popular sessions")
+    parser.add_argument('--no-weekend', action='store_true',
+                        help="skip the sessions of the latest weekend")
+    parser.add_argument('--parts', nargs='+', default=sorted(DEFAULT_PARTS),
+                        choices=['laps', 'telemetry', 'weather', 'messages'],
+                        help="data parts to load (default: laps messages telemetry)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="sessions loaded at the same time")
+    parser.add_argument('--disk-budget', type=int, default=DEFAULT_DISK_BUDGET_MB,
+                        help="stop warming once the caches use this many MB")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    scheduler = PrefetchScheduler(args.parts, args.workers,
+                                  args.disk_budget * 1024 ** 2, args.top)
+    sessions = scheduler.plan([parse_session(spec) for spec in args.popular],
+                              weekend=not args.no_weekend)
+
+    done = threading.Event()
+
+    def report():
+        while not done.wait(5):
+            status = scheduler.status()
+            print(f"{len(status['done'])}/{status['planned']} warmed, "
+                  f"{len(status['failed'])} failed, loading {status['running']}")
+
+    threading.Thread(target=report, daemon=True).start()
+    status = scheduler.run(sessions)
+    done.set()
+
+    for session in status['done']:
+        print(f"warmed  {session}")
+    for session, error in status['failed']:
+        print(f"failed  {session}: {error}")
+    for session in status['skipped']:
+        print(f"skipped {session}: disk budget exceeded")
+    return 1 if status['failed'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,197 @@
+"""Replay server for recorded live timing.
+
+Streams a live timing recording over a websocket, one recording line per
+message, with the delays between the messages of the recorded session
+divided by ``--speed``. Every client gets its own replay from the start.
+The live page connects to it like to a live feed, so live mode can be
+tried and tested without a session running or network access::
+
+    python -m utils.replay live.txt --speed 20
+    python -m utils.replay --record 2023 Bahrain R --output bahrain.txt
+    python -m utils.replay --record 2023 1 R --fixtures --output fixture.txt
+
+Recordings come from FastF1's live timing client
+(``python -m fastf1.livetiming save live.txt``). ``--record`` writes one
+from the laps of a finished session instead: the driver list, the stints,
+and one timing update per completed lap with position and gaps, which is
+what the live tables are built from.
+"""
+import argparse
+import logging
+import time
+
+import pandas as pd
+
+from utils import session_loader
+from utils.session_loader import LAPS_ONLY
+
+DEFAULT_HOST = 'localhost'
+DEFAULT_PORT = 8765
+DEFAULT_SPEED = 10.0
+
+_logger = logging.getLogger(__name__)
+
+
+def _utc(timestamp):
+    return timestamp.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def _lap_time(td):
+    seconds = td.total_seconds()
+    return f"{int(seconds // 60)}:{seconds % 60:06.3f}"
+
+
+def session_messages(session):
+    """Live timing messages (topic, data, timestamp) that replay the laps
+    of a loaded session, in time order."""
+    t0 = session.t0_date
+    laps = session.laps.loc[session.laps['Time'].notna()].assign(
+        DriverNumber=session.laps['DriverNumber'].astype(str),
+        Compound=session.laps['Compound'].astype(object).fillna('UNKNOWN'),
+    ).sort_values(by='Time', kind='stable')
+
+    # Gaps at the line: to the first and the previous car completing the lap
+    by_lap = laps.sort_values(by=['LapNumber', 'Time']).groupby('LapNumber')['Time']
+    gap = (laps['Time'] - by_lap.transform('min')).dt.total_seconds()
+    interval = by_lap.diff().reindex(laps.index).dt.total_seconds()
+
+    results = session.results
+    start = t0
+    yield 'SessionInfo', {
+        'Meeting': {'Name': session.event['EventName']},
+        'Name': session.name,
+        'StartDate': str(session.date),
+    }, start
+    yield 'DriverList', {
+        str(row.DriverNumber): {'RacingNumber': str(row.DriverNumber), 'Tla': row.Abbreviation,
+                                'TeamName': row.TeamName, 'TeamColour': row.TeamColor,
+                                'Line': i + 1}
+        for i, row in enumerate(results.itertuples())
+    }, start
+    yield 'TimingData', {'Lines': {
+        str(number): {'NumberOfLaps': 0, 'Position': str(i + 1), 'InPit': False}
+        for i, number in enumerate(results['DriverNumber'])
+    }}, start
+
+    stints = {}  # driver number -> stint numbers sent
+    total_laps = int(laps['LapNumber'].max()) if not laps.empty else None
+    leader_lap = 0
+    for lap, gap_seconds, interval_seconds in zip(laps.itertuples(), gap, interval):
+        number = lap.DriverNumber
+        date = t0 + lap.Time
+        sent = stints.setdefault(number, [])
+        tyre_life = int(lap.TyreLife) if pd.notna(lap.TyreLife) else int(lap.LapNumber)
+        if pd.notna(lap.Stint) and lap.Stint not in sent:
+            # New set of tyres, fitted with the age it had before this lap
+            sent.append(lap.Stint)
+            start_laps = tyre_life - 1
+            yield 'TimingAppData', {'Lines': {number: {'Stints': {str(len(sent) - 1): {
+                'Compound': lap.Compound, 'New': str(bool(lap.FreshTyre)).lower(),
+                'StartLaps': start_laps, 'TotalLaps': start_laps,
+            }}}}}, date
+        if sent:
+            yield 'TimingAppData', {'Lines': {number: {'Stints': {str(len(sent) - 1): {
+                'TotalLaps': tyre_life}}}}}, date
+        update = {
+            'NumberOfLaps': int(lap.LapNumber),
+            'InPit': pd.notna(lap.PitInTime),
+            'PitOut': pd.notna(lap.PitOutTime),
+            'NumberOfPitStops': max(len(sent) - 1, 0),
+            'GapToLeader': '' if gap_seconds == 0 else f"+{gap_seconds:.3f}",
+            'IntervalToPositionAhead': {
+                'Value': '' if pd.isna(interval_seconds) else f"+{interval_seconds:.3f}"},
+        }
+        if pd.notna(lap.LapTime):
+            update['LastLapTime'] = {'Value': _lap_time(lap.LapTime)}
+        if pd.notna(lap.Position):
+            update['Position'] = str(int(lap.Position))
+        yield 'TimingData', {'Lines': {number: update}}, date
+        if lap.LapNumber > leader_lap:
+            leader_lap = int(lap.LapNumber)
+            yield 'LapCount', {'CurrentLap': leader_lap, 'TotalLaps': total_laps}, date
+
+
+def record_session(session, path):
+    """Write a recording of ``session`` in the format of FastF1's live
+    timing client; returns the number of messages."""
+    count = 0
+    with open(path, 'w') as f:
+        for topic, data, timestamp in session_messages(session):
+            f.write(str([topic, data, _utc(timestamp)]) + '\n')
+            count += 1
+    return count
+
+
+def read_recording(path):
+    """(delay in seconds since the previous message, line) pairs of a
+    recording."""
+    from utils.live import parse_line
+
+    previous = None
+    with open(path) as f:
+        for line in f:
+            message = parse_line(line)
+            if message is None:
+                continue
+            timestamp = message[2]
+            delay = 0 if previous is None else max((timestamp - previous).total_seconds(), 0)
+            previous = timestamp
+            yield delay, line.rstrip('\n')
+
+
+def serve(path, host=DEFAULT_HOST, port=DEFAULT_PORT, speed=DEFAULT_SPEED):
+    """Serve ``path`` to every client that connects until interrupted."""
+    from websockets.exceptions import ConnectionClosed
+    from websockets.sync.server import serve as websocket_server
+
+    messages = list(read_recording(path))
+
+    def replay(websocket):
+        _logger.info("Replaying %d messages to %s", len(messages), websocket.remote_address)
+        try:
+            for delay, line in messages:
+                if delay:
+                    time.sleep(delay / speed)
+                websocket.send(line)
+        except ConnectionClosed:
+            return
+
+    with websocket_server(replay, host, port) as server:
+        _logger.info("Replay of %s at %sx on ws://%s:%d", path, speed, host, port)
+        server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('recording', nargs='?', help="live timing recording to replay")
+    parser.add_argument('--speed', type=float, default=DEFAULT_SPEED,
+                        help=f"replay speed-up (default: {DEFAULT_SPEED:g})")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--record', nargs=3, metavar=('YEAR', 'EVENT', 'SESSION'),
+                        help="write a recording of a finished session instead")
+    parser.add_argument('--output', help="recording to write with --record")
+    parser.add_argument('--fixtures', action='store_true',
+                        help="record a synthetic session, without network access")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    if args.record:
+        if not args.output:
+            parser.error("--record needs --output")
+        if args.fixtures:
+            from utils.fixtures import FixtureSource
+            session_loader.use_source(FixtureSource())
+        year, event, session_type = args.record
+        event = int(event) if event.isdigit() else event
+        session = session_loader.load_session(int(year), event, session_type, LAPS_ONLY)
+        count = record_session(session, args.output)
+        print(f"Wrote {count} messages to {args.output}")
+    elif args.recording:
+        serve(args.recording, args.host, args.port, args.speed)
+    else:
+        parser.error("give a recording to replay or --record")
+
+
+if __name__ == '__main__':
+    main()
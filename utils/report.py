@@ -0,0 +1,457 @@
+"""Static reports of race weekends, rendered without Streamlit.
+
+Renders the charts of every page for a matrix of seasons, rounds and
+sessions with the same ``charts`` modules the pages use, and writes each
+figure as PNG and/or SVG together with the tables the pages show, as CSV::
+
+    python -m utils.report --years 2023 --sessions Q R --output reports
+    python -m utils.report --years 2023 --rounds 1 2 --formats svg --workers 8
+
+Output goes to ``<output>/<year>/<round>_<session>/``. Sessions are
+rendered in a process pool, one session per task, so every session is
+loaded once for all of its charts. ``manifest.json`` in the output
+directory records the files and the load, prepare, plot and render time
+of every chart. A chart whose files exist and whose fingerprint matches
+the manifest is up to date and is not rendered again; a session with only
+up to date charts is not even loaded. The fingerprint covers the code of
+the chart module and of the ``utils`` modules it uses, the formats, and,
+with a session store, the stored frames the chart is drawn from.
+"""
+import argparse
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import pyplot as plt
+import pandas as pd
+
+from charts import (
+    compare,
+    driverdist,
+    driverstanding,
+    gearshift,
+    laptime,
+    laptimestyling,
+    positions,
+    quali,
+    session as session_chart,
+    speedvis,
+    teampace,
+    tyre,
+)
+from utils import session_loader
+from utils.figure_cache import SAVEFIG_OPTIONS
+from utils.schedule import calendar_index
+from utils.session_loader import LAPS_AND_TELEMETRY, LAPS_ONLY
+
+DEFAULT_OUTPUT_DIR = 'reports'
+DEFAULT_FORMATS = ['png']
+DEFAULT_SESSIONS = ['Q', 'R']
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Drivers shown by the telemetry comparison, like the page default
+COMPARE_DRIVERS = 3
+
+RACES = ('R', 'S')
+ALL_SESSIONS = ('FP1', 'FP2', 'FP3', 'SQ', 'SS', 'S', 'Q', 'R')
+QUALIFYING = ('Q', 'SQ', 'SS')
+
+_logger = logging.getLogger(__name__)
+
+
+class Context:
+    """What the charts of a session need besides the session itself."""
+
+    def __init__(self, session):
+        self.year = session.event.year
+        self.race = session.event['EventName']
+        # Drivers in classification order; the first one is the reference
+        # for the single driver charts
+        self.drivers = session.results['Abbreviation'].dropna().tolist()
+        self.driver = self.drivers[0] if self.drivers else None
+
+
+class Chart:
+    """A page's chart: the sessions it applies to, the data parts it needs,
+    and its prepare, plot and table steps.
+
+    ``plot`` returns one figure or a dict of figures by name, ``tables``
+    a dict of DataFrames by name.
+    """
+
+    def __init__(self, name, module, sessions, parts, prepare, plot=None, tables=None):
+        self.name = name
+        self.module = module
+        self.sessions = sessions
+        self.parts = parts
+        self.prepare = prepare
+        self.plot = plot
+        self.tables = tables
+
+    def fingerprint(self, formats, frames=None):
+        return fingerprint(self.module, formats, frames)
+
+
+def dependencies(module):
+    """``module`` and the ``utils`` modules it uses, directly or through
+    each other, by name."""
+    found = {}
+    pending = [module]
+    while pending:
+        current = pending.pop()
+        if current.__name__ in found:
+            continue
+        found[current.__name__] = current
+        for value in vars(current).values():
+            name = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+            if isinstance(name, str) and name.startswith('utils.') and name in sys.modules:
+                pending.append(sys.modules[name])
+    return found
+
+
+@functools.lru_cache(maxsize=None)
+def _code_digest(module):
+    digest = hashlib.sha1()
+    for name, dependency in sorted(dependencies(module).items()):
+        with open(dependency.__file__, 'rb') as f:
+            digest.update(name.encode() + f.read())
+    return digest.hexdigest()
+
+
+def fingerprint(module, formats=(), frames=None):
+    """Hash of the code behind a chart module, the output formats and the
+    modification times of the stored ``frames`` it is drawn from."""
+    data = repr((sorted(formats), sorted((frames or {}).items())))
+    return hashlib.sha1((_code_digest(module) + data).encode()).hexdigest()
+
+
+def stored_frames(session, parts):
+    """Modification times of the stored frames of ``parts`` of ``session``,
+    None without a session store. ``session`` is a loaded session or a
+    (year, round, session type) tuple."""
+    store = getattr(session_loader.source, 'store', None)
+    if store is None:
+        return None
+    if isinstance(session, tuple):
+        session = store.open_session(*session)
+        if session is None:
+            return {}
+    return store.frame_times(session, parts)
+
+
+def _final_order(timeline):
+    return {'order': positions.standings_after(timeline, int(timeline['LapNumber'].max()))}
+
+
+def _quali_tables(session):
+    segment_bests, ideal_laps = quali.summary(session)
+    return {'segment_bests': segment_bests, 'ideal_laps': ideal_laps}
+
+
+CHARTS = {chart.name: chart for chart in [
+    Chart('compare', compare, ALL_SESSIONS, LAPS_AND_TELEMETRY,
+          lambda s, c: compare.prepare(s, c.drivers[:COMPARE_DRIVERS]),
+          lambda s, data, c: {'compare': compare.plot(s, data, c.driver, c.year),
+                              'compare_dominance': compare.plot_dominance(s, data, c.year)}),
+    Chart('driverdist', driverdist, ALL_SESSIONS, LAPS_ONLY,
+          lambda s, c: driverdist.prepare(s),
+          lambda s, data, c: driverdist.plot(s, *data, c.year)),
+    Chart('gearshift', gearshift, ALL_SESSIONS, LAPS_AND_TELEMETRY,
+          lambda s, c: gearshift.prepare(s, c.driver),
+          lambda s, data, c: gearshift.plot(s, data, c.driver)),
+    Chart('laptime', laptime, ALL_SESSIONS, LAPS_ONLY,
+          lambda s, c: laptime.prepare(s, c.driver),
+          lambda s, data, c: laptime.plot(s, data, c.driver, c.year, c.race),
+          lambda s, data, c: {'stints': laptime.stint_summary(s, c.driver)}),
+    Chart('laptimestyling', laptimestyling, ALL_SESSIONS, LAPS_ONLY,
+          lambda s, c: laptimestyling.prepare(s),
+          lambda s, data, c: laptimestyling.plot(s, data, warn=_logger.warning)),
+    Chart('positions', positions, RACES, LAPS_ONLY,
+          lambda s, c: positions.prepare(s),
+          lambda s, data, c: positions.plot(s, data, c.year),
+          lambda s, data, c: _final_order(data)),
+    Chart('quali', quali, QUALIFYING, LAPS_ONLY | {'messages'},
+          lambda s, c: quali.prepare(s),
+          lambda s, data, c: quali.plot(s, *data),
+          lambda s, data, c: _quali_tables(s)),
+    Chart('session', session_chart, ALL_SESSIONS, LAPS_ONLY,
+          lambda s, c: session_chart.prepare(s),
+          tables=lambda s, data, c: {'laps': data}),
+    Chart('speedvis', speedvis, ALL_SESSIONS, LAPS_AND_TELEMETRY,
+          lambda s, c: speedvis.prepare(s, c.driver),
+          lambda s, data, c: speedvis.plot(s, data, c.driver, c.year)),
+    Chart('teampace', teampace, ALL_SESSIONS, LAPS_ONLY,
+          lambda s, c: teampace.prepare(s),
+          lambda s, data, c: teampace.plot(s, *data, c.year),
+          lambda s, data, c: {'degradation': teampace.degradation(s)}),
+    Chart('tyre', tyre, ALL_SESSIONS, LAPS_ONLY,
+          lambda s, c: tyre.prepare(s),
+          lambda s, data, c: tyre.plot(s, *data, c.year, c.race),
+          lambda s, data, c: {'stints': data[1]}),
+]}
+
+
+def session_dir(output_dir, year, rnd, session_type):
+    return os.path.join(output_dir, str(year), f"{rnd:02d}_{session_type}")
+
+
+def _write_table(table, path):
+    table.to_csv(path, index=not isinstance(table.index, pd.RangeIndex))
+
+
+def render_chart(chart, session, context, directory, formats):
+    """Render ``chart`` of a loaded session into ``directory``; returns the
+    written files and the time of every step in seconds."""
+    timings = {}
+    files = []
+
+    start = time.perf_counter()
+    data = chart.prepare(session, context)
+    timings['prepare'] = time.perf_counter() - start
+
+    if chart.plot is not None:
+        start = time.perf_counter()
+        figures = chart.plot(session, data, context)
+        if not isinstance(figures, dict):
+            figures = {chart.name: figures}
+        timings['plot'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for name, fig in figures.items():
+            try:
+                for fmt in formats:
+                    path = os.path.join(directory, f"{name}.{fmt}")
+                    fig.savefig(path, format=fmt, **SAVEFIG_OPTIONS)
+                    files.append(path)
+            finally:
+                plt.close(fig)
+        timings['render'] = time.perf_counter() - start
+
+    if chart.tables is not None:
+        start = time.perf_counter()
+        for name, table in chart.tables(session, data, context).items():
+            path = os.path.join(directory, f"{chart.name}_{name}.csv")
+            _write_table(table, path)
+            files.append(path)
+        timings['tables'] = time.perf_counter() - start
+    return files, timings
+
+
+def render_session(year, rnd, session_type, names, output_dir, formats):
+    """Load one session and render the charts ``names`` of it.
+
+    Returns the manifest entry of the session; a chart that fails is
+    recorded with its error and does not stop the others.
+    """
+    charts = [CHARTS[name] for name in names]
+    parts = frozenset().union(*(chart.parts for chart in charts))
+    directory = session_dir(output_dir, year, rnd, session_type)
+    os.makedirs(directory, exist_ok=True)
+
+    start = time.perf_counter()
+    session = session_loader.load_session(year, rnd, session_type, parts)
+    entry = {'session': f"{session.event['EventName']} {year} {session.name}",
+             'load_s': time.perf_counter() - start, 'charts': {}}
+    context = Context(session)
+
+    for chart in charts:
+        try:
+            files, timings = render_chart(chart, session, context, directory, formats)
+        except Exception as exc:
+            _logger.warning("%s of %s failed: %s", chart.name, entry['session'], exc)
+            entry['charts'][chart.name] = {'status': 'failed', 'error': str(exc)}
+            continue
+        entry['charts'][chart.name] = {
+            'status': 'rendered',
+            'fingerprint': chart.fingerprint(formats, stored_frames(session, chart.parts)),
+            'files': [os.path.relpath(path, output_dir) for path in files],
+            'timings': timings,
+        }
+    # The session is not needed by this worker anymore
+    session_loader.session_cache.clear()
+    return entry
+
+
+def render_standings(year, output_dir, table=None):
+    """Driver standings heatmap of ``year`` as HTML plus the points table.
+
+    Plotly figures need extra packages for static images, so the heatmap
+    is written as a standalone HTML page.
+    """
+    from utils.standings import standings_table
+
+    if table is None:
+        table = standings_table
+        table.update([year])
+    start = time.perf_counter()
+    heatmap = table.heatmap([year])
+    fig = driverstanding.plot(heatmap)
+    directory = os.path.join(output_dir, str(year))
+    os.makedirs(directory, exist_ok=True)
+    fig.write_html(os.path.join(directory, 'driverstanding.html'))
+    _write_table(heatmap, os.path.join(directory, 'driverstanding_points.csv'))
+    return {
+        'status': 'rendered',
+        'fingerprint': fingerprint(driverstanding),
+        'files': [os.path.join(str(year), 'driverstanding.html'),
+                  os.path.join(str(year), 'driverstanding_points.csv')],
+        'timings': {'render': time.perf_counter() - start},
+    }
+
+
+def _up_to_date(previous, digest, output_dir):
+    return (previous is not None and previous.get('status') == 'rendered'
+            and previous.get('fingerprint') == digest
+            and all(os.path.exists(os.path.join(output_dir, path)) for path in previous['files']))
+
+
+def plan(years, session_types, rounds=None, charts=None):
+    """(year, round, session type, chart names) of every session to report
+    on; only sessions that have taken place are included."""
+    tasks = []
+    for year in years:
+        calendar = calendar_index.get(year)
+        for session_type in session_types:
+            names = [name for name, chart in CHARTS.items()
+                     if session_type in chart.sessions and (charts is None or name in charts)]
+            for rnd in calendar.held_rounds(session_type):
+                if names and (rounds is None or rnd in rounds):
+                    tasks.append((year, rnd, session_type, names))
+    return tasks
+
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return {'sessions': {}, 'seasons': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, 'manifest.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def _init_worker(source):
+    session_loader.use_source(source)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Render the charts of every page for a matrix of sessions.")
+    parser.add_argument('--years', type=int, nargs='+', required=True)
+    parser.add_argument('--rounds', type=int, nargs='+',
+                        help="round numbers (default: every round held so far)")
+    parser.add_argument('--sessions', nargs='+', default=DEFAULT_SESSIONS,
+                        choices=ALL_SESSIONS, help="session types (default: Q R)")
+    parser.add_argument('--charts', nargs='+', choices=list(CHARTS) + ['driverstanding'],
+                        help="charts to render (default: all)")
+    parser.add_argument('--formats', nargs='+', default=DEFAULT_FORMATS,
+                        choices=['png', 'svg'])
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="sessions rendered at the same time")
+    parser.add_argument('--no-standings', action='store_true',
+                        help="skip the season standings heatmaps")
+    parser.add_argument('--force', action='store_true',
+                        help="render charts that are up to date as well")
+    parser.add_argument('--fixtures', action='store_true',
+                        help="render synthetic sessions, without network access")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+    if args.fixtures:
+        from utils.fixtures import FixtureSource
+        session_loader.use_source(FixtureSource())
+
+    os.makedirs(args.output, exist_ok=True)
+    manifest = load_manifest(args.output)
+    rounds = set(args.rounds) if args.rounds else None
+
+    # Only charts that are not up to date are rendered
+    tasks = []
+    skipped = 0
+    for year, rnd, session_type, names in plan(args.years, args.sessions, rounds, args.charts):
+        previous = manifest['sessions'].get(f"{year}/{rnd:02d}_{session_type}", {}).get('charts', {})
+        stale = [name for name in names if args.force
+                 or not _up_to_date(previous.get(name), CHARTS[name].fingerprint(
+                     args.formats, stored_frames((year, rnd, session_type), CHARTS[name].parts)),
+                     args.output)]
+        skipped += len(names) - len(stale)
+        if stale:
+            tasks.append((year, rnd, session_type, stale))
+
+    failed = 0
+    start = time.perf_counter()
+    if tasks:
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(tasks)),
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker,
+                                 initargs=(session_loader.source,)) as pool:
+            futures = {pool.submit(render_session, year, rnd, session_type, names,
+                                   args.output, args.formats): (year, rnd, session_type)
+                       for year, rnd, session_type, names in tasks}
+            for future in as_completed(futures):
+                year, rnd, session_type = futures[future]
+                key = f"{year}/{rnd:02d}_{session_type}"
+                try:
+                    entry = future.result()
+                except Exception as exc:
+                    print(f"failed   {key}: {exc}")
+                    failed += 1
+                    continue
+                # Charts rendered earlier and not part of this run stay listed
+                known = manifest['sessions'].get(key, {}).get('charts', {})
+                entry['charts'] = {**known, **entry['charts']}
+                manifest['sessions'][key] = entry
+                errors = [name for name, chart in entry['charts'].items()
+                          if chart['status'] == 'failed']
+                failed += len(errors)
+                print(f"rendered {key} ({entry['session']}) in {entry['load_s']:.1f} s load"
+                      + (f", failed: {', '.join(errors)}" if errors else ""))
+                save_manifest(args.output, manifest)
+
+    if not args.no_standings and (args.charts is None or 'driverstanding' in args.charts):
+        for year in args.years:
+            # Standings of a finished season do not change anymore
+            previous = manifest['seasons'].get(str(year), {}).get('driverstanding')
+            if (not args.force and year < pd.Timestamp.now().year
+                    and _up_to_date(previous, fingerprint(driverstanding), args.output)):
+                skipped += 1
+                continue
+            try:
+                if args.fixtures:
+                    from utils.fixtures import make_standings_results
+                    from utils.standings import StandingsTable
+                    table = StandingsTable(engine=None)
+                    table.add_results(year, make_standings_results(year))
+                    entry = render_standings(year, args.output, table)
+                else:
+                    entry = render_standings(year, args.output)
+            except Exception as exc:
+                print(f"failed   {year} standings: {exc}")
+                entry = {'status': 'failed', 'error': str(exc)}
+                failed += 1
+            manifest['seasons'][str(year)] = {'driverstanding': entry}
+
+    manifest['generated'] = pd.Timestamp.now(tz='UTC').isoformat()
+    save_manifest(args.output, manifest)
+    print(f"{sum(len(names) for *_, names in tasks)} charts of {len(tasks)} sessions "
+          f"rendered in {time.perf_counter() - start:.1f} s, {skipped} up to date, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,194 @@
+"""Season calendars shared by all pages.
+
+The event schedule of a season is fetched at most once per process through
+the session source of :mod:`utils.session_loader` and kept in memory. With
+a session store configured it is also written to
+``<store>/calendar/<year>.parquet``, so a restart does not fetch it again
+either. Past seasons never change; the schedule of the current season is
+refreshed after ``SCHEDULE_TTL`` seconds and the previous copy is kept if
+that refresh fails.
+
+A :class:`SeasonCalendar` answers what the page dropdowns ask: the events
+of a season, an event by round number, name or approximate name, and the
+sessions that are held at an event.
+"""
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+from rapidfuzz import utils as fuzz_utils
+
+from utils import instrument, session_loader
+
+FIRST_SEASON = 2018
+SCHEDULE_TTL = 6 * 3600
+FUZZY_CUTOFF = 75
+
+# Session identifiers by session name
+SESSION_IDENTIFIERS = {
+    'Practice 1': 'FP1',
+    'Practice 2': 'FP2',
+    'Practice 3': 'FP3',
+    'Sprint Shootout': 'SS',
+    'Sprint Qualifying': 'SQ',
+    'Sprint': 'S',
+    'Qualifying': 'Q',
+    'Race': 'R',
+}
+
+_COLUMNS = ['RoundNumber', 'Country', 'Location', 'EventName', 'EventDate', 'EventFormat'] + [
+    column for i in range(1, 6) for column in (f'Session{i}', f'Session{i}DateUtc')]
+
+_logger = logging.getLogger(__name__)
+
+
+def _events(schedule):
+    # The columns the index needs, without testing events; local session
+    # times have mixed offsets and are left out
+    events = pd.DataFrame(schedule)
+    events = events.loc[events['RoundNumber'] > 0, _COLUMNS].reset_index(drop=True)
+    events['RoundNumber'] = events['RoundNumber'].astype(int)
+    for i in range(1, 6):
+        events[f'Session{i}'] = events[f'Session{i}'].fillna('').astype(str)
+        events[f'Session{i}DateUtc'] = pd.to_datetime(events[f'Session{i}DateUtc'])
+    return events
+
+
+class SeasonCalendar:
+    """Events of one season, indexed by round number."""
+
+    def __init__(self, year, events):
+        self.year = year
+        self.events = events.set_index('RoundNumber', drop=False)
+        self._search = (events['EventName'] + ' ' + events['Country'] + ' '
+                        + events['Location']).set_axis(self.events.index).to_dict()
+
+    def event_names(self):
+        return self.events['EventName'].tolist()
+
+    def rounds(self):
+        return self.events.index.tolist()
+
+    def event(self, event):
+        """Event by round number, by name or by an approximate name."""
+        if isinstance(event, (int, np.integer)):
+            if event not in self.events.index:
+                raise ValueError(f"There is no round {event} in the {self.year} season!")
+            return self.events.loc[event]
+        match = self.events.loc[self.events['EventName'].str.lower() == event.lower()]
+        if not match.empty:
+            return match.iloc[0]
+        return self.find(event)
+
+    def find(self, query, cutoff=FUZZY_CUTOFF):
+        """Event whose name, country or location matches ``query`` best."""
+        result = process.extractOne(query, self._search, scorer=fuzz.WRatio,
+                                    processor=fuzz_utils.default_process, score_cutoff=cutoff)
+        if result is None:
+            raise ValueError(f"No event of the {self.year} season matches '{query}'!")
+        return self.events.loc[result[2]]
+
+    def round_number(self, event):
+        return int(self.event(event)['RoundNumber'])
+
+    def session_types(self, event, choices=None):
+        """Identifiers of the sessions held at ``event``, in weekend order or
+        restricted to and ordered like ``choices``."""
+        row = self.event(event)
+        held = [SESSION_IDENTIFIERS[row[f'Session{i}']] for i in range(1, 6)
+                if row[f'Session{i}'] in SESSION_IDENTIFIERS]
+        return held if choices is None else [s for s in choices if s in held]
+
+    def held_rounds(self, session_type, before=None):
+        """Rounds at which ``session_type`` was held before ``before``
+        (default now, UTC)."""
+        before = pd.Timestamp.now(tz='UTC').tz_localize(None) if before is None else before
+        rounds = []
+        for rnd, row in self.events.iterrows():
+            for i in range(1, 6):
+                if (SESSION_IDENTIFIERS.get(row[f'Session{i}']) == session_type
+                        and row[f'Session{i}DateUtc'] < before):
+                    rounds.append(rnd)
+        return rounds
+
+
+class CalendarIndex:
+    """Season calendars, fetched at most once per season and process."""
+
+    def __init__(self, ttl=SCHEDULE_TTL):
+        self.ttl = ttl
+        self._calendars = {}  # year -> (SeasonCalendar, fetched at)
+        self._fetching = {}  # year -> lock held while the season is fetched
+        self._lock = threading.Lock()
+
+    def seasons(self):
+        return list(range(FIRST_SEASON, pd.Timestamp.now().year + 1))
+
+    def _fresh(self, year, fetched_at):
+        return year < pd.Timestamp.now().year or time.time() - fetched_at < self.ttl
+
+    def _path(self, year):
+        store = getattr(session_loader.source, 'store', None)
+        if store is None:
+            return None
+        return os.path.join(store.root, 'calendar', f'{year}.parquet')
+
+    def get(self, year):
+        """Calendar of ``year``; concurrent callers share a single fetch."""
+        with self._lock:
+            entry = self._calendars.get(year)
+            fetching = self._fetching.setdefault(year, threading.Lock())
+        if entry is not None and self._fresh(year, entry[1]):
+            return entry[0]
+
+        with fetching:
+            with self._lock:
+                entry = self._calendars.get(year)
+            if entry is None or not self._fresh(year, entry[1]):
+                entry = self._load(year, entry)
+                with self._lock:
+                    self._calendars[year] = entry
+            return entry[0]
+
+    def _load(self, year, previous):
+        path = self._path(year)
+        if path and os.path.exists(path):
+            stored = (SeasonCalendar(year, pd.read_parquet(path)), os.path.getmtime(path))
+            if self._fresh(year, stored[1]):
+                return stored
+            previous = previous or stored
+
+        try:
+            with instrument.request('schedule', (year,)):
+                events = _events(session_loader.source.get_event_schedule(year))
+        except Exception as exc:
+            if previous is None:
+                raise
+            _logger.warning("Could not refresh the %s schedule, keeping the "
+                            "previous one: %s", year, exc)
+            return previous[0], time.time()
+
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                events.to_parquet(path + '.tmp')
+                os.replace(path + '.tmp', path)
+            except OSError:
+                _logger.warning("Failed to store the %s schedule", year, exc_info=True)
+        return SeasonCalendar(year, events), time.time()
+
+    def clear(self):
+        with self._lock:
+            self._calendars.clear()
+
+
+calendar_index = CalendarIndex()
+
+
+def season_calendar(year):
+    """Cached calendar of the ``year`` season."""
+    return calendar_index.get(year)
@@ -0,0 +1,274 @@
+"""Pace of teams and drivers over a whole season.
+
+Comparing pace across a season does not need every session in memory at
+once. Each session is reduced to a few pace statistics per team and per
+driver (:func:`reduce_session`), and only these reductions are merged.
+
+:class:`SeasonBatch` loads the sessions that are not reduced yet in a
+process pool that is started with the first batch and kept for the later
+ones, each task using the session source of the app. Reductions
+are kept in memory and, with a session store configured, also written to
+``<store>/season/<year>/<round>_<session>.parquet``, so a season is only
+loaded once. Sessions that are already cached by this process are reduced
+in place instead.
+"""
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import pandas as pd
+
+from utils import jobs, session_loader
+from utils.pace import session_pace
+from utils.session_loader import LAPS_ONLY
+
+# Worker processes loading sessions for a batch
+DEFAULT_BATCH_WORKERS = min(4, os.cpu_count() or 1)
+
+COLUMNS = ['Year', 'Round', 'Event', 'Session', 'Kind', 'Name', 'Team', 'Color',
+           'Laps', 'Median', 'Q1', 'Q3', 'IQR', 'Delta', 'DeltaPct']
+
+_logger = logging.getLogger(__name__)
+
+# Serializes the swaps of __main__ while pool workers are started
+_spawn_lock = threading.Lock()
+
+
+def reduce_session(session, fuel_corrected=False):
+    """Pace statistics of every team and driver in ``session``.
+
+    One row per team (``Kind`` 'team') and per driver ('driver') with the
+    number of quick laps, the median, quartiles and interquartile range of
+    their lap times and the gap of the median to the fastest median of the
+    same kind, in seconds (``Delta``) and percent (``DeltaPct``).
+    """
+    # Imported here, so that the pages do not load the plotting tables
+    # before a season is requested
+    import fastf1.plotting
+
+    pace = session_pace(session)
+    laps = pace.quick_laps()
+    column = 'FuelCorrectedSeconds' if fuel_corrected and pace.fuel_corrected else 'LapTimeSeconds'
+    colors = {team: fastf1.plotting.get_team_color(team, session=session)
+              for team in laps['Team'].unique()}
+
+    frames = []
+    for kind, keys in (('team', ['Team']), ('driver', ['Driver', 'Team'])):
+        grouped = laps.groupby(keys)[column]
+        stats = pd.DataFrame({
+            'Laps': grouped.size(),
+            'Median': grouped.median(),
+            'Q1': grouped.quantile(0.25),
+            'Q3': grouped.quantile(0.75),
+        }).reset_index()
+        stats['Kind'] = kind
+        stats['Name'] = stats[keys[0]]
+        frames.append(stats)
+    table = pd.concat(frames, ignore_index=True)
+
+    fastest = table.groupby('Kind')['Median'].transform('min')
+    table['IQR'] = table['Q3'] - table['Q1']
+    table['Delta'] = table['Median'] - fastest
+    table['DeltaPct'] = table['Delta'] / fastest * 100
+    table['Color'] = table['Team'].map(colors)
+    table['Year'] = session.event.year
+    table['Round'] = int(session.event['RoundNumber'])
+    table['Event'] = session.event['EventName']
+    table['Session'] = session.name
+    return table[COLUMNS]
+
+
+@contextmanager
+def _plain_main():
+    # Streamlit runs the page script as the __main__ module, and spawned
+    # workers import __main__ again. Workers started in this block see an
+    # empty one instead, since they only need this module.
+    main = sys.modules['__main__']
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main
+
+
+def _start_pool(max_workers):
+    # Spawned workers, since forking a process that runs threads
+    # (Streamlit, background loads) is not safe
+    pool = ProcessPoolExecutor(max_workers=max_workers,
+                               mp_context=multiprocessing.get_context('spawn'))
+    # The pool starts a worker for every task submitted while none is
+    # idle, so these start all of them at once, with __main__ swapped
+    with _spawn_lock, _plain_main():
+        for _ in range(max_workers):
+            pool.submit(os.getpid)
+    return pool
+
+
+def _load_and_reduce(source, year, rnd, session_type, fuel_corrected):
+    # Runs in a worker process; the session is dropped once reduced
+    session = source.get_session(year, rnd, session_type)
+    source.load(session, LAPS_ONLY)
+    return reduce_session(session, fuel_corrected)
+
+
+def season_summary(table, kind='team'):
+    """One row per team (or driver) of the merged reductions ``table``,
+    ordered by the median gap to the fastest over all sessions."""
+    rows = table.loc[table['Kind'] == kind]
+    grouped = rows.groupby('Name')
+    summary = pd.DataFrame({
+        'Team': grouped['Team'].last(),
+        'Sessions': grouped.size(),
+        'Fastest': grouped['Delta'].apply(lambda delta: int((delta == 0).sum())),
+        'MedianDeltaPct': grouped['DeltaPct'].median(),
+        'MeanDeltaPct': grouped['DeltaPct'].mean(),
+        'MedianIQR': grouped['IQR'].median(),
+    })
+    if kind == 'team':
+        summary = summary.drop(columns='Team')
+    summary.index.name = kind.capitalize()
+    return summary.sort_values('MedianDeltaPct').round(3)
+
+
+class SeasonBatch:
+    """Per session pace reductions of whole seasons."""
+
+    def __init__(self, max_workers=DEFAULT_BATCH_WORKERS):
+        self.max_workers = max_workers
+        self._reductions = {}  # (year, round, session type, fuel corrected) -> DataFrame
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = _start_pool(self.max_workers)
+            return self._pool
+
+    def _discard(self, pool):
+        # A worker died, e.g. out of memory; the next batch starts a new pool
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _path(self, key):
+        store = getattr(session_loader.source, 'store', None)
+        if store is None:
+            return None
+        year, rnd, session_type, fuel_corrected = key
+        name = f"{rnd:02d}_{session_type}{'_fuel' if fuel_corrected else ''}.parquet"
+        return os.path.join(store.root, 'season', str(year), name)
+
+    def _cached(self, key):
+        with self._lock:
+            table = self._reductions.get(key)
+        path = self._path(key)
+        if table is None and path and os.path.exists(path):
+            table = pd.read_parquet(path)
+            with self._lock:
+                self._reductions[key] = table
+        return table
+
+    def _store(self, key, table):
+        with self._lock:
+            self._reductions[key] = table
+        path = self._path(key)
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                table.to_parquet(path + '.tmp', index=False)
+                os.replace(path + '.tmp', path)
+            except OSError:
+                _logger.warning("Failed to store the reduction of %s", key, exc_info=True)
+
+    def season(self, year, session_type, rounds, fuel_corrected=False, on_error=None):
+        """Merged reductions of ``session_type`` at ``rounds`` of ``year``.
+
+        Missing reductions are computed in the process pool of the batch. A
+        session that fails is skipped and reported through
+        ``on_error(round, exc)``.
+        """
+        tables = {}
+        missing = []
+        for rnd in rounds:
+            key = (year, rnd, session_type, fuel_corrected)
+            table = self._cached(key)
+            if table is None:
+                session = session_loader.cached_session(year, rnd, session_type, LAPS_ONLY)
+                if session is not None:
+                    table = reduce_session(session, fuel_corrected)
+                    self._store(key, table)
+            if table is None:
+                missing.append(rnd)
+            else:
+                tables[rnd] = table
+
+        if missing:
+            jobs.report(f"{len(tables)}/{len(rounds)} sessions")
+            pool = self._executor()
+            source = session_loader.source
+            try:
+                futures = {pool.submit(_load_and_reduce, source, year, rnd, session_type,
+                                       fuel_corrected): rnd
+                           for rnd in missing}
+            except BrokenProcessPool:
+                self._discard(pool)
+                raise
+            for future in as_completed(futures):
+                rnd = futures[future]
+                try:
+                    table = future.result()
+                except Exception as exc:
+                    if isinstance(exc, BrokenProcessPool):
+                        self._discard(pool)
+                    if on_error is not None:
+                        on_error(rnd, exc)
+                    continue
+                self._store((year, rnd, session_type, fuel_corrected), table)
+                tables[rnd] = table
+                jobs.report(f"{len(tables)}/{len(rounds)} sessions")
+
+        if not tables:
+            return pd.DataFrame(columns=COLUMNS)
+        return pd.concat([tables[rnd] for rnd in sorted(tables)], ignore_index=True)
+
+    def submit(self, year, session_type, rounds, fuel_corrected=False):
+        """Start :meth:`season` as a background job and return the
+        :class:`utils.jobs.Job`. Its result is the merged table and a list
+        of (round, error) of the sessions that failed."""
+        rounds = tuple(rounds)
+
+        def run():
+            failed = []
+            table = self.season(year, session_type, rounds, fuel_corrected,
+                                on_error=lambda rnd, exc: failed.append((rnd, exc)))
+            return table, failed
+
+        return session_loader.load_jobs.submit(
+            ('season', year, session_type, rounds, fuel_corrected), run,
+            stages=[f"{i}/{len(rounds)} sessions" for i in range(1, len(rounds) + 1)],
+            label=f"{year} {session_type} season",
+        )
+
+    def clear(self):
+        with self._lock:
+            self._reductions.clear()
+
+    def close(self):
+        """Shut down the process pool; a later batch starts a new one."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+
+season_batch = SeasonBatch(
+    int(os.environ.get('F1VIZ_BATCH_WORKERS', DEFAULT_BATCH_WORKERS))
+)
@@ -0,0 +1,362 @@
+"""Process-wide FastF1 session loader shared by all pages.
+
+Loaded sessions are kept in memory so that switching between pages for the
+same race does not parse the session again. The cache is bounded by a memory
+budget and evicts the least recently used sessions first. Concurrent requests
+for a session that is still loading wait for that single load instead of
+starting their own.
+
+Pages load through :func:`load_session_async` (see :mod:`utils.loading`),
+which runs the load as a background job that survives reruns of the page
+and reports the loading stage FastF1 is in.
+"""
+import logging
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import fastf1
+
+from utils import jobs
+from utils.compact import compact_session
+from utils.session_store import default_fastf1_cache_dir, default_store, fastf1_load
+
+# Memory budget for cached sessions, configurable through the environment
+DEFAULT_MEMORY_BUDGET_MB = 2048
+
+# Sessions loaded in the background at the same time
+DEFAULT_LOAD_WORKERS = 4
+
+# Compact dtypes for loaded laps and telemetry (see utils.compact), set
+# F1VIZ_COMPACT=0 to keep FastF1's own dtypes
+COMPACT = os.environ.get('F1VIZ_COMPACT', '1') != '0'
+
+_logger = logging.getLogger(__name__)
+
+
+def estimate_session_size(session):
+    """Approximate memory footprint of a loaded session in bytes."""
+    size = 0
+    for name in ('_laps', '_results', '_weather_data', '_race_control_messages',
+                 '_session_status', '_track_status'):
+        frame = getattr(session, name, None)
+        if frame is not None:
+            size += int(frame.memory_usage(deep=True).sum())
+    for name in ('_car_data', '_pos_data'):
+        for frame in getattr(session, name, {}).values():
+            size += int(frame.memory_usage(deep=True).sum())
+    return size
+
+
+# Data parts a page can ask the loader for. Driver results are always loaded
+# by FastF1, so an empty set means "results only".
+RESULTS_ONLY = frozenset()
+LAPS_ONLY = frozenset({'laps'})
+LAPS_AND_TELEMETRY = frozenset({'laps', 'telemetry'})
+ALL_PARTS = frozenset({'laps', 'telemetry', 'weather', 'messages'})
+
+# Loading stages in the order FastF1 runs them, and the data part each
+# stage belongs to
+LOAD_STAGES = [('results', None), ('timing data', 'laps'), ('telemetry', 'telemetry'),
+               ('weather', 'weather'), ('messages', 'messages')]
+
+# FastF1 log messages that start a loading stage
+_STAGE_MESSAGES = [
+    ('session info', 'results'),
+    ('driver list', 'results'),
+    ('session status', 'timing data'),
+    ('lap count', 'timing data'),
+    ('track status', 'timing data'),
+    ('timing', 'timing data'),
+    ('car data', 'telemetry'),
+    ('position data', 'telemetry'),
+    ('weather data', 'weather'),
+    ('race control messages', 'messages'),
+]
+
+
+def load_stages(parts):
+    """Stages a load of ``parts`` goes through."""
+    return [stage for stage, part in LOAD_STAGES if part is None or part in parts]
+
+
+class _StageHandler(logging.Handler):
+    # Turns FastF1 progress messages into stages of the job loading the
+    # session; messages from threads without a job are ignored
+    def emit(self, record):
+        message = record.getMessage()
+        if not message.startswith(('Fetching', 'Loading', 'Processing')):
+            return
+        for text, stage in _STAGE_MESSAGES:
+            if text in message:
+                jobs.report(stage)
+                return
+
+
+logging.getLogger('fastf1').addHandler(_StageHandler(logging.INFO))
+
+
+class FastF1Source:
+    """Loads sessions through the FastF1 API.
+
+    Parts that are already in the on-disk session store are restored from
+    there; only the remaining parts are parsed by FastF1 and then written
+    back to the store. Processes sharing the store load each session once
+    (see :meth:`utils.session_store.SessionStore.load`).
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+
+    def get_session(self, year, event, session_type):
+        return fastf1.get_session(year, event, session_type)
+
+    def get_event_schedule(self, year):
+        return fastf1.get_event_schedule(year, include_testing=False)
+
+    def load(self, session, parts):
+        if self.store:
+            jobs.report('session store')
+            self.store.load(session, parts)
+        else:
+            fastf1_load(session, parts)
+
+
+class _Entry:
+    __slots__ = ('session', 'parts', 'size')
+
+    def __init__(self, session, parts, size):
+        self.session = session
+        self.parts = parts
+        self.size = size
+
+
+class SessionCache:
+    """LRU cache of loaded sessions bounded by an approximate memory budget.
+
+    Each session is cached once together with the data parts loaded so far.
+    A request for parts that are not loaded yet upgrades the cached session
+    in place instead of loading it again from scratch.
+    """
+
+    def __init__(self, memory_budget):
+        self.memory_budget = memory_budget
+        self.memory_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.upgrades = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()  # key -> _Entry
+        self._pending = {}  # key -> Future of an in-flight load or upgrade
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, parts, create, load):
+        parts = frozenset(parts)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                future = self._pending.get(key)
+                if future is None:
+                    if entry is not None and parts <= entry.parts:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return entry.session
+                    future = Future()
+                    self._pending[key] = future
+                    if entry is None:
+                        self.misses += 1
+                    else:
+                        self.upgrades += 1
+                    break
+                # Someone else is already loading this session, wait for it
+                # and check again whether it covers the parts we need
+                self.coalesced += 1
+            future.result()
+
+        try:
+            if entry is None:
+                session = create()
+                load(session, parts)
+            else:
+                session = entry.session
+                load(session, parts - entry.parts)
+                parts = parts | entry.parts
+        except BaseException as exc:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(exc)
+            raise
+
+        size = estimate_session_size(session)
+        with self._lock:
+            del self._pending[key]
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.memory_used -= previous.size
+            self._entries[key] = _Entry(session, parts, size)
+            self.memory_used += size
+            self._evict()
+        future.set_result(session)
+        return session
+
+    def peek(self, key, parts):
+        """Cached session of ``key`` if it has ``parts`` loaded, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or key in self._pending or not parts <= entry.parts:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.session
+
+    def _evict(self):
+        # Always keep the most recently used session, even if it alone
+        # exceeds the budget
+        while self.memory_used > self.memory_budget and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self.memory_used -= entry.size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.memory_used = 0
+
+    def entries(self):
+        """(key, session, parts, size in bytes) of the cached sessions,
+        least recently used first."""
+        with self._lock:
+            return [(key, entry.session, entry.parts, entry.size)
+                    for key, entry in self._entries.items()]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._entries),
+                'memory_used_mb': self.memory_used / 1024 ** 2,
+                'memory_budget_mb': self.memory_budget / 1024 ** 2,
+                'hits': self.hits,
+                'misses': self.misses,
+                'upgrades': self.upgrades,
+                'evictions': self.evictions,
+                'coalesced': self.coalesced,
+            }
+
+
+session_cache = SessionCache(
+    int(os.environ.get('F1VIZ_SESSION_CACHE_MB', DEFAULT_MEMORY_BUDGET_MB)) * 1024 ** 2
+)
+
+
+load_jobs = jobs.JobRegistry(
+    int(os.environ.get('F1VIZ_LOAD_WORKERS', DEFAULT_LOAD_WORKERS))
+)
+
+# FastF1's cache of raw API responses, in the session store unless
+# configured otherwise, so that all processes using the store share it
+_fastf1_cache_dir = default_fastf1_cache_dir()
+if _fastf1_cache_dir:
+    os.makedirs(_fastf1_cache_dir, exist_ok=True)
+    fastf1.Cache.enable_cache(_fastf1_cache_dir)
+
+# Where sessions come from; replaced by an offline source for benchmarks
+source = FastF1Source(default_store())
+
+# Pages name the same session differently (event name or round number,
+# 'Q' or 'Qualifying'), so cache entries are keyed by season, round and
+# session name and the page inputs are mapped onto that key
+_aliases = {}
+
+
+def session_key(session):
+    """Cache key of ``session``: season, round number and session name."""
+    return session.event.year, int(session.event['RoundNumber']), session.name
+
+
+def use_source(new_source):
+    """Serve sessions from ``new_source`` and drop all cached sessions."""
+    global source
+    source = new_source
+    _aliases.clear()
+    session_cache.clear()
+
+
+# Laps and telemetry memory of every compacted session: (bytes with FastF1's
+# dtypes, bytes after compaction)
+_compaction = weakref.WeakKeyDictionary()
+
+
+def _compacting(load):
+    def compact_load(session, parts):
+        load(session, parts)
+        if COMPACT:
+            before, after = compact_session(session)
+            # Frames compacted by an earlier load count with their raw size
+            raw, compacted = _compaction.get(session, (0, 0))
+            _compaction[session] = (raw + before - compacted, after)
+    return compact_load
+
+
+def store_stats():
+    """Statistics of the session store shared between processes, or None
+    if the current source has no store."""
+    store = getattr(source, 'store', None)
+    return store.index.stats() if store is not None else None
+
+
+def session_report():
+    """Memory of every cached session, most recently used first."""
+    rows = []
+    for key, session, parts, size in reversed(session_cache.entries()):
+        raw, compacted = _compaction.get(session, (None, None))
+        rows.append({
+            'session': ' '.join(map(str, key)),
+            'parts': ', '.join(sorted(parts)) or 'results',
+            'size_mb': size / 1024 ** 2,
+            'laps_telemetry_raw_mb': raw / 1024 ** 2 if raw is not None else None,
+            'laps_telemetry_compact_mb': compacted / 1024 ** 2 if compacted is not None else None,
+        })
+    return rows
+
+
+def load_session(year, event, session_type, parts=ALL_PARTS):
+    """Return a FastF1 session with at least ``parts`` loaded.
+
+    Sessions are shared through the process-wide cache; a cached session
+    that lacks some of the requested parts is upgraded in place.
+    """
+    current = source
+    session = None
+    key = _aliases.get((year, event, session_type))
+    if key is None:
+        # Resolving the session only reads the event schedule
+        session = current.get_session(year, event, session_type)
+        key = _aliases.setdefault((year, event, session_type), session_key(session))
+    return session_cache.get_or_load(
+        key, parts,
+        lambda: session if session is not None
+        else current.get_session(year, event, session_type),
+        _compacting(current.load)
+    )
+
+
+def cached_session(year, event, session_type, parts=ALL_PARTS):
+    """The session if it is cached with ``parts`` loaded, without loading."""
+    key = _aliases.get((year, event, session_type))
+    return None if key is None else session_cache.peek(key, frozenset(parts))
+
+
+def load_session_async(year, event, session_type, parts=ALL_PARTS):
+    """Start :func:`load_session` as a background job and return the
+    :class:`utils.jobs.Job`; a load of the same session and parts that is
+    still running is returned instead of starting another one."""
+    parts = frozenset(parts)
+    return load_jobs.submit(
+        ('session', year, event, session_type, parts),
+        lambda: load_session(year, event, session_type, parts),
+        stages=load_stages(parts),
+        label=f"{year} {event} {session_type}",
+    )
@@ -0,0 +1,389 @@
+"""Columnar on-disk store for loaded FastF1 session data.
+
+FastF1's own cache only keeps the raw API responses, so every new process
+still has to parse them into laps and telemetry frames again. This store
+keeps the parsed frames as Parquet files, partitioned by season, round and
+session, and memory-maps them back into a session object on later runs.
+
+Several processes can share one store, e.g. replicas of the app behind a
+load balancer: :meth:`SessionStore.load` lets only one of them load a
+session while the others wait and then read what it stored, and a
+retention policy bounds the size and age of the stored sessions (see
+:mod:`utils.store_index`). FastF1's cache of raw API responses lives in
+the store directory as well, so one F1VIZ_STORE_DIR on a shared volume
+configures both. The retention policy does not cover that cache: it is
+FastF1's own and grows without bound, usually larger than the stored
+sessions. Set F1VIZ_FASTF1_CACHE to keep it elsewhere, or clear it with
+``fastf1.Cache.clear_cache``.
+
+Layout::
+
+    <root>/<year>/<round>/<session>/meta.json
+                                   /results.parquet
+                                   /laps.parquet, session_status.parquet, ...
+                                   /car_data.parquet, pos_data.parquet
+    <root>/index.sqlite
+    <root>/fastf1/
+
+The store can be pre-built for a range of seasons from the command line::
+
+    python -m utils.session_store --start 2018 --end 2023 --sessions R Q
+"""
+import argparse
+import json
+import logging
+import os
+
+import fastf1
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastf1.core import Laps, Session, SessionResults, Telemetry
+from fastf1.events import Event
+
+from utils.store_index import StoreIndex
+
+DEFAULT_STORE_DIR = 'session_store'
+
+# Retention of the stored sessions, 0 for no limit
+DEFAULT_MAX_MB = 0
+DEFAULT_MAX_AGE_DAYS = 0
+
+# Session attributes written for each loadable data part
+PART_FRAMES = {
+    'laps': ('_laps', '_session_status', '_track_status'),
+    'weather': ('_weather_data',),
+    'messages': ('_race_control_messages',),
+}
+TELEMETRY_FRAMES = ('_car_data', '_pos_data')
+LOADABLE_PARTS = ('laps', 'telemetry', 'weather', 'messages')
+
+_logger = logging.getLogger(__name__)
+
+
+def _seconds(value):
+    return None if value is None or pd.isna(value) else value.total_seconds()
+
+
+def _timedelta(value):
+    return None if value is None else pd.Timedelta(seconds=value)
+
+
+def fastf1_load(session, parts):
+    """Load ``parts`` of ``session`` through the FastF1 API.
+
+    A session that already has its results and laps (loaded earlier or
+    restored from the store) only gets the missing parts from FastF1's
+    loaders for them. A second ``Session.load`` would post-process the
+    laps again, which is not idempotent: every run appends another lap for
+    each car that retired on track.
+    """
+    if not hasattr(session, '_results') or ('laps' in parts and not hasattr(session, '_laps')):
+        session.load(**{part: part in parts for part in LOADABLE_PARTS})
+        return
+    if not session.f1_api_support:
+        return
+    if 'telemetry' in parts:
+        session._load_telemetry()
+    if 'weather' in parts:
+        session._load_weather_data()
+    if 'messages' in parts:
+        session._load_race_control_messages()
+        session._set_laps_deleted_from_rcm()
+
+
+class SessionStore:
+    """Parquet store of parsed session data rooted at ``root``.
+
+    ``max_bytes`` and ``max_age`` (seconds) are the retention policy of
+    the store's :class:`~utils.store_index.StoreIndex`.
+    """
+
+    def __init__(self, root, max_bytes=None, max_age=None):
+        self.root = root
+        self.index = StoreIndex(root, max_bytes, max_age)
+
+    def session_key(self, session):
+        """Directory of ``session`` relative to the root, with ``/``."""
+        return '/'.join([str(session.event.year), f"{int(session.event['RoundNumber']):02d}",
+                         session.name.replace(' ', '_')])
+
+    def session_dir(self, session):
+        return os.path.join(self.root, *self.session_key(session).split('/'))
+
+    def _read_meta(self, path):
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def stored_parts(self, session):
+        meta = self._read_meta(self.session_dir(session))
+        return frozenset(meta['parts']) if meta else frozenset()
+
+    def frame_times(self, session, parts):
+        """Modification times in ns of the stored frames of ``parts``, by
+        file name; frames that are not stored are left out."""
+        path = self.session_dir(session)
+        names = [name for part in parts if part in PART_FRAMES for name in PART_FRAMES[part]]
+        if 'telemetry' in parts:
+            names += TELEMETRY_FRAMES
+        times = {}
+        for name in names:
+            filename = f"{name.lstrip('_')}.parquet"
+            try:
+                times[filename] = os.stat(os.path.join(path, filename)).st_mtime_ns
+            except FileNotFoundError:
+                pass
+        return times
+
+    def _read_frame(self, path, name):
+        table = pq.read_table(os.path.join(path, f"{name.lstrip('_')}.parquet"),
+                              memory_map=True)
+        return table.to_pandas()
+
+    def _write_frame(self, path, name, frame):
+        target = os.path.join(path, f"{name.lstrip('_')}.parquet")
+        table = pa.Table.from_pandas(pd.DataFrame(frame), preserve_index=False)
+        pq.write_table(table, target + '.tmp')
+        os.replace(target + '.tmp', target)
+
+    def open_session(self, year, event, session_type):
+        """Unloaded session for a stored event, without asking the API.
+
+        ``event`` is a round number or an event name. Returns None if the
+        store has no such session.
+        """
+        year_dir = os.path.join(self.root, str(year))
+        if not os.path.isdir(year_dir):
+            return None
+        for round_dir in sorted(os.listdir(year_dir)):
+            for session_dir in sorted(os.listdir(os.path.join(year_dir, round_dir))):
+                meta = self._read_meta(os.path.join(year_dir, round_dir, session_dir))
+                if not meta or 'event' not in meta:
+                    continue
+                data = dict(meta['event'])
+                if event not in (data['RoundNumber'], data['EventName']):
+                    break
+                for key, value in data.items():
+                    if key.endswith('Date') or key.endswith('DateUtc'):
+                        data[key] = pd.Timestamp(value)
+                stored_event = Event(data, year=year)
+                try:
+                    name = stored_event.get_session_name(session_type)
+                except ValueError:
+                    return None
+                if name.replace(' ', '_') != session_dir:
+                    continue
+                return Session(stored_event, name, f1_api_support=True)
+        return None
+
+    def restore(self, session, parts):
+        """Load stored ``parts`` into ``session``.
+
+        Returns the parts that were restored, or None if the session has not
+        been stored at all. Driver results are restored with any stored
+        session, so an empty set still means the results are available.
+        All frames are read before the session is changed, so a session
+        that another process removes meanwhile counts as not stored.
+        """
+        path = self.session_dir(session)
+        meta = self._read_meta(path)
+        if meta is None:
+            return None
+
+        parts = frozenset(parts) & frozenset(meta['parts'])
+        names = ['results'] + [name for part in ('laps', 'weather', 'messages')
+                               if part in parts for name in PART_FRAMES[part]]
+        if 'telemetry' in parts:
+            names += TELEMETRY_FRAMES
+        try:
+            frames = {name: self._read_frame(path, name) for name in names}
+        except FileNotFoundError:
+            _logger.info("%s was removed from the session store while reading it", session)
+            return None
+
+        self.index.used(self.session_key(session))
+        session._session_info = meta['session_info']
+        session._session_split_times = [
+            _timedelta(t) for t in meta['session_split_times']
+        ] if meta['session_split_times'] else None
+        session._results = SessionResults(frames['results'])
+
+        if 'laps' in parts:
+            session._laps = Laps(frames['_laps'], session=session)
+            session._session_status = frames['_session_status']
+            session._track_status = frames['_track_status']
+            session._session_start_time = _timedelta(meta['session_start_time'])
+            session._total_laps = meta['total_laps']
+        for part in ('weather', 'messages'):
+            if part in parts:
+                for name in PART_FRAMES[part]:
+                    setattr(session, name, frames[name])
+        if 'telemetry' in parts:
+            session._t0_date = pd.Timestamp(meta['t0_date'])
+            for name in TELEMETRY_FRAMES:
+                frame = frames[name]
+                setattr(session, name, {
+                    drv: Telemetry(data.drop(columns='DriverNumber')
+                                   .reset_index(drop=True),
+                                   session=session, driver=drv)
+                    for drv, data in frame.groupby('DriverNumber', sort=False)
+                })
+        return parts
+
+    def save(self, session, parts):
+        """Write the loaded ``parts`` of ``session`` to the store.
+
+        The laps are written again with the messages, as FastF1 flags the
+        deleted laps when it loads the race control messages.
+        """
+        parts = set(parts)
+        if 'messages' in parts and hasattr(session, '_laps'):
+            parts.add('laps')
+        path = self.session_dir(session)
+        os.makedirs(path, exist_ok=True)
+        meta = self._read_meta(path) or {'parts': []}
+        stored = set(meta['parts'])
+
+        self._write_frame(path, 'results', session.results)
+        for part in parts:
+            if part == 'telemetry':
+                if not all(hasattr(session, name) for name in TELEMETRY_FRAMES):
+                    continue
+                for name in TELEMETRY_FRAMES:
+                    frames = [data.assign(DriverNumber=drv)
+                              for drv, data in getattr(session, name).items()]
+                    if frames:
+                        self._write_frame(path, name, pd.concat(frames))
+                meta['t0_date'] = session.t0_date.isoformat()
+            else:
+                names = PART_FRAMES[part]
+                if not all(hasattr(session, name) for name in names):
+                    # FastF1 could not load this part, do not store it
+                    continue
+                for name in names:
+                    self._write_frame(path, name, getattr(session, name))
+                if part == 'laps':
+                    meta['session_start_time'] = _seconds(session._session_start_time)
+                    meta['total_laps'] = (None if session._total_laps is None
+                                          else int(session._total_laps))
+            stored.add(part)
+
+        meta['parts'] = sorted(stored)
+        meta['event'] = json.loads(session.event.to_json(date_format='iso'))
+        meta['session_info'] = getattr(session, '_session_info', None)
+        meta['session_split_times'] = [
+            _seconds(t) for t in session._session_split_times or ()
+        ]
+        with open(os.path.join(path, 'meta.json.tmp'), 'w') as f:
+            json.dump(meta, f, default=str)
+        os.replace(os.path.join(path, 'meta.json.tmp'),
+                   os.path.join(path, 'meta.json'))
+        self.index.stored(self.session_key(session))
+
+    def load(self, session, parts, load=fastf1_load):
+        """Restore ``parts`` of ``session``, loading the parts that are
+        not stored yet with ``load(session, parts)`` and storing them.
+
+        Only one process loads a session at a time. The others wait until
+        it is done and then restore what it stored.
+        """
+        parts = frozenset(parts)
+        restored = self.restore(session, parts)
+        if restored is not None and not parts - restored:
+            return
+        with self.index.lease(self.session_key(session)) as waited:
+            if waited:
+                # Another process loaded the session in the meantime
+                restored = self.restore(session, parts)
+                if restored is not None and not parts - restored:
+                    return
+            missing = parts if restored is None else parts - restored
+            load(session, missing)
+            try:
+                self.save(session, missing)
+            except Exception:
+                _logger.warning("Failed to write %s to the session store",
+                                session, exc_info=True)
+
+
+def default_store():
+    """Store configured through F1VIZ_STORE_DIR; an empty value disables it.
+
+    F1VIZ_STORE_MAX_MB and F1VIZ_STORE_MAX_AGE_DAYS set the retention
+    policy of the stored sessions; FastF1's raw cache in the store is not
+    included.
+    """
+    root = os.environ.get('F1VIZ_STORE_DIR', DEFAULT_STORE_DIR)
+    if not root:
+        return None
+    max_mb = float(os.environ.get('F1VIZ_STORE_MAX_MB', DEFAULT_MAX_MB))
+    max_age_days = float(os.environ.get('F1VIZ_STORE_MAX_AGE_DAYS', DEFAULT_MAX_AGE_DAYS))
+    return SessionStore(root, max_bytes=int(max_mb * 1024 ** 2) or None,
+                        max_age=max_age_days * 24 * 3600 or None)
+
+
+def default_fastf1_cache_dir():
+    """FastF1 cache directory: F1VIZ_FASTF1_CACHE, else ``fastf1`` in the
+    session store, else None for FastF1's default location. Its size is
+    not bounded by the store's retention policy."""
+    cache_dir = os.environ.get('F1VIZ_FASTF1_CACHE')
+    if cache_dir:
+        return cache_dir
+    root = os.environ.get('F1VIZ_STORE_DIR', DEFAULT_STORE_DIR)
+    return os.path.join(root, 'fastf1') if root else None
+
+
+def build(store, years, session_types, parts):
+    """Pre-build the store for all past sessions of the given seasons."""
+    parts = frozenset(parts)
+    now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+    for year in years:
+        schedule = fastf1.get_event_schedule(year, include_testing=False)
+        for _, event in schedule.iterrows():
+            for session_type in session_types:
+                try:
+                    session = fastf1.get_session(year, event['RoundNumber'],
+                                                 session_type)
+                except ValueError:
+                    # the event has no such session (e.g. no sprint)
+                    continue
+                if pd.isna(session.date) or session.date > now:
+                    continue
+                if parts <= store.stored_parts(session):
+                    print(f"{session}: up to date")
+                    continue
+                try:
+                    store.load(session, parts)
+                    print(f"{session}: stored")
+                except Exception as exc:
+                    print(f"{session}: failed ({exc})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Pre-build the columnar session store.")
+    parser.add_argument('--start', type=int, required=True,
+                        help="first season to store")
+    parser.add_argument('--end', type=int, required=True,
+                        help="last season to store (inclusive)")
+    parser.add_argument('--sessions', nargs='+', default=['R', 'Q'],
+                        help="session types to store (default: R Q)")
+    parser.add_argument('--parts', nargs='+', default=['laps', 'telemetry'],
+                        choices=LOADABLE_PARTS,
+                        help="data parts to store (default: laps telemetry)")
+    parser.add_argument('--store', default=None,
+                        help="store directory (default: F1VIZ_STORE_DIR or "
+                             f"'{DEFAULT_STORE_DIR}')")
+    args = parser.parse_args(argv)
+
+    store = SessionStore(args.store) if args.store else default_store()
+    if store is None:
+        parser.error("the session store is disabled (F1VIZ_STORE_DIR is empty)")
+    build(store, range(args.start, args.end + 1), args.sessions, args.parts)
+
+
+if __name__ == '__main__':
+    main()
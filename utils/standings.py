@@ -0,0 +1,322 @@
+"""Season standings engine backed by the Ergast API.
+
+Rounds are fetched concurrently over a pooled HTTP session. Results of
+finished rounds never change, so every round is cached permanently on disk
+and in memory and only rounds that are new since the last request are
+fetched again.
+
+On top of that, :class:`StandingsTable` keeps the results of many seasons in
+one persistent table together with precomputed cumulative points per driver
+and constructor, so standings after any round and multi-season heatmaps are
+plain lookups.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# FastF1 uses the same Ergast compatible mirror
+DEFAULT_ERGAST_URL = 'https://api.jolpi.ca/ergast/f1'
+DEFAULT_CACHE_DIR = 'standings_cache'
+FIRST_SEASON = 2018
+# Results are only taken as final some hours after the race start
+RESULTS_FINAL_AFTER = pd.Timedelta(hours=6)
+SCHEDULE_TTL = 3600
+
+
+class StandingsEngine:
+    """Fetches and caches per round race results (including sprints)."""
+
+    def __init__(self, base_url=DEFAULT_ERGAST_URL, cache_dir=DEFAULT_CACHE_DIR,
+                 max_workers=8, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        # One pooled session so that all workers reuse their connections
+        self._http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=max_workers,
+            max_retries=Retry(total=3, backoff_factor=0.5,
+                              status_forcelist=(429, 500, 502, 503, 504))
+        )
+        self._http.mount('http://', adapter)
+        self._http.mount('https://', adapter)
+
+        self._rounds = {}  # (season, round) -> DataFrame
+        self._schedules = {}  # season -> (fetch time, DataFrame)
+        self._lock = threading.Lock()
+
+    def _get(self, path):
+        response = self._http.get(f"{self.base_url}/{path}.json",
+                                  params={'limit': 100}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()['MRData']
+
+    def schedule(self, season):
+        """Race schedule with round, raceName and the race start (UTC)."""
+        with self._lock:
+            cached = self._schedules.get(season)
+        if cached is not None and time.monotonic() - cached[0] < SCHEDULE_TTL:
+            return cached[1]
+
+        races = self._get(str(season))['RaceTable']['Races']
+        schedule = pd.DataFrame({
+            'round': [int(race['round']) for race in races],
+            'raceName': [race['raceName'] for race in races],
+            # Older seasons come without a start time
+            'start': pd.to_datetime(
+                [f"{race['date']}T{race.get('time', '00:00:00Z')}" for race in races],
+                utc=True
+            ).tz_localize(None),
+        })
+        with self._lock:
+            self._schedules[season] = (time.monotonic(), schedule)
+        return schedule
+
+    def _cache_path(self, season, rnd):
+        return os.path.join(self.cache_dir, str(season), f'{rnd:02d}.parquet')
+
+    def _cached_round(self, season, rnd):
+        with self._lock:
+            frame = self._rounds.get((season, rnd))
+        if frame is None and self.cache_dir:
+            path = self._cache_path(season, rnd)
+            if os.path.exists(path):
+                frame = pd.read_parquet(path)
+                with self._lock:
+                    self._rounds[(season, rnd)] = frame
+        return frame
+
+    def _store_round(self, season, rnd, frame):
+        with self._lock:
+            self._rounds[(season, rnd)] = frame
+        if self.cache_dir:
+            path = self._cache_path(season, rnd)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            frame.to_parquet(path + '.tmp', index=False)
+            os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def _parse_results(races, key):
+        if not races:
+            return pd.DataFrame(columns=['driverCode', 'constructor', 'points'])
+        return pd.DataFrame({
+            'driverCode': [row['Driver'].get('code')
+                           or row['Driver']['driverId'][:3].upper()
+                           for row in races[0][key]],
+            'constructor': [row['Constructor']['name'] for row in races[0][key]],
+            'points': [float(row['points']) for row in races[0][key]],
+        })
+
+    def fetch_round(self, season, rnd, race_name):
+        """Race plus sprint points of one round, straight from the API."""
+        race = self._parse_results(
+            self._get(f'{season}/{rnd}/results')['RaceTable']['Races'], 'Results')
+        if race.empty:
+            raise ValueError("no results available yet")
+        sprint = self._parse_results(
+            self._get(f'{season}/{rnd}/sprint')['RaceTable']['Races'], 'SprintResults')
+        if not sprint.empty:
+            sprint_points = sprint.set_index('driverCode')['points']
+            race['points'] += race['driverCode'].map(sprint_points).fillna(0)
+
+        race.insert(0, 'round', rnd)
+        race.insert(1, 'race', race_name.removesuffix(' Grand Prix'))
+        return race
+
+    def season_results(self, season, on_error=None):
+        """Per round results of all finished rounds of ``season``.
+
+        Rounds that are not cached yet are fetched concurrently. A round that
+        fails is skipped and reported through ``on_error(race_name, exc)``.
+        """
+        schedule = self.schedule(season)
+        now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+        finished = schedule[schedule['start'] + RESULTS_FINAL_AFTER < now]
+
+        results = {}
+        missing = []
+        for rnd, race_name in zip(finished['round'], finished['raceName']):
+            frame = self._cached_round(season, rnd)
+            if frame is None:
+                missing.append((rnd, race_name))
+            else:
+                results[rnd] = frame
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {
+                    pool.submit(self.fetch_round, season, rnd, race_name): (rnd, race_name)
+                    for rnd, race_name in missing
+                }
+                for future, (rnd, race_name) in futures.items():
+                    try:
+                        frame = future.result()
+                    except Exception as exc:
+                        if on_error is not None:
+                            on_error(race_name, exc)
+                        continue
+                    self._store_round(season, rnd, frame)
+                    results[rnd] = frame
+
+        return [results[rnd] for rnd in sorted(results)]
+
+
+class _SeasonIndex:
+    __slots__ = ('points', 'cumulative', 'after')
+
+    def __init__(self, points):
+        # Per round points (NaN if not classified) and running totals, both
+        # with one row per driver or constructor and one column per round
+        self.points = points
+        self.cumulative = points.fillna(0).cumsum(axis=1)
+        self.after = {
+            rnd: self.cumulative[rnd].sort_values(ascending=False)
+            for rnd in self.cumulative.columns
+        }
+
+
+class StandingsTable:
+    """Per round results of many seasons, persisted under ``path``.
+
+    :meth:`update` appends rounds that are not in the table yet. The index of
+    a season is rebuilt only when the season gains new rounds.
+    """
+
+    COLUMNS = ['season', 'round', 'race', 'driverCode', 'constructor', 'points']
+    KINDS = {'driver': 'driverCode', 'constructor': 'constructor'}
+
+    def __init__(self, engine, path=None):
+        self.engine = engine
+        self.path = path
+        self.complete = set()  # seasons that cannot gain rounds anymore
+        self._seasons = {}  # season -> result rows of the season
+        self._index = {}  # (kind, season) -> _SeasonIndex
+        self._lock = threading.Lock()
+        if path and os.path.exists(os.path.join(path, 'meta.json')):
+            with open(os.path.join(path, 'meta.json')) as f:
+                self.complete = set(json.load(f)['complete'])
+            rows = pd.read_parquet(os.path.join(path, 'results.parquet'))
+            for season, frame in rows.groupby('season'):
+                self._add(int(season), frame.reset_index(drop=True))
+
+    def seasons(self):
+        with self._lock:
+            return sorted(self._seasons)
+
+    def rounds(self, season):
+        """Races of ``season`` in the table, keyed by round number."""
+        with self._lock:
+            frame = self._seasons.get(season)
+        if frame is None:
+            return {}
+        return dict(frame.drop_duplicates('round')[['round', 'race']].values)
+
+    def _add(self, season, frame):
+        # Caller holds the lock or owns the table exclusively
+        self._seasons[season] = frame
+        for kind, column in self.KINDS.items():
+            points = frame.pivot_table(index=column, columns='round',
+                                       values='points', aggfunc='sum')
+            self._index[(kind, season)] = _SeasonIndex(points)
+
+    def add_results(self, season, results):
+        """Append per round result frames of ``season``; known rounds are
+        ignored. Returns the number of rounds added."""
+        with self._lock:
+            known = self._seasons.get(season)
+            known_rounds = set() if known is None else set(known['round'])
+            new = [frame for frame in results
+                   if frame['round'].iloc[0] not in known_rounds]
+            if not new:
+                return 0
+            frame = pd.concat(([] if known is None else [known])
+                              + [f.assign(season=season)[self.COLUMNS] for f in new],
+                              ignore_index=True)
+            self._add(season, frame.sort_values('round', kind='stable')
+                      .reset_index(drop=True))
+            return len(new)
+
+    def update(self, seasons, on_error=None):
+        """Fetch and append new rounds of ``seasons``, then persist."""
+        added = 0
+        now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+        for season in seasons:
+            if season in self.complete:
+                continue
+            added += self.add_results(
+                season, self.engine.season_results(season, on_error=on_error))
+            schedule = self.engine.schedule(season)
+            if (len(schedule) and len(self.rounds(season)) == len(schedule)
+                    and (schedule['start'] + RESULTS_FINAL_AFTER < now).all()):
+                self.complete.add(season)
+        if added:
+            self.save()
+        return added
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            rows = pd.concat([self._seasons[s] for s in sorted(self._seasons)],
+                             ignore_index=True)
+            complete = sorted(self.complete)
+        target = os.path.join(self.path, 'results.parquet')
+        rows.to_parquet(target + '.tmp', index=False)
+        os.replace(target + '.tmp', target)
+        with open(os.path.join(self.path, 'meta.json.tmp'), 'w') as f:
+            json.dump({'complete': complete}, f)
+        os.replace(os.path.join(self.path, 'meta.json.tmp'),
+                   os.path.join(self.path, 'meta.json'))
+
+    def _season_index(self, season, kind):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown standings kind '{kind}'")
+        with self._lock:
+            index = self._index.get((kind, season))
+        if index is None:
+            raise ValueError(f"No results stored for the {season} season")
+        return index
+
+    def standings_after(self, season, rnd, kind='driver'):
+        """Points per driver (or constructor) after round ``rnd``, best first."""
+        after = self._season_index(season, kind).after
+        if rnd not in after:
+            raise ValueError(f"Round {rnd} of {season} is not in the standings")
+        return after[rnd]
+
+    def heatmap(self, seasons, kind='driver', cumulative=False):
+        """Points table with one column per round of all ``seasons``, rows
+        sorted by total points."""
+        tables, totals = [], []
+        for season in sorted(seasons):
+            index = self._season_index(season, kind)
+            table = index.cumulative if cumulative else index.points
+            races = self.rounds(season)
+            tables.append(table.set_axis(
+                [races[rnd] if len(seasons) == 1 else f"{season} {races[rnd]}"
+                 for rnd in table.columns], axis=1))
+            totals.append(index.cumulative.iloc[:, -1])
+        total = pd.concat(totals, axis=1).sum(axis=1)
+        return pd.concat(tables, axis=1).loc[total.sort_values(ascending=False).index]
+
+
+standings_engine = StandingsEngine(
+    base_url=os.environ.get('F1VIZ_ERGAST_URL', DEFAULT_ERGAST_URL),
+    cache_dir=os.environ.get('F1VIZ_STANDINGS_DIR', DEFAULT_CACHE_DIR),
+)
+
+standings_table = StandingsTable(
+    standings_engine,
+    path=os.path.join(standings_engine.cache_dir, 'table')
+    if standings_engine.cache_dir else None,
+)
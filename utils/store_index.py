@@ -0,0 +1,267 @@
+"""Index of the session store shared by several processes.
+
+Replicas of the app behind a load balancer, the prefetch process and
+report runs can all point at the same session store directory
+(F1VIZ_STORE_DIR). The store itself is plain files; this index is a
+SQLite database next to them, which every process opens and which
+SQLite's file locking keeps consistent. It holds
+
+* a load lease per session that a process is loading right now. Only the
+  holder loads the session, the other processes wait for the lease to be
+  released and then restore what it stored. The holder renews its lease
+  while the load runs, so the lease of a process that died expires after
+  ``lease_seconds``.
+* the size and last use of every stored session, for the retention
+  policy: sessions unused for more than ``max_age`` seconds are removed,
+  and the least recently used ones go first while the store is larger
+  than ``max_bytes``. Sessions being loaded are never removed. FastF1's
+  raw cache in ``<root>/fastf1`` is neither counted nor removed.
+
+The store has to be on a local file system (or a volume that containers
+on one host share), as SQLite's locking is not reliable over NFS.
+"""
+import glob
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from utils import jobs
+
+INDEX_FILE = 'index.sqlite'
+
+# Seconds without renewal after which the lease of a dead process expires
+DEFAULT_LEASE_SECONDS = 60
+
+# Seconds to wait for another process's load before loading anyway
+DEFAULT_WAIT_SECONDS = 15 * 60
+
+# Seconds between checks whether a lease was released
+POLL_SECONDS = 0.5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    renewed_at REAL NOT NULL
+);
+"""
+
+_logger = logging.getLogger(__name__)
+
+
+def dir_size(path):
+    """Total size in bytes of the files in ``path``."""
+    total = 0
+    for name in os.listdir(path):
+        try:
+            total += os.path.getsize(os.path.join(path, name))
+        except OSError:
+            pass
+    return total
+
+
+class StoreIndex:
+    """Leases and retention of the session store at ``root``; session
+    keys are directories relative to the root."""
+
+    def __init__(self, root, max_bytes=None, max_age=None,
+                 lease_seconds=DEFAULT_LEASE_SECONDS, wait_seconds=DEFAULT_WAIT_SECONDS):
+        self.root = root
+        self.path = os.path.join(root, INDEX_FILE)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.lease_seconds = lease_seconds
+        self.wait_seconds = wait_seconds
+        self.waits = 0  # loads of this process that waited for another one
+        self.removed = 0  # sessions this process removed by the retention policy
+        self._local = threading.local()  # one connection per thread
+
+    def __getstate__(self):
+        # Connections stay with their process; a copy sent to a worker
+        # process opens its own
+        state = self.__dict__.copy()
+        del state['_local']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            os.makedirs(self.root, exist_ok=True)
+            new = not os.path.exists(self.path)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+            if new:
+                self.reindex()
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def reindex(self):
+        """Add sessions stored before the index existed, with their last
+        modification as last use."""
+        rows = []
+        for meta in glob.glob(os.path.join(self.root, '*', '*', '*', 'meta.json')):
+            path = os.path.dirname(meta)
+            modified = os.path.getmtime(meta)
+            rows.append((os.path.relpath(path, self.root).replace(os.sep, '/'),
+                         dir_size(path), modified, modified))
+        with self._transaction() as connection:
+            connection.executemany('INSERT OR IGNORE INTO sessions VALUES (?, ?, ?, ?)', rows)
+
+    def _acquire(self, key, owner):
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute('SELECT owner, renewed_at FROM leases WHERE key = ?',
+                                     (key,)).fetchone()
+            if row is not None and row[0] != owner and row[1] > now - self.lease_seconds:
+                return False
+            connection.execute('INSERT OR REPLACE INTO leases VALUES (?, ?, ?)', (key, owner, now))
+            return True
+
+    def _renew(self, key, owner, stop):
+        while not stop.wait(self.lease_seconds / 3):
+            with self._transaction() as connection:
+                connection.execute('UPDATE leases SET renewed_at = ? WHERE key = ? AND owner = ?',
+                                   (time.time(), key, owner))
+
+    @contextmanager
+    def lease(self, key):
+        """Hold the load lease of ``key`` for the block, waiting while
+        another process holds it.
+
+        Yields whether it had to wait, in which case the other process may
+        have stored the data already. After ``wait_seconds`` it gives up
+        waiting and yields without the lease.
+        """
+        owner = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        waited = False
+        deadline = time.monotonic() + self.wait_seconds
+        while not self._acquire(key, owner):
+            if not waited:
+                jobs.report('waiting for another process')
+                self.waits += 1
+                waited = True
+            if time.monotonic() > deadline:
+                _logger.warning("Gave up waiting for another process to load %s", key)
+                yield waited
+                return
+            time.sleep(POLL_SECONDS)
+
+        stop = threading.Event()
+        renewer = threading.Thread(target=self._renew, args=(key, owner, stop),
+                                   name='store-lease', daemon=True)
+        renewer.start()
+        try:
+            yield waited
+        finally:
+            stop.set()
+            renewer.join()
+            with self._transaction() as connection:
+                connection.execute('DELETE FROM leases WHERE key = ? AND owner = ?', (key, owner))
+
+    def used(self, key):
+        """Note that ``key`` was read from the store."""
+        try:
+            with self._transaction() as connection:
+                connection.execute('UPDATE sessions SET used_at = ? WHERE key = ?',
+                                   (time.time(), key))
+        except sqlite3.Error:
+            _logger.warning("Failed to update the session store index", exc_info=True)
+
+    def stored(self, key):
+        """Note that ``key`` was written, then apply the retention policy."""
+        now = time.time()
+        size = dir_size(os.path.join(self.root, key))
+        with self._transaction() as connection:
+            connection.execute(
+                'INSERT INTO sessions VALUES (?, ?, ?, ?) ON CONFLICT(key) DO UPDATE '
+                'SET size = excluded.size, stored_at = excluded.stored_at, used_at = excluded.used_at',
+                (key, size, now, now))
+        self.prune(keep=key)
+
+    def prune(self, keep=None):
+        """Remove the sessions the retention policy does not keep, except
+        ``keep`` and sessions being loaded; returns their keys."""
+        if not self.max_bytes and not self.max_age:
+            return []
+        now = time.time()
+        remove = []
+        with self._transaction() as connection:
+            rows = connection.execute(
+                'SELECT key, size, used_at FROM sessions ORDER BY used_at').fetchall()
+            leased = {key for key, in connection.execute(
+                'SELECT key FROM leases WHERE renewed_at > ?', (now - self.lease_seconds,))}
+            total = sum(size for _, size, _ in rows)
+            for row in rows:
+                key, size, used_at = row
+                if key == keep or key in leased:
+                    continue
+                if ((self.max_age and used_at < now - self.max_age)
+                        or (self.max_bytes and total > self.max_bytes)):
+                    remove.append(row)
+                    total -= size
+            connection.executemany('DELETE FROM sessions WHERE key = ?', [row[:1] for row in remove])
+
+        removed = []
+        for key, size, used_at in remove:
+            # Moved aside first, so that no process reads a half deleted
+            # session; files other processes have mapped stay readable
+            path = os.path.join(self.root, key)
+            trash = f"{path}.removed-{os.getpid()}"
+            try:
+                os.replace(path, trash)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # E.g. files in use on Windows; kept for the next prune
+                _logger.warning("Could not remove %s from the session store", key, exc_info=True)
+                with self._transaction() as connection:
+                    connection.execute('INSERT OR IGNORE INTO sessions VALUES (?, ?, ?, ?)',
+                                       (key, size, used_at, used_at))
+                continue
+            shutil.rmtree(trash, ignore_errors=True)
+            removed.append(key)
+        self.removed += len(removed)
+        return removed
+
+    def stats(self):
+        now = time.time()
+        connection = self._connect()
+        sessions, size = connection.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions').fetchone()
+        loading, = connection.execute(
+            'SELECT COUNT(*) FROM leases WHERE renewed_at > ?', (now - self.lease_seconds,)).fetchone()
+        return {
+            'sessions': sessions,
+            'size_mb': size / 1024 ** 2,
+            'max_mb': self.max_bytes / 1024 ** 2 if self.max_bytes else None,
+            'loading': loading,
+            'waits': self.waits,
+            'removed': self.removed,
+        }
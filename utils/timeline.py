@@ -0,0 +1,85 @@
+"""Race positions and gaps lap by lap.
+
+:func:`race_timeline` derives for every driver and completed lap the
+cumulative race time, the position, the gap to the leader and the interval
+to the car ahead from ``session.laps`` alone, with grouped cumulative sums
+and ranks instead of a loop over laps:
+
+* pit laps count with their full lap time and are flagged as ``PitStop``
+* laps without a lap time (red flags, timing gaps) use the time between
+  crossing the line at the start and at the end of the lap
+* lapped cars are compared on the same lap count; ``LapsDown`` says how
+  many laps the leader had completed more when they crossed the line
+
+The timeline is memoized per session object like :mod:`utils.pace`.
+"""
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Driver', 'Team', 'LapNumber', 'RaceTime', 'Position', 'GapToLeader',
+           'Interval', 'LapsDown', 'PitStop']
+
+
+def race_timeline(laps):
+    """Position and gap of every driver after every completed lap.
+
+    Returns a frame with the columns in ``COLUMNS``, ordered by lap and
+    position; times are in seconds.
+    """
+    laps = laps.loc[laps['LapNumber'].notna(), ['Driver', 'Team', 'LapNumber', 'LapTime', 'Time',
+                                                'LapStartTime', 'PitInTime', 'PitOutTime']]
+    if laps.empty:
+        raise ValueError("No laps found in this session!")
+    laps = laps.sort_values(['Driver', 'LapNumber'], kind='stable')
+
+    # Duration of every lap; the line crossing times fill in missing lap times
+    lap_time = laps['LapTime'].fillna(laps['Time'] - laps['LapStartTime'])
+    timeline = pd.DataFrame({
+        'Driver': laps['Driver'].to_numpy(),
+        'Team': laps['Team'].to_numpy(),
+        'LapNumber': laps['LapNumber'].to_numpy(dtype=int),
+        'LapSeconds': lap_time.dt.total_seconds().to_numpy(),
+        'PitStop': (laps['PitInTime'].notna() | laps['PitOutTime'].notna()).to_numpy()
+                   & (laps['LapNumber'] > 1).to_numpy(),
+    })
+
+    # A lap without any timing ends the race time of that driver; later laps
+    # can not be placed
+    untimed = timeline['LapSeconds'].isna().groupby(timeline['Driver'], sort=False).cummax()
+    timeline['RaceTime'] = timeline.groupby('Driver', sort=False)['LapSeconds'].cumsum()
+    timeline = timeline.loc[~untimed].copy()
+
+    # Position among all drivers that completed the same lap
+    by_lap = timeline.groupby('LapNumber', sort=False)['RaceTime']
+    timeline['Position'] = by_lap.rank(method='first').astype(int)
+    timeline['GapToLeader'] = timeline['RaceTime'] - by_lap.transform('min')
+    timeline = timeline.sort_values(['LapNumber', 'Position'], kind='stable').reset_index(drop=True)
+    timeline['Interval'] = timeline.groupby('LapNumber', sort=False)['RaceTime'].diff().fillna(0.0)
+
+    # Laps the leader had completed by the time each driver crossed the line
+    leader = timeline.loc[timeline['Position'] == 1]
+    leader_times = np.maximum.accumulate(leader['RaceTime'].to_numpy())
+    leader_laps = leader['LapNumber'].to_numpy()
+    completed = np.searchsorted(leader_times, timeline['RaceTime'].to_numpy(), side='left')
+    leader_completed = np.where(completed > 0, leader_laps[np.maximum(completed - 1, 0)], 0)
+    timeline['LapsDown'] = np.maximum(leader_completed - timeline['LapNumber'].to_numpy(), 0)
+
+    return timeline[COLUMNS]
+
+
+_timelines = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def session_timeline(session):
+    """Memoized :func:`race_timeline` of a session with laps loaded."""
+    with _lock:
+        timeline = _timelines.get(session)
+    if timeline is None:
+        timeline = race_timeline(session.laps)
+        with _lock:
+            timeline = _timelines.setdefault(session, timeline)
+    return timeline
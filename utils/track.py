@@ -0,0 +1,184 @@
+"""Circuit geometry shared by the track map pages.
+
+The outline of a circuit only depends on its layout, so it is built once
+per layout from the fastest lap of the first session that asks for it and
+then reused: a centerline polyline with its cumulative distance, the map
+rotation and the corner markers from ``session.get_circuit_info()``.
+Geometries are kept in memory and, when the session source has a store,
+written to ``<store>/tracks/`` so later runs do not rebuild them.
+"""
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils import lod, session_loader
+
+CORNER_COLUMNS = ['X', 'Y', 'Number', 'Letter', 'Angle', 'Distance']
+
+_logger = logging.getLogger(__name__)
+
+
+class TrackGeometry:
+    """Centerline, rotation and corners of one circuit layout.
+
+    ``distance`` is the cumulative distance along the centerline in metres,
+    so a distance from lap telemetry maps to a track position with a binary
+    search (:meth:`position_at`).
+    """
+
+    def __init__(self, x, y, distance, rotation=0.0, corners=None):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.distance = np.asarray(distance, dtype=float)
+        self.rotation = float(rotation)
+        self.corners = (pd.DataFrame(columns=CORNER_COLUMNS)
+                        if corners is None else corners[CORNER_COLUMNS])
+        # False if the circuit info was unavailable; such geometries are
+        # not cached, so the next request tries the circuit info again
+        self.complete = True
+        self._outlines = {}
+
+    @classmethod
+    def from_session(cls, session):
+        """Build the geometry from the fastest lap of a loaded session."""
+        lap = session.laps.pick_fastest()
+        if lap is None or pd.isna(lap['LapTime']):
+            raise ValueError("No fastest lap available to build the track map!")
+        pos = lap.get_telemetry()
+        pos = pos.loc[pos['X'].notna() & pos['Y'].notna()]
+        # Distance is non-decreasing, make it strictly increasing for the index
+        pos = pos.loc[np.diff(pos['Distance'].to_numpy(), prepend=-np.inf) > 0]
+
+        try:
+            circuit_info = session.get_circuit_info()
+        except Exception as exc:
+            _logger.warning("No circuit info for %s (%s), the track map is not "
+                            "rotated", session, exc)
+            circuit_info = None
+        if circuit_info is None:
+            geometry = cls(pos['X'], pos['Y'], pos['Distance'])
+            geometry.complete = False
+            return geometry
+        return cls(pos['X'], pos['Y'], pos['Distance'], circuit_info.rotation,
+                   circuit_info.corners)
+
+    @property
+    def length(self):
+        return self.distance[-1]
+
+    def rotate(self, x, y):
+        """Positions turned by the map rotation of the circuit."""
+        angle = self.rotation / 180 * np.pi
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        return (x * np.cos(angle) - y * np.sin(angle),
+                x * np.sin(angle) + y * np.cos(angle))
+
+    def index_at(self, distance):
+        """Index of the centerline point at or before each distance."""
+        distance = np.mod(np.asarray(distance, dtype=float), self.length)
+        return np.clip(np.searchsorted(self.distance, distance, side='right') - 1,
+                       0, len(self.distance) - 2)
+
+    def position_at(self, distance):
+        """Centerline positions at the given lap distances (not rotated)."""
+        distance = np.mod(np.asarray(distance, dtype=float), self.length)
+        i = self.index_at(distance)
+        t = (distance - self.distance[i]) / (self.distance[i + 1] - self.distance[i])
+        return (self.x[i] + t * (self.x[i + 1] - self.x[i]),
+                self.y[i] + t * (self.y[i + 1] - self.y[i]))
+
+    def corner_labels(self, offset=800):
+        """Corner labels with their rotated text positions, set off from the
+        track by ``offset`` in the direction of each corner marker."""
+        angle = self.corners['Angle'].to_numpy(dtype=float) / 180 * np.pi
+        x, y = self.rotate(self.corners['X'] + offset * np.cos(angle),
+                           self.corners['Y'] + offset * np.sin(angle))
+        labels = [f"{number}{letter}" for number, letter
+                  in zip(self.corners['Number'], self.corners['Letter'])]
+        return list(zip(labels, x, y))
+
+    def outline(self, tolerance=lod.DEFAULT_TOLERANCE):
+        """Rotated and simplified closed centerline for drawing."""
+        if tolerance not in self._outlines:
+            keep = lod.simplify(self.x, self.y, tolerance=tolerance)
+            x, y = self.rotate(self.x[keep], self.y[keep])
+            self._outlines[tolerance] = (np.append(x, x[0]), np.append(y, y[0]))
+        return self._outlines[tolerance]
+
+    def save(self, path):
+        corners = {f'corner_{name}': self.corners[name].to_numpy(
+                       dtype=str if name == 'Letter' else float)
+                   for name in CORNER_COLUMNS}
+        np.savez(path, x=self.x, y=self.y, distance=self.distance,
+                 rotation=self.rotation, **corners)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            corners = pd.DataFrame({name: data[f'corner_{name}']
+                                    for name in CORNER_COLUMNS})
+            corners['Number'] = corners['Number'].astype(int)
+            return cls(data['x'], data['y'], data['distance'],
+                       float(data['rotation']), corners)
+
+
+class TrackCache:
+    """Track geometries keyed by circuit layout (season and location)."""
+
+    def __init__(self):
+        self._geometries = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        store = getattr(session_loader.source, 'store', None)
+        if store is None:
+            return None
+        year, location = key
+        name = ''.join(c if c.isalnum() else '_' for c in location)
+        return os.path.join(store.root, 'tracks', f'{year}_{name}.npz')
+
+    def get(self, session):
+        """Geometry of the circuit of ``session``, built on first use.
+
+        The session needs laps and telemetry loaded if the geometry is not
+        cached yet.
+        """
+        key = (session.event.year, session.event['Location'])
+        with self._lock:
+            geometry = self._geometries.get(key)
+        if geometry is not None:
+            return geometry
+
+        path = self._path(key)
+        if path and os.path.exists(path):
+            geometry = TrackGeometry.load(path)
+        else:
+            geometry = TrackGeometry.from_session(session)
+            if not geometry.complete:
+                return geometry
+            if path:
+                try:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    geometry.save(path + '.tmp.npz')
+                    os.replace(path + '.tmp.npz', path)
+                except OSError:
+                    _logger.warning("Failed to store the track geometry of %s",
+                                    key, exc_info=True)
+        with self._lock:
+            return self._geometries.setdefault(key, geometry)
+
+    def clear(self):
+        with self._lock:
+            self._geometries.clear()
+
+
+track_cache = TrackCache()
+
+
+def track_geometry(session):
+    """Cached geometry of the circuit of ``session``."""
+    return track_cache.get(session)
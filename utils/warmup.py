@@ -0,0 +1,70 @@
+"""Interpreter warm-up at server start.
+
+Pages defer their plotting imports until a button is pressed (see
+:mod:`utils.lazy`), which keeps page switches fast but moves the cost to
+the first chart of every server process. :func:`warm_up` pays it ahead of
+time: it imports matplotlib, seaborn, SciPy's statistics, the FastF1
+plotting module with its colour tables and all chart modules, and draws
+and encodes a small figure so that the font cache and the Agg renderer
+are loaded too.
+
+The app runs it in a background thread when ``F1VIZ_WARMUP`` is set, so
+that it does not delay the first page view.
+"""
+import importlib
+import logging
+import pkgutil
+import threading
+import time
+
+# Shared libraries, in import order
+LIBRARIES = ['matplotlib.pyplot', 'seaborn', 'scipy.stats', 'fastf1.plotting', 'plotly.express']
+
+_logger = logging.getLogger(__name__)
+
+
+def chart_modules():
+    import charts
+    return [f'charts.{module.name}' for module in pkgutil.iter_modules(charts.__path__)]
+
+
+def warm_up():
+    """Import the plotting stack and draw once; returns the seconds spent
+    per step."""
+    timings = {}
+    for name in LIBRARIES + chart_modules():
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as exc:
+            _logger.warning("Could not preload %s: %s", name, exc)
+        timings[name] = time.perf_counter() - start
+
+    from matplotlib import pyplot as plt
+    from utils.figure_cache import encode_figure
+
+    start = time.perf_counter()
+    fig, ax = plt.subplots(figsize=(1, 1))
+    ax.set_title("F1")
+    encode_figure(fig)
+    timings['first figure'] = time.perf_counter() - start
+    return timings
+
+
+_started = False
+_lock = threading.Lock()
+
+
+def start_background():
+    """Run :func:`warm_up` in a background thread, once per process."""
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+
+    def run():
+        timings = warm_up()
+        _logger.info("Warm-up done in %.1f s", sum(timings.values()))
+
+    threading.Thread(target=run, name='warmup', daemon=True).start()